@@ -0,0 +1,261 @@
+# analysis/audio_descriptors.py
+# --------------------------------------------------
+# Descripteurs audio multi-features (une seule passe FFT)
+# - RMS (énergie)
+# - Flux spectral (changements brusques : cris, rires, impacts)
+# - Onset (pic de flux dans la fenêtre)
+# - Ratio bande voix 300-3400 Hz (voix vs musique / applaudissements)
+# → Score combiné, même échelle que l'enveloppe RMS
+# - FFT limitée aux fenêtres candidates (RMS forte) + un échantillon
+#   régulier pour les moyennes de la vidéo
+# --------------------------------------------------
+
+from functools import lru_cache
+
+import numpy as np
+
+
+# ==================================================
+# CONFIGURATION
+# ==================================================
+
+FRAMES_PER_WINDOW = 10          # 0.5s / 10 = trames de 50 ms
+VOICE_BAND_HZ = (300, 3400)
+FLUX_BANDS = 24                 # bandes log-espacées pour le flux spectral
+
+# colonnes du tableau de descripteurs
+DESCRIPTORS = ("rms", "flux", "onset", "voice_ratio")
+
+# pondération du score combiné (ratios à la moyenne globale)
+DESCRIPTOR_WEIGHTS = {
+    "rms": 0.5,
+    "flux": 0.25,
+    "onset": 0.25,
+}
+VOICE_FACTOR_MIN = 0.5   # musique / bruit large bande : pénalisé
+VOICE_FACTOR_MAX = 1.5   # voix dominante : favorisée
+
+# fenêtres passées par la FFT (le reste garde sa RMS)
+DESCRIPTOR_CANDIDATE_RATIO = 1.5   # RMS >= 1.5 × moyenne : candidate
+DESCRIPTOR_MEAN_STRIDE = 10        # 1 fenêtre sur 10 : moyennes de la vidéo
+
+
+# ==================================================
+# MATRICES DE BANDES (CALCULÉES UNE FOIS)
+# ==================================================
+
+@lru_cache(maxsize=8)
+def _spectral_layout(frame_size: int, sample_rate: int):
+    """
+    Fenêtre de Hann, matrice bins -> bandes log-espacées et masque voix
+    pour une taille de trame donnée
+    """
+    n_bins = frame_size // 2 + 1
+
+    edges = np.unique(np.geomspace(1, n_bins, FLUX_BANDS + 1).astype(int))
+    edges[0] = 0
+    bands = np.zeros((n_bins, len(edges) - 1))
+    for i in range(len(edges) - 1):
+        bands[edges[i]:edges[i + 1], i] = 1.0
+
+    freqs = np.fft.rfftfreq(frame_size, d=1 / sample_rate)
+    voice = (freqs >= VOICE_BAND_HZ[0]) & (freqs <= VOICE_BAND_HZ[1])
+
+    return np.hanning(frame_size), bands, voice
+
+
+def _frame_log_bands(frame: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Log-bandes d'une trame seule (référence du flux de la trame suivante)
+    """
+    hann, bands, _ = _spectral_layout(frame.size, sample_rate)
+    spectrum = np.fft.rfft(frame * hann)
+    return np.log1p((spectrum.real ** 2 + spectrum.imag ** 2) @ bands)
+
+
+# ==================================================
+# CALCUL PAR BLOC (BATCH FFT)
+# ==================================================
+
+def compute_audio_descriptors(
+    samples: np.ndarray,
+    window_size: int,
+    sample_rate: int = 16000,
+    prev_bands: np.ndarray = None
+):
+    """
+    Calcule les descripteurs de chaque fenêtre d'un bloc d'audio int16
+    - Toutes les trames du bloc passent dans UN rfft batché
+    - prev_bands : log-bandes de la dernière trame du bloc précédent
+      (flux continu en streaming), None en début de flux
+    Retourne (tableau (n_fenêtres, len(DESCRIPTORS)), dernière trame)
+    """
+    if samples.size == 0:
+        return np.zeros((0, len(DESCRIPTORS))), prev_bands
+
+    frame_size = window_size // FRAMES_PER_WINDOW
+    n_windows = -(-samples.size // window_size)
+
+    # dernière fenêtre partielle : complétée par du silence
+    # (float64 : le rfft NumPy y est nettement plus rapide qu'en float32)
+    padded = np.zeros(n_windows * window_size, dtype=np.float64)
+    padded[:samples.size] = samples
+    frames = padded.reshape(n_windows * FRAMES_PER_WINDOW, frame_size)
+
+    # --- RMS (domaine temporel, nb d'échantillons réels par fenêtre)
+    sq = np.einsum("ij,ij->i", frames, frames).reshape(n_windows, FRAMES_PER_WINDOW)
+    counts = np.full(n_windows, window_size, dtype=np.float64)
+    counts[-1] = samples.size - (n_windows - 1) * window_size
+    rms = np.sqrt(sq.sum(axis=1) / counts)
+
+    # --- Spectre de puissance : un seul rfft pour toutes les trames
+    hann, bands, voice = _spectral_layout(frame_size, sample_rate)
+    spectrum = np.fft.rfft(frames * hann, axis=1)
+    power = spectrum.real ** 2 + spectrum.imag ** 2
+
+    # --- Flux spectral (log-énergie par bande, variations positives)
+    log_bands = np.log1p(power @ bands)
+    previous = np.empty_like(log_bands)
+    previous[1:] = log_bands[:-1]
+    previous[0] = log_bands[0] if prev_bands is None else prev_bands
+    frame_flux = np.maximum(log_bands - previous, 0).sum(axis=1)
+    frame_flux = frame_flux.reshape(n_windows, FRAMES_PER_WINDOW)
+
+    flux = frame_flux.mean(axis=1)
+    onset = frame_flux.max(axis=1)
+
+    # --- Ratio d'énergie dans la bande voix
+    total_power = power.sum(axis=1).reshape(n_windows, FRAMES_PER_WINDOW).sum(axis=1)
+    voice_power = power[:, voice].sum(axis=1).reshape(n_windows, FRAMES_PER_WINDOW).sum(axis=1)
+    voice_ratio = voice_power / np.maximum(total_power, 1e-9)
+
+    features = np.column_stack([rms, flux, onset, voice_ratio])
+    return features, log_bands[-1]
+
+
+# ==================================================
+# FENÊTRES CANDIDATES SEULEMENT
+# ==================================================
+
+def descriptor_windows(energies: np.ndarray) -> tuple:
+    """
+    Fenêtres qui passent par la FFT
+    - candidates : RMS >= DESCRIPTOR_CANDIDATE_RATIO × moyenne
+      (une fenêtre calme ne devient plus un moment par le seul flux)
+    - échantillon : 1 fenêtre sur DESCRIPTOR_MEAN_STRIDE (moyennes des
+      descripteurs sur toute la vidéo)
+    Retourne (masque candidates, masque échantillon)
+    """
+    energies = np.asarray(energies, dtype=np.float64)
+
+    candidates = np.zeros(energies.size, dtype=bool)
+    if energies.size:
+        candidates = energies >= np.mean(energies) * DESCRIPTOR_CANDIDATE_RATIO
+
+    sample = np.zeros(energies.size, dtype=bool)
+    sample[::DESCRIPTOR_MEAN_STRIDE] = True
+
+    return candidates, sample
+
+
+def compute_selected_descriptors(
+    samples: np.ndarray,
+    window_size: int,
+    selected: np.ndarray,
+    sample_rate: int = 16000,
+    prev_frame: np.ndarray = None
+):
+    """
+    Descripteurs des seules fenêtres sélectionnées d'un bloc
+    - Fenêtres consécutives traitées ensemble (un rfft batché par plage)
+    - Flux de la 1re trame d'une plage : relatif à la trame qui la précède
+      (prev_frame : dernière trame du bloc précédent)
+    Retourne (tableau (n_sélectionnées, len(DESCRIPTORS)), dernière trame du bloc)
+    """
+    frame_size = window_size // FRAMES_PER_WINDOW
+    index = np.flatnonzero(selected)
+    blocks = []
+
+    if index.size:
+        for run in np.split(index, np.flatnonzero(np.diff(index) > 1) + 1):
+            start = run[0] * window_size
+            stop = (run[-1] + 1) * window_size
+
+            before = samples[start - frame_size:start] if start else prev_frame
+            prev_bands = None
+            if before is not None and before.size == frame_size:
+                prev_bands = _frame_log_bands(before.astype(np.float64), sample_rate)
+
+            features, _ = compute_audio_descriptors(
+                samples[start:stop],
+                window_size,
+                sample_rate=sample_rate,
+                prev_bands=prev_bands
+            )
+            blocks.append(features)
+
+    features = np.concatenate(blocks) if blocks else np.zeros((0, len(DESCRIPTORS)))
+    return features, samples[-frame_size:]
+
+
+# ==================================================
+# SCORE COMBINÉ
+# ==================================================
+
+def descriptor_means(features: np.ndarray) -> dict:
+    return {
+        name: max(float(np.mean(features[:, i])), 1e-9) if features.size else 1e-9
+        for i, name in enumerate(DESCRIPTORS)
+    }
+
+
+def combine_descriptors(features: np.ndarray, means: dict = None) -> np.ndarray:
+    """
+    Score d'intensité combiné par fenêtre
+    - Moyenne pondérée des ratios RMS / flux / onset à leur moyenne globale
+    - Modulée par la part de voix (relative à la moyenne de la vidéo)
+    - Remis à l'échelle de la RMS moyenne : utilisable tel quel à la place
+      de l'enveloppe d'énergie (seuils, baseline adaptative)
+    - means : moyennes de la vidéo entière (fenêtres partielles), sinon
+      celles de features
+    """
+    if features.size == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    columns = {name: np.asarray(features[:, i], dtype=np.float64) for i, name in enumerate(DESCRIPTORS)}
+    means = means or descriptor_means(features)
+
+    score = np.zeros(features.shape[0], dtype=np.float64)
+    for name, weight in DESCRIPTOR_WEIGHTS.items():
+        score += weight * columns[name] / means[name]
+
+    voice_factor = np.clip(
+        columns["voice_ratio"] / means["voice_ratio"],
+        VOICE_FACTOR_MIN,
+        VOICE_FACTOR_MAX
+    )
+
+    return score * voice_factor * means["rms"]
+
+
+def sparse_descriptor_score(
+    energies: np.ndarray,
+    candidate_index: np.ndarray,
+    candidate_features: np.ndarray,
+    sample_features: np.ndarray
+) -> np.ndarray:
+    """
+    Score combiné sur les fenêtres candidates, RMS telle quelle ailleurs
+    (combine_descriptors est déjà à l'échelle de la RMS)
+    - Moyennes flux / onset / voix : échantillon régulier de la vidéo
+    - Moyenne RMS : exacte (enveloppe complète)
+    """
+    score = np.array(energies, dtype=np.float64)
+    if score.size == 0 or candidate_features.size == 0:
+        return score
+
+    means = descriptor_means(sample_features)
+    means["rms"] = max(float(np.mean(score)), 1e-9)
+
+    score[candidate_index] = combine_descriptors(candidate_features, means)
+    return score
@@ -0,0 +1,162 @@
+# analysis/audio_feature_cache.py
+# --------------------------------------------------
+# Cache persistant des features audio par vidéo
+# - Stocké à côté de la vidéo : storage/videos/<id>/features/
+# - Format .npy relu en mmap (quasi instantané)
+# - Clé = identité du fichier source (taille / mtime) + paramètres
+# - PCM 16 kHz brut gardé (.s16, mmap) : la transcription ne
+#   redécode pas le conteneur
+# --------------------------------------------------
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+FEATURES_DIRNAME = "features"
+
+
+# ==================================================
+# CLÉ DE CACHE
+# ==================================================
+
+def source_identity(video_path: str) -> dict:
+    """
+    Identité légère du fichier source (pas de hash du contenu)
+    """
+    stat = os.stat(video_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def feature_key(video_path: str, name: str, params: dict) -> str:
+    payload = {
+        "name": name,
+        "source": source_identity(video_path),
+        "params": params,
+    }
+    raw = json.dumps(payload, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def feature_path(video_path: str, name: str, params: dict) -> str:
+    features_dir = os.path.join(os.path.dirname(video_path), FEATURES_DIRNAME)
+    key = feature_key(video_path, name, params)
+    return os.path.join(features_dir, f"{name}_{key}.npy")
+
+
+# ==================================================
+# LECTURE / ÉCRITURE
+# ==================================================
+
+def load_feature(video_path: str, name: str, params: dict):
+    """
+    Retourne le tableau en mmap (lecture seule) ou None si absent
+    """
+    path = feature_path(video_path, name, params)
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        # fichier tronqué / corrompu → on recalculera
+        return None
+
+
+def save_feature(video_path: str, name: str, params: dict, array: np.ndarray) -> str:
+    path = feature_path(video_path, name, params)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # écriture atomique : jamais de .npy à moitié écrit dans le cache
+    tmp_path = path[:-len(".npy")] + ".tmp.npy"
+    np.save(tmp_path, np.asarray(array))
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def cached_feature(video_path: str, name: str, params: dict, compute):
+    """
+    Charge la feature depuis le cache, sinon la calcule via compute()
+    et la sauvegarde pour les prochains runs
+    """
+    cached = load_feature(video_path, name, params)
+    if cached is not None:
+        return cached
+
+    array = compute()
+    save_feature(video_path, name, params, array)
+    return array
+
+
+# ==================================================
+# PCM DÉCODÉ (RÉUTILISÉ PAR LA TRANSCRIPTION)
+# ==================================================
+
+PCM_SAMPLE_RATE = 16000   # mono int16, format attendu par Whisper
+PCM_CACHE_MAX_MB = 2048   # au-delà : PCM les moins récemment utilisés supprimés
+
+
+def pcm_path(video_path: str) -> str:
+    """
+    PCM brut (s16le mono 16 kHz) gardé lors de l'analyse audio
+    """
+    features_dir = os.path.join(os.path.dirname(video_path), FEATURES_DIRNAME)
+    key = feature_key(video_path, "pcm", {"sample_rate": PCM_SAMPLE_RATE})
+    return os.path.join(features_dir, f"pcm_{key}.s16")
+
+
+def load_pcm(video_path: str):
+    """
+    PCM de toute la source en mmap (int16), ou None si absent
+    """
+    path = pcm_path(video_path)
+
+    if not os.path.exists(path) or os.path.getsize(path) < 2:
+        return None
+
+    # date de dernier usage (éviction LRU)
+    os.utime(path)
+    return np.memmap(path, dtype=np.int16, mode="r")
+
+
+def evict_pcm(videos_dir: str, max_mb: float = PCM_CACHE_MAX_MB, keep: str = None) -> int:
+    """
+    Supprime les PCM les plus anciens (dernier usage) de toutes les vidéos
+    tant que le total dépasse max_mb (keep : chemin jamais supprimé)
+    Retourne le nombre de fichiers supprimés
+    """
+    files = []
+
+    for video_id in os.listdir(videos_dir) if os.path.isdir(videos_dir) else []:
+        features_dir = os.path.join(videos_dir, video_id, FEATURES_DIRNAME)
+        if not os.path.isdir(features_dir):
+            continue
+        for name in os.listdir(features_dir):
+            if name.startswith("pcm_") and name.endswith(".s16"):
+                path = os.path.join(features_dir, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    limit = max_mb * 1024 * 1024
+    removed = 0
+
+    for _, size, path in sorted(files):
+        if total <= limit:
+            break
+        if keep and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue  # encore ouvert (Windows) : retenté au prochain passage
+        total -= size
+        removed += 1
+
+    return removed
@@ -2,40 +2,74 @@
 # --------------------------------------------------
 # Détection de moments forts via l'audio
 # - Basée sur l'énergie sonore (RMS)
+# - Option multi-features : flux spectral, onset, bande voix
 # - Indépendante de la langue
 # - Ultra rapide, sans IA
 # - Compatible Windows / Linux
 # --------------------------------------------------
 
+import bisect
 import os
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import tempfile
 import wave
 import numpy as np
-import shutil
+
+from analysis.audio_descriptors import (
+    DESCRIPTOR_CANDIDATE_RATIO,
+    DESCRIPTOR_MEAN_STRIDE,
+    DESCRIPTOR_WEIGHTS,
+    DESCRIPTORS,
+    FLUX_BANDS,
+    FRAMES_PER_WINDOW,
+    VOICE_FACTOR_MAX,
+    VOICE_FACTOR_MIN,
+    compute_selected_descriptors,
+    descriptor_windows,
+    sparse_descriptor_score,
+)
+from analysis.audio_feature_cache import (
+    PCM_SAMPLE_RATE,
+    cached_feature,
+    evict_pcm,
+    load_pcm,
+    pcm_path
+)
+from analysis.ffmpeg_runner import ffmpeg_pipe, run_ffmpeg
 
 
 # ==================================================
-# CONFIGURATION FFMPEG
+# CONFIG MOMENTS (AJOUT MINIMAL)
 # ==================================================
 
-FFMPEG_BINARY = shutil.which("ffmpeg")
+MIN_GAP_SECONDS = 30   # anti-doublon
+CLIP_PADDING = 25      # clip ±25s
 
-if not FFMPEG_BINARY:
-    FFMPEG_FALLBACK = r"C:\buzz_detector\ffmpeg\bin\ffmpeg.exe"
-    if os.path.exists(FFMPEG_FALLBACK):
-        FFMPEG_BINARY = FFMPEG_FALLBACK
+AUDIO_SAMPLE_RATE = 16000   # mono 16 kHz
+AUDIO_WINDOW_SEC = 0.5      # fenêtre d'énergie
 
-if not FFMPEG_BINARY:
-    raise RuntimeError("ffmpeg introuvable. Installe-le ou vérifie le chemin.")
+# Détection deux passes (coarse -> fine)
+# (la passe coarse décode quand même tout le flux compressé : seuls le
+#  rééchantillonnage et le calcul d'énergie sont allégés → gain à mesurer
+#  avec tools/bench_two_pass.py avant d'activer TWO_PASS_DETECTION dans main)
+COARSE_SAMPLE_RATE = 4000      # passe complète à 4 kHz
+COARSE_THRESHOLD_MARGIN = 0.8  # seuil abaissé pour ne rater aucun candidat
+COARSE_CANDIDATE_FACTOR = 3    # candidats gardés = max_results * facteur
+REFINE_MARGIN_SEC = 2          # plage redécodée à 16 kHz autour d'un candidat
 
+# Analyse segmentée (lives longs)
+SEGMENT_MIN_DURATION_SEC = 20 * 60   # en dessous : un seul décodage
 
-# ==================================================
-# CONFIG MOMENTS (AJOUT MINIMAL)
-# ==================================================
+# Seuil adaptatif (baseline locale glissante)
+BASELINE_WINDOW_SEC = 120      # contexte local autour de chaque fenêtre
+BASELINE_PERCENTILE = 50       # médiane locale
+BASELINE_BINS_PER_DB = 2       # résolution de l'histogramme : 0.5 dB
+BASELINE_FLOOR_RATIO = 0.25    # plancher (silences) en fraction de la moyenne globale
 
-MIN_GAP_SECONDS = 30   # anti-doublon
-CLIP_PADDING = 25      # clip ±25s
+ENVELOPE_BLOCK_SAMPLES = 1 << 19   # taille des blocs de calcul d'énergie
+STREAM_CHUNK_SECONDS = 30          # lecture du pipe ffmpeg par blocs de 30s
+
+KEEP_PCM = True   # PCM 16 kHz gardé pour la transcription (≈ 115 Mo / h, plafonné)
 
 
 # ==================================================
@@ -47,7 +81,6 @@ def extract_audio(video_path: str, wav_path: str):
         raise FileNotFoundError(f"Vidéo introuvable : {video_path}")
 
     command = [
-        FFMPEG_BINARY,
         "-y",
         "-i", video_path,
         "-vn",
@@ -57,12 +90,7 @@ def extract_audio(video_path: str, wav_path: str):
         wav_path
     ]
 
-    subprocess.run(
-        command,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        check=True
-    )
+    run_ffmpeg(command, name=video_path, stage="audio")
 
     if not os.path.exists(wav_path):
         raise RuntimeError("Extraction audio échouée (WAV non créé)")
@@ -86,10 +114,374 @@ def load_audio(wav_path: str) -> np.ndarray:
     return audio
 
 
+# ==================================================
+# ANALYSE EN STREAMING (PIPE FFMPEG, SANS WAV)
+# ==================================================
+
+def iter_pcm_chunks(
+    video_path: str,
+    sample_rate: int = 16000,
+    chunk_samples: int = 16000 * 30,
+    start_sec: float = None,
+    duration_sec: float = None
+):
+    """
+    Décode l'audio via le stdout de ffmpeg (PCM brut int16 mono)
+    et le rend bloc par bloc (chunk_samples échantillons, sauf le dernier)
+    - Pas de WAV temporaire, pas de piste complète en mémoire
+    - start_sec / duration_sec : ne décode qu'une plage (seek -ss / -t)
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Vidéo introuvable : {video_path}")
+
+    chunk_bytes = chunk_samples * 2  # int16 = 2 octets
+
+    command = []
+
+    if start_sec:
+        command += ["-ss", str(start_sec)]
+
+    command += ["-i", video_path]
+
+    if duration_sec is not None:
+        command += ["-t", str(duration_sec)]
+
+    command += [
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "pipe:1"
+    ]
+
+    received = False
+    with ffmpeg_pipe(command, name=video_path, stage="audio") as stdout:
+        while True:
+            # read(n) bloque jusqu'à n octets (ou fin du flux)
+            data = stdout.read(chunk_bytes)
+            if not data:
+                break
+
+            received = True
+            yield np.frombuffer(data[:len(data) - len(data) % 2], dtype=np.int16)
+
+    if not received:
+        raise RuntimeError("Audio vide après extraction")
+
+
+def decode_pcm_ranges(video_path: str, ranges: list, sample_rate: int = 16000) -> list:
+    """
+    Décode plusieurs plages [(start_sec, duration_sec), ...] en UN SEUL ffmpeg
+    - Une entrée -ss / -t par plage, concaténées dans le graphe
+    - Chaque plage complétée / coupée à sa longueur exacte (apad + atrim)
+      pour pouvoir redécouper le flux
+    Retourne [samples int16, ...] dans l'ordre des plages
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Vidéo introuvable : {video_path}")
+    if not ranges:
+        return []
+
+    command = []
+    graph = []
+    lengths = []
+
+    for i, (start, duration) in enumerate(ranges):
+        n = int(round(duration * sample_rate))
+        lengths.append(n)
+
+        command += ["-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", video_path]
+        graph.append(
+            f"[{i}:a]aformat=sample_fmts=s16:sample_rates={sample_rate}:channel_layouts=mono,"
+            f"apad=whole_len={n},atrim=end_sample={n}[a{i}]"
+        )
+
+    graph.append("".join(f"[a{i}]" for i in range(len(ranges))) + f"concat=n={len(ranges)}:v=0:a=1[out]")
+
+    command += [
+        "-filter_complex", ";".join(graph),
+        "-map", "[out]",
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "pipe:1"
+    ]
+
+    with ffmpeg_pipe(command, name=video_path, stage="audio") as stdout:
+        data = stdout.read()
+
+    pcm = np.frombuffer(data[:len(data) - len(data) % 2], dtype=np.int16)
+
+    pieces = []
+    offset = 0
+    for n in lengths:
+        pieces.append(pcm[offset:offset + n])
+        offset += n
+
+    return pieces
+
+
+def _stream_chunk_samples(sample_rate: int, window_sec: float) -> int:
+    # Blocs multiples de la fenêtre : les fenêtres ne sont jamais coupées
+    window_size = int(sample_rate * window_sec)
+    windows_per_chunk = max(1, int(STREAM_CHUNK_SECONDS / window_sec))
+    return windows_per_chunk * window_size
+
+
+def stream_energy_envelope(
+    video_path: str,
+    sample_rate: int = 16000,
+    window_sec: float = 0.5,
+    start_sec: float = None,
+    duration_sec: float = None,
+    pcm_tap=None
+) -> np.ndarray:
+    """
+    Enveloppe RMS calculée bloc par bloc sur le pipe ffmpeg
+    - Seule l'enveloppe (1 valeur / fenêtre) est conservée
+    - pcm_tap(samples) : reçoit chaque bloc décodé (ex: écriture disque)
+    """
+    window_size = int(sample_rate * window_sec)
+
+    envelopes = []
+
+    for samples in iter_pcm_chunks(
+        video_path,
+        sample_rate=sample_rate,
+        chunk_samples=_stream_chunk_samples(sample_rate, window_sec),
+        start_sec=start_sec,
+        duration_sec=duration_sec
+    ):
+        if pcm_tap:
+            pcm_tap(samples)
+        envelopes.append(compute_energy_envelope(samples, window_size))
+
+    return np.concatenate(envelopes)
+
+
+def stream_selected_descriptors(video_path: str, selected: np.ndarray) -> tuple:
+    """
+    Descripteurs (RMS, flux, onset, voix) des seules fenêtres sélectionnées
+    - PCM 16 kHz gardé par l'analyse RMS relu en mmap (pas de décodage),
+      sinon redécodé bloc par bloc sur le pipe ffmpeg
+    - Mêmes blocs qu'en streaming : fenêtres jamais coupées
+    Retourne (index des fenêtres, tableau (n, DESCRIPTORS))
+    """
+    window_size = int(AUDIO_SAMPLE_RATE * AUDIO_WINDOW_SEC)
+    chunk_samples = _stream_chunk_samples(AUDIO_SAMPLE_RATE, AUDIO_WINDOW_SEC)
+
+    pcm = load_pcm(video_path) if AUDIO_SAMPLE_RATE == PCM_SAMPLE_RATE else None
+    if pcm is not None:
+        chunks = (pcm[start:start + chunk_samples] for start in range(0, pcm.size, chunk_samples))
+    else:
+        chunks = iter_pcm_chunks(video_path, sample_rate=AUDIO_SAMPLE_RATE, chunk_samples=chunk_samples)
+
+    indices = []
+    blocks = []
+    prev_frame = None
+    first = 0
+
+    for samples in chunks:
+        n_windows = -(-samples.size // window_size)
+        mask = selected[first:first + n_windows]
+
+        features, prev_frame = compute_selected_descriptors(
+            samples[:mask.size * window_size],
+            window_size,
+            mask,
+            sample_rate=AUDIO_SAMPLE_RATE,
+            prev_frame=prev_frame
+        )
+        indices.append(first + np.flatnonzero(mask))
+        blocks.append(features)
+        first += n_windows
+
+    if not blocks:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(DESCRIPTORS)))
+    return np.concatenate(indices), np.concatenate(blocks)
+
+
+# ==================================================
+# ANALYSE SEGMENTÉE PARALLÈLE
+# ==================================================
+
+STREAM_FUNCTIONS = {
+    "energy": stream_energy_envelope,
+}
+
+
+def _fit_windows(features: np.ndarray, n_windows: int) -> np.ndarray:
+    """
+    Ramène une plage à exactement n_windows fenêtres : un échantillon de
+    plus ou de moins au seek (-ss / -t) ne décale pas les plages suivantes
+    """
+    if features.shape[0] >= n_windows:
+        return features[:n_windows]
+
+    missing = n_windows - features.shape[0]
+    pad = [(0, missing)] + [(0, 0)] * (features.ndim - 1)
+    return np.pad(features, pad, mode="edge")
+
+
+def _segment_features(args) -> np.ndarray:
+    kind, video_path, start_sec, duration_sec, pcm_out = args
+
+    def compute(pcm_tap=None):
+        return STREAM_FUNCTIONS[kind](
+            video_path,
+            sample_rate=AUDIO_SAMPLE_RATE,
+            window_sec=AUDIO_WINDOW_SEC,
+            start_sec=start_sec,
+            duration_sec=duration_sec,
+            pcm_tap=pcm_tap
+        )
+
+    if duration_sec is None:
+        n_windows = None
+        n_samples = None
+    else:
+        n_windows = int(round(duration_sec / AUDIO_WINDOW_SEC))
+        n_samples = int(round(duration_sec * AUDIO_SAMPLE_RATE))
+
+    if not pcm_out:
+        features = compute()
+    else:
+        # chaque plage écrit son PCM à sa position dans le fichier commun,
+        # jamais au-delà de sa longueur (pas d'empiètement sur la suivante)
+        with open(pcm_out, "r+b") as f:
+            f.seek(int(round(start_sec * AUDIO_SAMPLE_RATE)) * 2)
+            written = 0
+
+            def write_pcm(samples):
+                nonlocal written
+                if n_samples is not None:
+                    samples = samples[:max(0, n_samples - written)]
+                f.write(samples.tobytes())
+                written += samples.size
+
+            features = compute(write_pcm)
+
+            # plage décodée trop courte : complétée par du silence
+            if n_samples is not None and written < n_samples:
+                f.write(np.zeros(n_samples - written, dtype=np.int16).tobytes())
+
+    if n_windows is None:
+        return features
+    return _fit_windows(features, n_windows)
+
+
+def parallel_audio_features(
+    video_path: str,
+    duration_sec: float,
+    workers: int = None,
+    kind: str = "energy",
+    pcm_out: str = None
+) -> np.ndarray:
+    """
+    Découpe la vidéo en N plages, décodées par N ffmpeg en parallèle,
+    puis recolle les enveloppes dans l'ordre
+    - Plages alignées sur AUDIO_WINDOW_SEC : mêmes index qu'en passe unique
+      (chaque plage ramenée à son nombre exact de fenêtres)
+    - Dernière plage sans -t (la durée YouTube est arrondie à la seconde)
+    - Normalisation + anti-doublons faits ensuite sur le résultat complet
+    - pcm_out : fichier où chaque plage écrit son PCM brut à sa position
+    """
+    workers = workers or os.cpu_count() or 1
+
+    total_windows = int(np.ceil(duration_sec / AUDIO_WINDOW_SEC))
+    windows_per_segment = int(np.ceil(total_windows / workers))
+    segment_sec = windows_per_segment * AUDIO_WINDOW_SEC
+
+    jobs = []
+    for i in range(workers):
+        start = i * segment_sec
+        if start >= duration_sec:
+            break
+        is_last = (i + 1) * segment_sec >= duration_sec
+        jobs.append((kind, video_path, start, None if is_last else segment_sec, pcm_out))
+
+    if pcm_out:
+        open(pcm_out, "wb").close()
+
+    # Le décodage tourne dans les processus ffmpeg : des threads suffisent
+    # pour les piloter (et pas de re-import de main.py sous Windows)
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        results = list(pool.map(_segment_features, jobs))
+
+    return np.concatenate(results)
+
+
+# ==================================================
+# ENVELOPPE D'ÉNERGIE (VECTORISÉE)
+# ==================================================
+
+def compute_energy_envelope(
+    audio: np.ndarray,
+    window_size: int
+) -> np.ndarray:
+    """
+    Calcule l'énergie RMS de chaque fenêtre en une passe NumPy
+    - Vue (n_fenêtres, window_size) sur l'audio, sans copie par fenêtre
+    - Conversion float par blocs dans un buffer réutilisé (mémoire constante)
+    - Dernière fenêtre partielle traitée à part (comme l'ancienne boucle)
+    """
+    if audio.size == 0 or window_size <= 0:
+        return np.zeros(0, dtype=np.float64)
+
+    full_windows = audio.size // window_size
+    frames = audio[:full_windows * window_size].reshape(full_windows, window_size)
+    tail = audio[full_windows * window_size:]
+
+    energies = np.empty(full_windows + (1 if tail.size else 0), dtype=np.float64)
+
+    # Les carrés d'int16 sont des entiers exacts en float64 et leurs sommes
+    # restent < 2^53 : résultat identique au calcul fenêtre par fenêtre
+    rows = max(1, ENVELOPE_BLOCK_SAMPLES // window_size)
+    buffer = np.empty((min(rows, full_windows), window_size), dtype=np.float64)
+
+    for start in range(0, full_windows, rows):
+        stop = min(start + rows, full_windows)
+        block = buffer[:stop - start]
+        np.copyto(block, frames[start:stop])
+        energies[start:stop] = np.einsum("ij,ij->i", block, block)
+
+    energies[:full_windows] = np.sqrt(energies[:full_windows] / window_size)
+
+    if tail.size:
+        energies[-1] = np.sqrt(np.mean(tail.astype(float) ** 2))
+
+    return energies
+
+
 # ==================================================
 # DÉTECTION DES PICS AUDIO
 # ==================================================
 
+def detect_envelope_peaks(
+    energies: np.ndarray,
+    window_size: int,
+    sample_rate: int = 16000,
+    threshold_ratio: float = 2.5
+) -> list:
+    """
+    Sélectionne les fenêtres au-dessus de la moyenne * threshold_ratio
+    """
+    if energies.size == 0:
+        return []
+
+    avg_energy = np.mean(energies)
+
+    moments = []
+    for index in np.flatnonzero(energies >= avg_energy * threshold_ratio):
+        energy = energies[index]
+        moments.append({
+            "timestamp_sec": int(index * window_size / sample_rate),
+            "intensity": round(energy / avg_energy, 2)
+        })
+
+    return moments
+
+
 def detect_audio_peaks(
     audio: np.ndarray,
     sample_rate: int = 16000,
@@ -97,28 +489,122 @@ def detect_audio_peaks(
     threshold_ratio: float = 2.5
 ) -> list:
     window_size = int(sample_rate * window_sec)
-    energies = []
+    energies = compute_energy_envelope(audio, window_size)
+
+    return detect_envelope_peaks(
+        energies,
+        window_size,
+        sample_rate=sample_rate,
+        threshold_ratio=threshold_ratio
+    )
 
-    for i in range(0, len(audio), window_size):
-        window = audio[i:i + window_size]
-        if window.size == 0:
-            continue
 
-        energy = np.sqrt(np.mean(window.astype(float) ** 2))
-        energies.append((i, energy))
+# ==================================================
+# SEUIL ADAPTATIF (BASELINE GLISSANTE)
+# ==================================================
 
-    if not energies:
+def rolling_baseline(
+    energies: np.ndarray,
+    window: int,
+    percentile: float = BASELINE_PERCENTILE
+) -> np.ndarray:
+    """
+    Percentile glissant (fenêtre centrée) de l'enveloppe en O(n)
+    - Énergies quantifiées en dB dans un histogramme glissant
+    - Un curseur sur le bin du percentile, déplacé à chaque entrée / sortie
+      (le nombre de bins est fixe : coût constant par fenêtre)
+    """
+    n = energies.size
+    if n == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    db = 20 * np.log10(np.maximum(np.asarray(energies, dtype=np.float64), 1.0))
+    bins = (db * BASELINE_BINS_PER_DB).astype(np.int64)
+    bins = bins.tolist()
+
+    n_bins = max(bins) + 1
+    hist = [0] * n_bins
+    half = max(0, window // 2)
+
+    cur = 0       # bin contenant le percentile
+    below = 0     # nb de valeurs dans les bins < cur
+    total = 0
+
+    out = [0] * n
+    right = 0     # prochain index à entrer dans la fenêtre
+
+    for i in range(n):
+        # entrées : jusqu'à i + half
+        while right < n and right <= i + half:
+            b = bins[right]
+            hist[b] += 1
+            total += 1
+            if b < cur:
+                below += 1
+            right += 1
+
+        # sortie : i - half - 1
+        left = i - half - 1
+        if left >= 0:
+            b = bins[left]
+            hist[b] -= 1
+            total -= 1
+            if b < cur:
+                below -= 1
+
+        # rang cible (1-based) du percentile
+        k = max(1, int(np.ceil(percentile / 100 * total)))
+
+        while below >= k:
+            cur -= 1
+            below -= hist[cur]
+        while below + hist[cur] < k:
+            below += hist[cur]
+            cur += 1
+
+        out[i] = cur
+
+    centers = (np.asarray(out, dtype=np.float64) + 0.5) / BASELINE_BINS_PER_DB
+    return 10 ** (centers / 20)
+
+
+def detect_envelope_peaks_adaptive(
+    energies: np.ndarray,
+    window_size: int,
+    sample_rate: int = 16000,
+    threshold_ratio: float = 2.5,
+    baseline_window_sec: float = BASELINE_WINDOW_SEC,
+    percentile: float = BASELINE_PERCENTILE
+) -> list:
+    """
+    Comme detect_envelope_peaks, mais comparé à une baseline LOCALE
+    - intensity        : énergie / baseline locale
+    - global_intensity : énergie / moyenne globale (ancien calcul)
+    - baseline         : baseline locale / moyenne globale
+    """
+    if energies.size == 0:
         return []
 
-    avg_energy = np.mean([e for _, e in energies])
+    window_sec = window_size / sample_rate
+    avg_energy = np.mean(energies)
+
+    baseline = rolling_baseline(
+        energies,
+        int(baseline_window_sec / window_sec),
+        percentile=percentile
+    )
+    # plancher : un silence ne doit pas transformer chaque bruit en pic
+    baseline = np.maximum(baseline, avg_energy * BASELINE_FLOOR_RATIO)
 
     moments = []
-    for index, energy in energies:
-        if energy >= avg_energy * threshold_ratio:
-            moments.append({
-                "timestamp_sec": int(index / sample_rate),
-                "intensity": round(energy / avg_energy, 2)
-            })
+    for index in np.flatnonzero(energies >= baseline * threshold_ratio):
+        energy = energies[index]
+        moments.append({
+            "timestamp_sec": int(index * window_size / sample_rate),
+            "intensity": round(energy / baseline[index], 2),
+            "global_intensity": round(energy / avg_energy, 2),
+            "baseline": round(baseline[index] / avg_energy, 2)
+        })
 
     return moments
 
@@ -128,33 +614,334 @@ def detect_audio_peaks(
 # ==================================================
 
 def filter_close_moments(moments: list) -> list:
+    """
+    Garde les moments les plus intenses espacés d'au moins MIN_GAP_SECONDS
+    - Timestamps retenus maintenus triés : seuls les 2 voisins
+      (bisect) sont comparés, au lieu de tous les moments retenus
+    """
     moments = sorted(moments, key=lambda m: m["intensity"], reverse=True)
     selected = []
+    taken = []  # timestamps retenus, triés
 
     for m in moments:
-        if all(
-            abs(m["timestamp_sec"] - s["timestamp_sec"]) >= MIN_GAP_SECONDS
-            for s in selected
-        ):
-            selected.append(m)
+        ts = m["timestamp_sec"]
+        pos = bisect.bisect_left(taken, ts)
+
+        if pos > 0 and ts - taken[pos - 1] < MIN_GAP_SECONDS:
+            continue
+        if pos < len(taken) and taken[pos] - ts < MIN_GAP_SECONDS:
+            continue
+
+        taken.insert(pos, ts)
+        selected.append(m)
 
     return selected
 
 
 # ==================================================
-# API PRINCIPALE
+# DÉTECTION DEUX PASSES (COARSE -> FINE)
 # ==================================================
 
-def detect_audio_moments(
+def refine_candidates(
     video_path: str,
-    max_results: int = 5
+    candidates: list,
+    coarse_energies: np.ndarray,
+    threshold_ratio: float = 2.5
 ) -> list:
+    """
+    Redécode à pleine résolution une petite plage autour de chaque
+    candidat (toutes les plages en un seul ffmpeg) pour recaler le timestamp
+    - Seuil et intensité calculés à la résolution coarse (énergie / moyenne
+      coarse, deux statistiques exactes au même taux) : aucune moyenne
+      16 kHz extrapolée depuis les seuls segments bruyants
+    """
+    window_size = int(AUDIO_SAMPLE_RATE * AUDIO_WINDOW_SEC)
+    coarse_avg = np.mean(coarse_energies)
+
+    if coarse_energies.size == 0 or coarse_avg <= 0:
+        return []
+
+    # début aligné sur la grille des fenêtres (mêmes index qu'en passe complète)
+    first_windows = [
+        max(0, int((m["timestamp_sec"] - REFINE_MARGIN_SEC) / AUDIO_WINDOW_SEC))
+        for m in candidates
+    ]
+    duration = 2 * REFINE_MARGIN_SEC + AUDIO_WINDOW_SEC
+
+    pieces = decode_pcm_ranges(
+        video_path,
+        [(first_window * AUDIO_WINDOW_SEC, duration) for first_window in first_windows],
+        sample_rate=AUDIO_SAMPLE_RATE
+    )
+
+    refined = []
+    for first_window, samples in zip(first_windows, pieces):
+        energies = compute_energy_envelope(samples, window_size)
+        if energies.size == 0:
+            continue
+
+        # 🎯 pic localisé à 16 kHz, mesuré sur la grille coarse
+        index = min(first_window + int(np.argmax(energies)), coarse_energies.size - 1)
+        intensity = coarse_energies[index] / coarse_avg
+        if intensity < threshold_ratio:
+            continue
+
+        refined.append({
+            "timestamp_sec": int(index * window_size / AUDIO_SAMPLE_RATE),
+            "intensity": round(intensity, 2)
+        })
+
+    return refined
+
+
+def detect_audio_peaks_two_pass(
+    video_path: str,
+    max_results: int = 5,
+    threshold_ratio: float = 2.5,
+    use_cache: bool = True
+) -> list:
+    """
+    1) passe complète à COARSE_SAMPLE_RATE → candidats, seuil et intensités
+    2) redécodage à 16 kHz de quelques secondes autour des candidats
+       (position du pic seulement)
+    """
+    coarse_params = {
+        "sample_rate": COARSE_SAMPLE_RATE,
+        "window_sec": AUDIO_WINDOW_SEC,
+    }
+
+    def compute_coarse():
+        return stream_energy_envelope(
+            video_path,
+            sample_rate=COARSE_SAMPLE_RATE,
+            window_sec=AUDIO_WINDOW_SEC
+        )
+
+    if use_cache:
+        coarse_energies = cached_feature(video_path, "energy", coarse_params, compute_coarse)
+    else:
+        coarse_energies = compute_coarse()
+
+    coarse_window = int(COARSE_SAMPLE_RATE * AUDIO_WINDOW_SEC)
+    candidates = detect_envelope_peaks(
+        coarse_energies,
+        coarse_window,
+        COARSE_SAMPLE_RATE,
+        threshold_ratio=threshold_ratio * COARSE_THRESHOLD_MARGIN
+    )
+    if not candidates:
+        return []
+
+    candidates = filter_close_moments(candidates)
+    candidates = candidates[:max_results * COARSE_CANDIDATE_FACTOR]
+
+    return refine_candidates(
+        video_path,
+        candidates,
+        coarse_energies,
+        threshold_ratio=threshold_ratio
+    )
+
+
+# ==================================================
+# API PRINCIPALE
+# ==================================================
+
+def compute_video_envelope(
+    video_path: str,
+    streaming: bool = True,
+    duration_sec: float = None,
+    workers: int = None,
+    pcm_out: str = None
+) -> np.ndarray:
+    """
+    Décode la vidéo et retourne l'enveloppe RMS (AUDIO_WINDOW_SEC)
+    pcm_out : écrit aussi le PCM 16 kHz décodé (s16le brut) dans ce fichier
+    """
+    if streaming and duration_sec and duration_sec >= SEGMENT_MIN_DURATION_SEC:
+        workers = workers or os.cpu_count() or 1
+        if workers > 1:
+            # ⚡ live long : une plage par cœur
+            return parallel_audio_features(video_path, duration_sec, workers, pcm_out=pcm_out)
+
+    if streaming:
+        # 🚰 PCM lu directement depuis ffmpeg (mémoire constante)
+        if not pcm_out:
+            return stream_energy_envelope(
+                video_path,
+                sample_rate=AUDIO_SAMPLE_RATE,
+                window_sec=AUDIO_WINDOW_SEC
+            )
+
+        with open(pcm_out, "wb") as f:
+            return stream_energy_envelope(
+                video_path,
+                sample_rate=AUDIO_SAMPLE_RATE,
+                window_sec=AUDIO_WINDOW_SEC,
+                pcm_tap=lambda samples: f.write(samples.tobytes())
+            )
+
     with tempfile.TemporaryDirectory() as tmp:
         wav_path = os.path.join(tmp, "audio.wav")
 
         extract_audio(video_path, wav_path)
         audio = load_audio(wav_path)
-        raw_moments = detect_audio_peaks(audio)
+
+    if pcm_out:
+        audio.tofile(pcm_out)
+
+    return compute_energy_envelope(audio, int(AUDIO_SAMPLE_RATE * AUDIO_WINDOW_SEC))
+
+
+def load_video_envelope(
+    video_path: str,
+    streaming: bool = True,
+    use_cache: bool = True,
+    duration_sec: float = None,
+    workers: int = None
+) -> np.ndarray:
+    """
+    Enveloppe RMS de la vidéo, servie par le cache de features si possible
+    (re-run / réglage des seuils = pas de nouveau décodage)
+    - KEEP_PCM : le PCM du même décodage est gardé pour la transcription
+    """
+    def compute():
+        if not (KEEP_PCM and use_cache and AUDIO_SAMPLE_RATE == PCM_SAMPLE_RATE):
+            return compute_video_envelope(
+                video_path,
+                streaming=streaming,
+                duration_sec=duration_sec,
+                workers=workers
+            )
+
+        final_path = pcm_path(video_path)
+        tmp_path = final_path + ".tmp"
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+
+        try:
+            envelope = compute_video_envelope(
+                video_path,
+                streaming=streaming,
+                duration_sec=duration_sec,
+                workers=workers,
+                pcm_out=tmp_path
+            )
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        # PCM publié seulement une fois le décodage complet,
+        # puis plafond global (PCM_CACHE_MAX_MB) appliqué à toutes les sources
+        os.replace(tmp_path, final_path)
+        evict_pcm(os.path.dirname(os.path.dirname(video_path)), keep=final_path)
+        return envelope
+
+    if not use_cache:
+        return compute()
+
+    params = {
+        "sample_rate": AUDIO_SAMPLE_RATE,
+        "window_sec": AUDIO_WINDOW_SEC,
+    }
+
+    return cached_feature(video_path, "energy", params, compute)
+
+
+def compute_descriptor_score(video_path: str, energies: np.ndarray) -> np.ndarray:
+    """
+    Score multi-features par fenêtre (même échelle que l'enveloppe RMS)
+    - FFT sur les fenêtres candidates + l'échantillon des moyennes
+      (descriptor_windows), pas sur toute la vidéo
+    - Autres fenêtres : RMS telle quelle
+    """
+    candidates, sample = descriptor_windows(energies)
+    index, features = stream_selected_descriptors(video_path, candidates | sample)
+
+    is_candidate = candidates[index]
+    return sparse_descriptor_score(
+        energies,
+        index[is_candidate],
+        features[is_candidate],
+        features[sample[index]]
+    )
+
+
+def load_descriptor_score(
+    video_path: str,
+    energies: np.ndarray,
+    use_cache: bool = True
+) -> np.ndarray:
+    """
+    Score multi-features, servi par le cache de features si possible
+    energies : enveloppe RMS de la vidéo (load_video_envelope)
+    """
+    def compute():
+        return compute_descriptor_score(video_path, energies)
+
+    if not use_cache:
+        return compute()
+
+    params = {
+        "sample_rate": AUDIO_SAMPLE_RATE,
+        "window_sec": AUDIO_WINDOW_SEC,
+        "frames_per_window": FRAMES_PER_WINDOW,
+        "flux_bands": FLUX_BANDS,
+        "candidate_ratio": DESCRIPTOR_CANDIDATE_RATIO,
+        "mean_stride": DESCRIPTOR_MEAN_STRIDE,
+        "weights": DESCRIPTOR_WEIGHTS,
+        "voice_factor": [VOICE_FACTOR_MIN, VOICE_FACTOR_MAX],
+    }
+
+    return cached_feature(video_path, "descriptor_score", params, compute)
+
+
+def detect_audio_moments(
+    video_path: str,
+    max_results: int = 5,
+    streaming: bool = True,
+    use_cache: bool = True,
+    two_pass: bool = False,
+    adaptive: bool = False,
+    duration_sec: float = None,
+    workers: int = None,
+    multi_feature: bool = False
+) -> list:
+    if two_pass and (adaptive or multi_feature):
+        raise ValueError("two_pass n'est pas combinable avec adaptive / multi_feature")
+
+    if two_pass:
+        # 🔎 passe basse résolution puis raffinage local à 16 kHz
+        raw_moments = detect_audio_peaks_two_pass(
+            video_path,
+            max_results=max_results,
+            use_cache=use_cache
+        )
+    else:
+        window_size = int(AUDIO_SAMPLE_RATE * AUDIO_WINDOW_SEC)
+
+        energies = load_video_envelope(
+            video_path,
+            streaming=streaming,
+            use_cache=use_cache,
+            duration_sec=duration_sec,
+            workers=workers
+        )
+
+        if multi_feature:
+            # 🎛️ score combiné RMS + flux + onset + voix (même échelle que la RMS),
+            # FFT limitée aux fenêtres à RMS forte
+            energies = load_descriptor_score(video_path, energies, use_cache=use_cache)
+
+        if adaptive:
+            # 📈 seuil relatif à la baseline locale (lives longs)
+            raw_moments = detect_envelope_peaks_adaptive(
+                energies,
+                window_size,
+                AUDIO_SAMPLE_RATE
+            )
+        else:
+            raw_moments = detect_envelope_peaks(energies, window_size, AUDIO_SAMPLE_RATE)
 
     if not raw_moments:
         return []
@@ -170,8 +957,7 @@ def detect_audio_moments(
     for m in moments:
         ts = m["timestamp_sec"]
         final.append({
-            "timestamp_sec": ts,
-            "intensity": m["intensity"],
+            **m,
             "clip_start": max(ts - CLIP_PADDING, 0),
             "clip_end": ts + CLIP_PADDING
         })
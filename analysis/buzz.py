@@ -6,6 +6,7 @@
 # - Fournir un verdict HUMAIN (buzz / pas buzz)
 # --------------------------------------------------
 
+import re
 from datetime import datetime, timezone
 from typing import Optional
 
@@ -22,6 +23,24 @@ def iso_to_datetime(iso_str: str) -> datetime:
     return datetime.fromisoformat(iso_str.replace("Z", "+00:00"))
 
 
+ISO_DURATION_REGEX = re.compile(
+    r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$"
+)
+
+
+def iso_duration_to_seconds(duration: str) -> int:
+    """
+    Convertit une durée ISO 8601 YouTube (ex: PT2H49M49S) en secondes
+    Retourne 0 si la durée est absente ou illisible
+    """
+    match = ISO_DURATION_REGEX.match(duration or "")
+    if not match:
+        return 0
+
+    days, hours, minutes, seconds = (int(g or 0) for g in match.groups())
+    return days * 86400 + hours * 3600 + minutes * 60 + seconds
+
+
 # ==================================================
 # CALCUL DU BUZZ
 # ==================================================
@@ -1,26 +1,33 @@
-import os
-import subprocess
-import shutil
-
-FFMPEG = shutil.which("ffmpeg")
-
-if not FFMPEG:
-    raise RuntimeError("ffmpeg introuvable")
+from analysis.ffmpeg_runner import run_ffmpeg
+from analysis.render_profiles import get_profile
 
 
 def export_clip(
     video_path: str,
     output_path: str,
     start_sec: int,
-    end_sec: int
+    end_sec: int,
+    profile: str = None
 ):
     """
     Découpe + recadre en vertical (9:16) pour TikTok / Snap
+    profile : profil de rendu nommé (render_profiles), sinon réglages d'origine
     """
     duration = end_sec - start_sec
 
+    encode = [
+        "-c:v", "libx264",
+        "-preset", "fast",
+        "-crf", "20",
+        "-pix_fmt", "yuv420p",
+        "-movflags", "+faststart",
+        "-c:a", "aac",
+        "-b:a", "128k",
+    ]
+    if profile:
+        encode = get_profile(profile)["encode"]
+
     cmd = [
-        FFMPEG,
         "-y",
         "-ss", str(start_sec),
         "-i", video_path,
@@ -30,15 +37,9 @@ def export_clip(
         "-vf",
         "crop=ih*9/16:ih:(iw-ih*9/16)/2:0,scale=1080:1920",
 
-        "-c:v", "libx264",
-        "-preset", "fast",
-        "-crf", "20",
-        "-pix_fmt", "yuv420p",
-        "-movflags", "+faststart",
-        "-c:a", "aac",
-        "-b:a", "128k",
+        *encode,
 
         output_path
     ]
 
-    subprocess.run(cmd, check=True)
+    run_ffmpeg(cmd, name=output_path, stage="export")
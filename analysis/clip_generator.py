@@ -7,13 +7,16 @@
 # --------------------------------------------------
 
 import os
-import subprocess
 
-# ✅ FFmpeg préchargé (Windows-safe)
-FFMPEG = r"C:\buzz_detector\ffmpeg\bin\ffmpeg.exe"
+from analysis.ffmpeg_runner import run_ffmpeg
+from analysis.render_profiles import get_profile
 
 OUTPUT_DIR = os.path.join("storage", "clips")
 
+# 🎯 recadrage vertical centré 9:16 → 1080x1920
+VERTICAL_CROP = "crop=ih*9/16:ih:(iw-ih*9/16)/2:0"
+VERTICAL_FILTER = f"{VERTICAL_CROP},scale=1080:1920"
+
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
@@ -23,17 +26,28 @@ def generate_vertical_clip(
     video_path: str,
     output_path: str,
     start_sec: int,
-    end_sec: int
+    end_sec: int,
+    profile: str = None
 ):
     """
     Génère un clip vertical 9:16 (1080x1920)
+    profile : profil de rendu nommé (render_profiles), sinon réglages d'origine
     """
     ensure_dir(os.path.dirname(output_path))
 
     duration = end_sec - start_sec
 
+    encode = [
+        "-c:v", "libx264",
+        "-preset", "fast",
+        "-crf", "18",
+        "-c:a", "aac",
+        "-b:a", "128k",
+    ]
+    if profile:
+        encode = get_profile(profile)["encode"]
+
     cmd = [
-        FFMPEG,
         "-y",
         "-ss", str(start_sec),
         "-i", video_path,
@@ -41,15 +55,11 @@ def generate_vertical_clip(
 
         # 🎯 recadrage vertical centré
         "-vf",
-        "crop=ih*9/16:ih:(iw-ih*9/16)/2:0,scale=1080:1920",
+        VERTICAL_FILTER,
 
-        "-c:v", "libx264",
-        "-preset", "fast",
-        "-crf", "18",
-        "-c:a", "aac",
-        "-b:a", "128k",
+        *encode,
 
         output_path
     ]
 
-    subprocess.run(cmd, check=True)
+    run_ffmpeg(cmd, name=output_path, stage="clip")
@@ -1,39 +1,432 @@
-import subprocess
 import os
 
-# ✅ FFmpeg préchargé (Windows-safe)
-FFMPEG = r"C:\buzz_detector\ffmpeg\bin\ffmpeg.exe"
+from analysis.clip_generator import ensure_dir
+from analysis.ffmpeg_runner import run_ffprobe
+from analysis.render_profiles import get_profile
+from analysis.render_cache import (
+    lookup_artifact,
+    materialize,
+    source_fingerprint,
+    store_artifact
+)
 
+# 📐 DÉCLINAISONS PAR FORMAT (export multi-format, profil final)
+# ratio  : largeur / hauteur du crop (borné à l'image : source paysage OU portrait)
+# guided : recadrage horizontal sur une source 16:9 → suit crop_x si fourni
+ASPECT_VARIANTS = {
+    "9x16": {"ratio": (9, 16), "guided": True, "size": "1080:1920", "platforms": ["tiktok", "snap"]},
+    "1x1": {"ratio": (1, 1), "guided": True, "size": "1080:1080", "platforms": ["instagram"]},
+    "4x5": {"ratio": (4, 5), "guided": True, "size": "1080:1350", "platforms": ["instagram", "facebook"]},
+    "16x9": {"ratio": (16, 9), "guided": False, "size": "1920:1080", "platforms": ["youtube", "x"]},
+}
 
-def render_final_clip(video_path: str, ass_path: str, output_path: str):
+# Clips regroupés dans un même ffmpeg si l'écart entre eux est faible
+# (au-delà, décoder le trou coûte plus qu'un nouveau seek)
+BATCH_MAX_GAP_SEC = 120
+
+# Durée max d'un rendu : au-delà, ffmpeg est considéré bloqué et tué
+# (secondes de rendu accordées par seconde de sortie, + marge fixe)
+RENDER_TIMEOUT_PER_SEC = 10
+RENDER_TIMEOUT_BASE_SEC = 120
+
+
+def ass_filter(ass_path: str) -> str:
     ass_path = ass_path.replace(os.sep, "/")
+    return f"ass=filename='{ass_path}'"
+
+
+def vertical_filter(profile: str = "final", crop_x: str = None) -> str:
+    """
+    Recadrage 9:16 + mise à l'échelle du profil
+    """
+    return aspect_filter("9x16", profile, crop_x)
+
+
+def aspect_crop(aspect: str = "9x16", crop_x: str = None) -> str:
+    """
+    Crop au ratio du format, jamais plus grand que l'image :
+        w = min(iw, ih*ratio)   h = min(ih, iw/ratio)
+    (source portrait en 1:1 → bande verticale au lieu d'un crop invalide)
+    Centré par défaut ; crop_x : expression x du cadrage guidé (crop_planner)
+    """
+    variant = ASPECT_VARIANTS[aspect]
+    num, den = variant["ratio"]
+
+    crop = f"crop=w='min(iw,ih*{num}/{den})':h='min(ih,iw*{den}/{num})'"
+    if crop_x and variant["guided"]:
+        crop += f":x='{crop_x}'"
+    return crop
+
+
+def aspect_filter(aspect: str = "9x16", profile: str = "final", crop_x: str = None) -> str:
+    """
+    Recadrage + mise à l'échelle d'une déclinaison
+    (9:16 suit la résolution du profil, les autres formats sont finaux)
+    crop_x : expression x du cadrage guidé (crop_planner), sinon centré
+    """
+    variant = ASPECT_VARIANTS[aspect]
+    size = get_profile(profile)["size"] if aspect == "9x16" else variant["size"]
+
+    return f"{aspect_crop(aspect, crop_x)},scale={size}"
+
+
+def encode_args(threads: int = None, profile: str = "final") -> list:
+    """
+    Options d'encodage du profil (+ limite de threads libx264 si fournie)
+    """
+    args = get_profile(profile)["encode"]
+    if not threads:
+        return list(args)
+    return [*args, "-threads", str(threads)]
+
+
+def split_threads(threads: int, n_outputs: int):
+    """
+    -threads s'applique PAR SORTIE : le budget du job est réparti
+    entre ses encodages (au moins 1 thread chacun)
+    """
+    if not threads:
+        return threads
+    return max(1, threads // max(1, n_outputs))
+
+
+# ==================================================
+# SORTIES D'UN JOB + CACHE
+# ==================================================
+
+def job_outputs(job: dict) -> dict:
+    """
+    {format: chemin} : sortie 9:16 + déclinaisons éventuelles
+    """
+    return {"9x16": job["output_path"], **job.get("variants", {})}
+
+
+def variant_entries(outputs: dict) -> dict:
+    """
+    Déclinaisons telles qu'enregistrées dans la publish queue
+    {format: {"path", "platforms"}}
+    """
+    return {
+        aspect: {"path": path, "platforms": ASPECT_VARIANTS[aspect]["platforms"]}
+        for aspect, path in outputs.items()
+    }
+
+
+def render_params(job: dict, aspect: str = "9x16") -> dict:
+    """
+    Ce qui détermine le MP4 d'un clip dans un format (clé du cache de rendus)
+    - Sous-titres par contenu (subtitles_digest), pas par chemin
+    """
+    profile = job.get("profile", "final")
+
+    params = {
+        "start_sec": job["start_sec"],
+        "end_sec": job["end_sec"],
+        "filter": f"{aspect_filter(aspect, profile, job.get('crop_x'))},ass",
+        "encode": get_profile(profile)["encode"],
+        "subtitles": job["subtitles_digest"],
+    }
+    if aspect != "9x16":
+        params["aspect"] = aspect
+    return params
+
+
+def output_cache_params(job: dict) -> dict:
+    source = source_fingerprint(job["video_path"])
+    return {
+        aspect: {"source": source, **render_params(job, aspect)}
+        for aspect in job_outputs(job)
+    }
+
+
+def serve_cached_outputs(job: dict) -> bool:
+    """
+    Toutes les sorties du job déjà en cache → exposées sans ffmpeg
+    """
+    kind = job.get("profile", "final")
+    outputs = job_outputs(job)
+    cached = {
+        aspect: lookup_artifact(kind, params)
+        for aspect, params in output_cache_params(job).items()
+    }
+
+    if not all(cached.values()):
+        return False
+
+    for aspect, path in cached.items():
+        materialize(path, outputs[aspect])
+    return True
+
+
+def store_outputs(job: dict):
+    """
+    Range les sorties d'un rendu réussi dans le cache
+    """
+    kind = job.get("profile", "final")
+    outputs = job_outputs(job)
+
+    for aspect, params in output_cache_params(job).items():
+        store_artifact(kind, params, outputs[aspect])
+
+
+def discard_outputs(job: dict):
+    """
+    Supprime les sorties d'un rendu échoué / annulé / tué
+    (MP4 tronqué : jamais servi ni rangé dans le cache)
+    """
+    for path in job_outputs(job).values():
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# ==================================================
+# COMMANDES
+# ==================================================
 
+def _video_outputs(source: str, pre_filters: list, job: dict, tag: str) -> tuple:
+    """
+    Branche(s) vidéo d'un clip : [pré-filtres] → (split) → crop/scale/ass
+    par format. Retourne (morceaux du graphe, [(label, chemin), ...])
+    """
+    profile = job.get("profile", "final")
+    crop_x = job.get("crop_x")
+    outputs = job_outputs(job)
+    ass = ass_filter(job["ass_path"])
+    prefix = "".join(f"{f}," for f in pre_filters)
+
+    labels = [f"vout{tag}_{k}" for k in range(len(outputs))]
+
+    if len(outputs) == 1:
+        aspect = next(iter(outputs))
+        graph = [f"{source}{prefix}{aspect_filter(aspect, profile, crop_x)},{ass}[{labels[0]}]"]
+    else:
+        splits = "".join(f"[{label}s]" for label in labels)
+        graph = [f"{source}{prefix}split={len(outputs)}{splits}"]
+        for label, aspect in zip(labels, outputs):
+            graph.append(f"[{label}s]{aspect_filter(aspect, profile, crop_x)},{ass}[{label}]")
+
+    return graph, list(zip(labels, outputs.values()))
+
+
+def build_single_command(
+    video_path: str,
+    ass_path: str,
+    output_path: str,
+    start_sec: int,
+    end_sec: int,
+    threads: int = None,
+    profile: str = "final",
+    variants: dict = None,
+    crop_x: str = None
+) -> list:
+    """
+    variants : {format: chemin} en plus du 9:16, même décodage (split)
+    crop_x   : cadrage guidé (crop_planner), sinon crop centré
+    """
+    duration = end_sec - start_sec
+
+    # -t avant -i (option d'entrée) : vaut pour TOUTES les sorties,
+    # pas seulement la première déclinaison
     cmd = [
-    FFMPEG,
-    "-y",
+        "-y",
+        "-ss", str(start_sec),
+        "-t", str(duration),
+        "-i", video_path,
+    ]
+
+    if not variants:
+        return cmd + [
+            # 🎯 recadrage vertical + 🔤 sous-titres dans le même filtre
+            "-vf", f"{vertical_filter(profile, crop_x)},{ass_filter(ass_path)}",
+
+            *encode_args(threads, profile),
+            output_path
+        ]
+
+    # 📐 un décodage → une branche crop/scale/ass par format
+    job = {
+        "ass_path": ass_path,
+        "output_path": output_path,
+        "profile": profile,
+        "variants": variants,
+        "crop_x": crop_x,
+    }
+    graph, outputs = _video_outputs("[0:v]", [], job, "0")
+
+    cmd += ["-filter_complex", ";".join(graph)]
+    output_threads = split_threads(threads, len(outputs))
+    for label, path in outputs:
+        cmd += ["-map", f"[{label}]", "-map", "0:a?", *encode_args(output_threads, profile), path]
+
+    return cmd
+
+
+# ==================================================
+# RENDU GROUPÉ (UN SEUL DÉCODAGE DE LA SOURCE)
+# ==================================================
+
+def group_clip_jobs(jobs: list, max_gap_sec: float = BATCH_MAX_GAP_SEC) -> list:
+    """
+    Regroupe les clips (triés par début) dont l'écart est <= max_gap_sec
+    (écart mesuré à la fin la plus tardive du groupe : un clip long
+    peut recouvrir les suivants)
+    """
+    groups = []
+    group_end = None
+
+    for job in sorted(jobs, key=lambda j: j["start_sec"]):
+        if groups and job["start_sec"] - group_end <= max_gap_sec:
+            groups[-1].append(job)
+            group_end = max(group_end, job["end_sec"])
+        else:
+            groups.append([job])
+            group_end = job["end_sec"]
+
+    return groups
+
+
+def source_has_audio(video_path: str) -> bool:
+    """
+    La source a-t-elle une piste audio ? (le graphe groupé ne peut pas
+    la rendre optionnelle comme -map 0:a?)
+    """
+    output = run_ffprobe(
+        ["-v", "error", "-select_streams", "a", "-show_entries", "stream=index",
+         "-of", "csv=p=0", video_path],
+        name=video_path
+    )
+    return bool(output.strip())
+
+
+def build_batch_command(
+    video_path: str,
+    jobs: list,
+    threads: int = None,
+    audio: bool = True
+) -> list:
+    """
+    Un ffmpeg pour plusieurs clips d'une même source
+    - Seek unique au début du groupe, décodage unique (-t en option
+      d'entrée : lecture bornée au groupe pour TOUTES les sorties)
+    - split / asplit → une branche par clip :
+      trim → setpts (temps relatifs au clip) → crop → scale → ass
+      (→ split à nouveau par format si le job a des déclinaisons)
+    - Une sortie encodée par clip et par format (profil de chaque job)
+    - threads : budget du job entier, réparti entre les sorties
+    - audio   : False si la source n'a pas de piste audio (vidéo seule)
+    """
+    group_start = min(j["start_sec"] for j in jobs)
+    group_end = max(j["end_sec"] for j in jobs)
+    n = len(jobs)
+
+    v_split = "".join(f"[v{i}]" for i in range(n))
+    a_split = "".join(f"[a{i}]" for i in range(n))
+
+    graph = [f"[0:v]split={n}{v_split}"]
+    if audio:
+        graph.append(f"[0:a]asplit={n}{a_split}")
+    maps = []
+
+    for i, job in enumerate(jobs):
+        start = job["start_sec"] - group_start
+        end = job["end_sec"] - group_start
+
+        video_graph, video_outputs = _video_outputs(
+            f"[v{i}]",
+            [f"trim=start={start}:end={end}", "setpts=PTS-STARTPTS"],
+            job,
+            str(i)
+        )
+        graph += video_graph
+
+        a_labels = [None] * len(video_outputs)
+        if audio:
+            a_labels = [f"aout{i}_{k}" for k in range(len(video_outputs))]
+            branch = f"[a{i}]atrim=start={start}:end={end},asetpts=PTS-STARTPTS"
+            if len(a_labels) > 1:
+                branch += f",asplit={len(a_labels)}"
+            graph.append(branch + "".join(f"[{label}]" for label in a_labels))
+
+        for (v_label, path), a_label in zip(video_outputs, a_labels):
+            maps.append((v_label, a_label, job.get("profile", "final"), path))
+
+    cmd = [
+        "-y",
+        "-ss", str(group_start),
+        "-t", str(group_end - group_start),
+        "-i", video_path,
+        "-filter_complex", ";".join(graph),
+    ]
+
+    # budget du job partagé entre clips × formats
+    output_threads = split_threads(threads, len(maps))
+
+    for v_label, a_label, profile, path in maps:
+        cmd += ["-map", f"[{v_label}]"]
+        if a_label:
+            cmd += ["-map", f"[{a_label}]"]
+        cmd += [*encode_args(output_threads, profile), path]
+
+    return cmd
+
+
+def render_timeout(group: list) -> float:
+    """
+    Timeout d'un job de rendu : proportionnel à ce qu'il encode
+    (durée de chaque clip × nombre de formats)
+    """
+    output_sec = sum(
+        (job["end_sec"] - job["start_sec"]) * len(job_outputs(job))
+        for job in group
+    )
+    return RENDER_TIMEOUT_BASE_SEC + RENDER_TIMEOUT_PER_SEC * output_sec
+
+
+def plan_clip_renders(
+    video_path: str,
+    jobs: list,
+    max_gap_sec: float = BATCH_MAX_GAP_SEC
+) -> list:
+    """
+    Prépare les rendus d'une vidéo sans les lancer
+    Retourne [(groupe de jobs, build(threads) -> arguments ffmpeg), ...]
+    (utilisé tel quel par le RenderScheduler)
+    """
+    plan = []
+    audio = None  # sondé une fois, seulement si un rendu est groupé
 
-    # 🔧 RECONSTRUIT LES TIMESTAMPS
-    "-fflags", "+genpts",
-    "-avoid_negative_ts", "make_zero",
+    for group in group_clip_jobs(jobs, max_gap_sec):
+        for job in group:
+            for path in job_outputs(job).values():
+                ensure_dir(os.path.dirname(path))
 
-    "-i", video_path,
-    "-vf", f"ass=filename='{ass_path}'",
+                # sortie liée (lien dur) à un artefact du cache :
+                # détachée avant que ffmpeg ne l'écrase
+                if os.path.exists(path) and os.stat(path).st_nlink > 1:
+                    os.remove(path)
 
-    # 🎥 VIDÉO SAFE TIKTOK
-    "-c:v", "libx264",
-    "-profile:v", "high",
-    "-level", "4.0",
-    "-pix_fmt", "yuv420p",
-    "-r", "30",
-    "-g", "60",
+        if len(group) == 1:
+            job = group[0]
 
-    # 🔊 AUDIO REENCODÉ (IMPORTANT)
-    "-c:a", "aac",
-    "-b:a", "128k",
+            def build(threads=None, job=job):
+                return build_single_command(
+                    video_path,
+                    job["ass_path"],
+                    job["output_path"],
+                    job["start_sec"],
+                    job["end_sec"],
+                    threads=threads,
+                    profile=job.get("profile", "final"),
+                    variants=job.get("variants"),
+                    crop_x=job.get("crop_x")
+                )
+        else:
+            if audio is None:
+                audio = source_has_audio(video_path)
 
-    "-movflags", "+faststart",
-    output_path
-]
+            def build(threads=None, group=group):
+                return build_batch_command(video_path, group, threads=threads, audio=audio)
 
+        plan.append((group, build))
 
-    subprocess.run(cmd, check=True)
+    return plan
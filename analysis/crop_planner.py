@@ -0,0 +1,377 @@
+# analysis/crop_planner.py
+# --------------------------------------------------
+# Recadrage guidé par la saillance (au lieu du crop centré fixe)
+# - Clip échantillonné en tout petit (160 px de large), frames brutes
+#   RGB lues en pipe → NumPy :
+#   · GOP courts : images clés seules (-skip_frame nokey), le reste
+#     du clip n'est jamais décodé (index keyframe_index)
+#   · sinon : décodage complet ramené à 2 images/s
+# - Saillance vectorisée : mouvement + teinte peau + contours
+# - Trajectoire horizontale lissée (zone morte + vitesse max)
+#   → expression x du filtre crop, évaluée par ffmpeg à chaque frame
+# - Plan mis en cache (source + bornes + réglages) : un re-scan
+#   ne relance ni ffprobe ni ffmpeg
+# --------------------------------------------------
+
+import json
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from analysis.ffmpeg_runner import FFmpegError, ffmpeg_pipe, run_ffprobe
+from analysis.keyframe_index import keyframes_between, load_keyframe_index
+from analysis.render_cache import cached_artifact, source_fingerprint
+
+
+# ==================================================
+# CONFIGURATION
+# ==================================================
+
+SAMPLE_FPS = 2
+SAMPLE_WIDTH = 160            # frames d'analyse : 160 x ~90
+
+KEYFRAME_SAMPLING = True      # images clés seules si les GOP sont assez courts
+KEYFRAME_MAX_GAP_SEC = 2.5    # trou max entre deux échantillons (≈ fenêtre de lissage)
+KEYFRAME_MIN_SAMPLES = 4
+
+SALIENCY_WEIGHTS = {
+    "motion": 0.5,
+    "skin": 0.3,
+    "edges": 0.2,
+}
+
+# peau en YCbCr (plages classiques, robustes aux carnations)
+SKIN_CB = (77, 127)
+SKIN_CR = (133, 173)
+
+FLAT_SALIENCY_RATIO = 1.15    # meilleur cadrage < 115% du moyen → centre
+SMOOTH_SAMPLES = 5            # médiane glissante (2.5 s à 2 img/s)
+DEADZONE = 0.08               # écart mini (fraction du débattement) avant de bouger
+MAX_PAN_PER_SEC = 0.25        # vitesse max du cadre (fraction du débattement / s)
+MAX_KEYPOINTS = 24            # taille max de l'expression crop
+
+
+# ==================================================
+# ÉCHANTILLONNAGE
+# ==================================================
+
+@lru_cache(maxsize=64)
+def probe_video_size(video_path: str) -> tuple:
+    output = run_ffprobe(
+        [
+            "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=width,height",
+            "-of", "csv=p=0",
+            video_path
+        ],
+        name=video_path,
+        stage="probe"
+    )
+    width, height = output.strip().splitlines()[0].split(",")[:2]
+    return int(width), int(height)
+
+
+def keyframe_times(video_path: str, start_sec: float, end_sec: float):
+    """
+    Temps (relatifs au clip) des images clés si elles suffisent à
+    l'analyse, sinon None (GOP trop longs → décodage complet)
+    """
+    if not KEYFRAME_SAMPLING:
+        return None
+
+    try:
+        keyframes = keyframes_between(load_keyframe_index(video_path), start_sec, end_sec)
+    except FFmpegError:
+        return None
+
+    if keyframes.size < KEYFRAME_MIN_SAMPLES:
+        return None
+
+    bounds = np.concatenate([[start_sec], keyframes, [end_sec]])
+    if np.diff(bounds).max() > KEYFRAME_MAX_GAP_SEC:
+        return None
+
+    return keyframes - start_sec
+
+
+def sample_frames(video_path: str, start_sec: float, end_sec: float, size: tuple, times=None) -> tuple:
+    """
+    Frames RGB minuscules du clip (n, h, w, 3) uint8 + leurs temps (s)
+    times : temps des images clés (keyframe_times) → seules elles sont
+            décodées ; None → décodage complet ramené à SAMPLE_FPS
+    """
+    width, height = size
+    frame_bytes = width * height * 3
+    scale = f"scale={width}:{height}:flags=fast_bilinear"
+
+    if times is None:
+        decode = []
+        output = ["-vf", f"fps={SAMPLE_FPS},{scale}"]
+    else:
+        decode = ["-skip_frame", "nokey"]
+        output = ["-vf", scale, "-fps_mode", "passthrough"]
+
+    command = [
+        *decode,
+        "-ss", str(start_sec),
+        "-i", video_path,
+        "-t", str(end_sec - start_sec),
+        "-an",
+        *output,
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "pipe:1"
+    ]
+
+    with ffmpeg_pipe(command, name=video_path, stage="crop_plan") as stdout:
+        raw = stdout.read()
+
+    n = len(raw) // frame_bytes
+    frames = np.frombuffer(raw[:n * frame_bytes], dtype=np.uint8).reshape(n, height, width, 3)
+
+    if times is None:
+        times = np.arange(n) / SAMPLE_FPS
+    elif len(times) != n:
+        # nombre d'images clés inattendu : répartition régulière
+        times = np.linspace(0, end_sec - start_sec, n, endpoint=False)
+
+    return frames, np.asarray(times, dtype=np.float64)
+
+
+# ==================================================
+# SAILLANCE (VECTORISÉE)
+# ==================================================
+
+def column_saliency(frames: np.ndarray) -> np.ndarray:
+    """
+    Saillance par colonne de chaque frame : (n, w)
+    - motion : |frame - précédente| (0 pour la 1re frame)
+    - skin   : pixels dans la plage peau YCbCr
+    - edges  : gradient horizontal + vertical de la luminance
+    Chaque carte est normalisée par sa moyenne sur le clip
+    """
+    rgb = frames.astype(np.float32)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+
+    luma = 0.299 * r + 0.587 * g + 0.114 * b
+    cb = 128 - 0.168736 * r - 0.331264 * g + 0.5 * b
+    cr = 128 + 0.5 * r - 0.418688 * g - 0.081312 * b
+
+    motion = np.zeros_like(luma)
+    motion[1:] = np.abs(luma[1:] - luma[:-1])
+
+    skin = (
+        (cb >= SKIN_CB[0]) & (cb <= SKIN_CB[1])
+        & (cr >= SKIN_CR[0]) & (cr <= SKIN_CR[1])
+    ).astype(np.float32)
+
+    edges = np.zeros_like(luma)
+    edges[:, :, 1:] += np.abs(np.diff(luma, axis=2))
+    edges[:, 1:, :] += np.abs(np.diff(luma, axis=1))
+
+    maps = {"motion": motion, "skin": skin, "edges": edges}
+    saliency = np.zeros(luma.shape[0::2], dtype=np.float64)
+
+    for name, weight in SALIENCY_WEIGHTS.items():
+        columns = maps[name].sum(axis=1, dtype=np.float64)
+        mean = columns.mean()
+        if mean > 0:
+            saliency += weight * columns / mean
+
+    return saliency
+
+
+def best_window_positions(saliency: np.ndarray, window: int) -> np.ndarray:
+    """
+    Position (0 = gauche, 1 = droite) de la fenêtre de crop la plus
+    saillante pour chaque frame ; 0.5 si la saillance est trop plate
+    """
+    n, width = saliency.shape
+    span = width - window
+    if span <= 0:
+        return np.full(n, 0.5)
+
+    # somme glissante de largeur "window" via sommes cumulées
+    cumsum = np.zeros((n, width + 1))
+    np.cumsum(saliency, axis=1, out=cumsum[:, 1:])
+    scores = cumsum[:, window:] - cumsum[:, :-window]
+
+    best = scores.argmax(axis=1)
+    peak = scores[np.arange(n), best]
+    mean = np.maximum(scores.mean(axis=1), 1e-9)
+
+    positions = best / span
+    positions[peak < FLAT_SALIENCY_RATIO * mean] = 0.5
+    return positions
+
+
+# ==================================================
+# TRAJECTOIRE LISSÉE
+# ==================================================
+
+def smooth_trajectory(targets: np.ndarray) -> np.ndarray:
+    """
+    Médiane glissante → zone morte → vitesse de panoramique bornée
+    (cadre immobile tant que le sujet ne s'éloigne pas vraiment)
+    """
+    if targets.size == 0:
+        return targets
+
+    half = SMOOTH_SAMPLES // 2
+    padded = np.pad(targets, half, mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, SMOOTH_SAMPLES)
+    smoothed = np.median(windows, axis=1)
+
+    max_step = MAX_PAN_PER_SEC / SAMPLE_FPS
+    positions = np.empty_like(smoothed)
+    pos = smoothed[0]
+
+    for i, target in enumerate(smoothed):
+        if abs(target - pos) > DEADZONE:
+            pos += float(np.clip(target - pos, -max_step, max_step))
+        positions[i] = pos
+
+    return positions
+
+
+def trajectory_keypoints(positions: np.ndarray) -> list:
+    """
+    Points de rupture de la trajectoire (début, fin, changements de pente)
+    [(t, position), ...], au plus MAX_KEYPOINTS
+    """
+    if positions.size == 0:
+        return [(0.0, 0.5)]
+
+    times = np.arange(positions.size) / SAMPLE_FPS
+    slopes = np.round(np.diff(positions), 4)
+    breaks = np.flatnonzero(np.diff(slopes)) + 1
+
+    idx = np.unique(np.concatenate([[0], breaks, [positions.size - 1]]))
+    if idx.size > MAX_KEYPOINTS:
+        idx = idx[np.linspace(0, idx.size - 1, MAX_KEYPOINTS).round().astype(int)]
+
+    return [(float(times[i]), round(float(positions[i]), 3)) for i in idx]
+
+
+def crop_x_expression(keypoints: list) -> str:
+    """
+    Expression x du filtre crop (t = temps relatif au clip)
+    keypoints : [(t, centre du cadre en fraction de la largeur source)]
+    Interpolation linéaire par morceaux SANS imbrication :
+        c(t) = c0 + Σ (c[k+1]-c[k]) * clip((t - t[k]) / (t[k+1]-t[k]), 0, 1)
+    Centré sur c(t), borné à l'image : valable pour tout format de crop
+    """
+    c0 = keypoints[0][1]
+    terms = [f"{c0}"]
+
+    for (t0, a), (t1, b) in zip(keypoints, keypoints[1:]):
+        if b != a and t1 > t0:
+            terms.append(f"{b - a:+.3f}*clip((t-{t0:g})/{t1 - t0:g},0,1)")
+
+    return f"clip(iw*({''.join(terms)})-ow/2,0,iw-ow)"
+
+
+# ==================================================
+# API
+# ==================================================
+
+def plan_crop(
+    video_path: str,
+    start_sec: float,
+    end_sec: float,
+    aspect_ratio: float = 9 / 16
+) -> dict:
+    """
+    Planifie le cadrage horizontal d'un clip
+    aspect_ratio : largeur / hauteur du crop (9/16 pour TikTok)
+    Retourne {"x_expr", "keypoints", "plan_sec"} ; x_expr utilisable
+    tel quel dans crop=w=...:h=ih:x='x_expr':y=0 (tous formats)
+    """
+    t0 = time.perf_counter()
+
+    src_width, src_height = probe_video_size(video_path)
+    height = max(2, int(round(SAMPLE_WIDTH * src_height / src_width / 2)) * 2)
+    frames, times = sample_frames(
+        video_path, start_sec, end_sec, (SAMPLE_WIDTH, height),
+        times=keyframe_times(video_path, start_sec, end_sec)
+    )
+
+    # largeur du crop dans les frames d'analyse
+    window = int(round(SAMPLE_WIDTH * min(1.0, src_height * aspect_ratio / src_width)))
+
+    if frames.shape[0] == 0:
+        keypoints = [(0.0, 0.5)]
+    else:
+        targets = best_window_positions(column_saliency(frames), window)
+
+        # échantillons (images clés irrégulières) ramenés sur la grille
+        # SAMPLE_FPS attendue par le lissage
+        grid = np.arange(0.0, end_sec - start_sec, 1 / SAMPLE_FPS)
+        targets = np.interp(grid, times, targets)
+
+        keypoints = [
+            # position de la fenêtre → centre du cadre (fraction de largeur)
+            (t, round((p * (SAMPLE_WIDTH - window) + window / 2) / SAMPLE_WIDTH, 3))
+            for t, p in trajectory_keypoints(smooth_trajectory(targets))
+        ]
+
+    return {
+        "x_expr": crop_x_expression(keypoints),
+        "keypoints": keypoints,
+        "plan_sec": round(time.perf_counter() - t0, 3),
+    }
+
+
+def plan_params() -> dict:
+    """
+    Réglages qui déterminent un plan (entrent dans la clé du cache)
+    """
+    return {
+        "sample_fps": SAMPLE_FPS,
+        "sample_width": SAMPLE_WIDTH,
+        "keyframe_sampling": KEYFRAME_SAMPLING,
+        "keyframe_max_gap_sec": KEYFRAME_MAX_GAP_SEC,
+        "keyframe_min_samples": KEYFRAME_MIN_SAMPLES,
+        "weights": SALIENCY_WEIGHTS,
+        "skin": [SKIN_CB, SKIN_CR],
+        "flat_ratio": FLAT_SALIENCY_RATIO,
+        "smooth_samples": SMOOTH_SAMPLES,
+        "deadzone": DEADZONE,
+        "max_pan_per_sec": MAX_PAN_PER_SEC,
+        "max_keypoints": MAX_KEYPOINTS,
+    }
+
+
+def load_crop_plan(
+    video_path: str,
+    start_sec: float,
+    end_sec: float,
+    aspect_ratio: float = 9 / 16
+) -> dict:
+    """
+    plan_crop servi par le cache de rendus (clé : empreinte de la source
+    + bornes + format + réglages du planificateur)
+    Retourne le plan + "cached" (True : aucun ffprobe / ffmpeg lancé)
+    """
+    params = {
+        "source": source_fingerprint(video_path),
+        "start_sec": start_sec,
+        "end_sec": end_sec,
+        "aspect_ratio": round(aspect_ratio, 6),
+        **plan_params(),
+    }
+
+    def produce(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(plan_crop(video_path, start_sec, end_sec, aspect_ratio), f)
+
+    path, hit = cached_artifact("crop_plan", params, ".json", produce)
+
+    with open(path, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+
+    plan["keypoints"] = [tuple(k) for k in plan["keypoints"]]
+    plan["cached"] = hit
+    return plan
@@ -0,0 +1,149 @@
+# analysis/energy_index.py
+# --------------------------------------------------
+# Index d'énergie par sommes cumulées (1 fois par vidéo)
+# - Énergie / loudness / part de silence de [a, b) en O(1)
+# - Optimisation des bornes d'un clip autour d'un moment fort
+#   (coupe les blancs, prolonge les réactions qui durent)
+# --------------------------------------------------
+
+import numpy as np
+
+
+# ==================================================
+# CONFIGURATION
+# ==================================================
+
+SILENCE_RATIO = 0.3        # fenêtre "silence" si RMS < 30% de la moyenne
+CLIP_DENSITY_LEVEL = 0.8   # une fenêtre sous 80% de la moyenne coûte au clip
+MIN_CLIP_SEC = 15          # durée minimale d'un clip
+MIN_LEAD_SEC = 3           # au moins 3s avant le moment fort
+MIN_TAIL_SEC = 5           # au moins 5s après
+SUSTAIN_EXTEND_SEC = 15    # fin prolongeable de 15s au-delà de max_tail_sec…
+SUSTAIN_LEVEL = 1.5        # …par des fenêtres au-dessus de 150% de la moyenne
+
+
+# ==================================================
+# CONSTRUCTION DE L'INDEX
+# ==================================================
+
+def build_energy_index(energies: np.ndarray, window_sec: float = 0.5) -> dict:
+    """
+    Construit les sommes cumulées à partir de l'enveloppe RMS
+    - power    : RMS² (énergie moyenne) de chaque fenêtre
+    - silence  : nb de fenêtres silencieuses
+    - density  : ratio à la moyenne - CLIP_DENSITY_LEVEL (score des clips)
+    """
+    rms = np.asarray(energies, dtype=np.float64)
+    mean_rms = float(np.mean(rms)) if rms.size else 0.0
+    ratio = rms / mean_rms if mean_rms > 0 else np.zeros_like(rms)
+
+    def prefix(values):
+        out = np.zeros(values.size + 1, dtype=np.float64)
+        np.cumsum(values, out=out[1:])
+        return out
+
+    return {
+        "window_sec": window_sec,
+        "size": rms.size,
+        "mean_rms": mean_rms,
+        "power": prefix(rms ** 2),
+        "silence": prefix((ratio < SILENCE_RATIO).astype(np.float64)),
+        "density": prefix(ratio - CLIP_DENSITY_LEVEL),
+    }
+
+
+def _window_range(index: dict, start_sec: float, end_sec: float) -> tuple:
+    ws = index["window_sec"]
+    lo = min(max(int(start_sec / ws), 0), index["size"])
+    hi = min(max(int(np.ceil(end_sec / ws)), lo), index["size"])
+    return lo, hi
+
+
+# ==================================================
+# REQUÊTES O(1)
+# ==================================================
+
+def segment_stats(index: dict, start_sec: float, end_sec: float) -> dict:
+    """
+    Statistiques de [start_sec, end_sec) en O(1)
+    - energy        : somme des RMS² (∝ énergie du segment)
+    - loudness      : RMS du segment relative à la moyenne de la vidéo
+    - silence_share : part des fenêtres silencieuses
+    """
+    lo, hi = _window_range(index, start_sec, end_sec)
+    count = hi - lo
+
+    if count == 0 or index["mean_rms"] <= 0:
+        return {"energy": 0.0, "loudness": 0.0, "silence_share": 0.0}
+
+    energy = index["power"][hi] - index["power"][lo]
+    silence = index["silence"][hi] - index["silence"][lo]
+
+    return {
+        "energy": float(energy),
+        "loudness": round(float(np.sqrt(energy / count) / index["mean_rms"]), 2),
+        "silence_share": round(float(silence / count), 2),
+    }
+
+
+# ==================================================
+# OPTIMISATION DES BORNES DE CLIP
+# ==================================================
+
+def optimize_clip_bounds(
+    index: dict,
+    moment_sec: float,
+    max_lead_sec: float = 25,
+    max_tail_sec: float = 25,
+    min_clip_sec: float = MIN_CLIP_SEC,
+    max_extend_sec: float = SUSTAIN_EXTEND_SEC
+) -> tuple:
+    """
+    Choisit (clip_start, clip_end) autour de moment_sec
+    - Maximise la somme de (ratio - CLIP_DENSITY_LEVEL) sur le clip :
+      les blancs font baisser le score, les réactions soutenues le montent
+    - Fin cherchée jusqu'à max_tail_sec + max_extend_sec : au-delà du
+      padding, une fenêtre ne rapporte que si elle dépasse SUSTAIN_LEVEL
+      (seule une réaction qui dure prolonge le clip)
+    - Tous les couples (début, fin) évalués d'un coup via les sommes cumulées
+    - Index bornés à l'enveloppe (moment proche de la fin / au-delà)
+    Retourne des secondes entières (comme le découpage actuel)
+    """
+    ws = index["window_sec"]
+    size = index["size"]
+
+    moment = int(moment_sec / ws)
+    min_windows = int(np.ceil(min_clip_sec / ws))
+
+    def clamp(window):
+        return min(max(window, 0), size)
+
+    starts = np.arange(
+        clamp(moment - int(max_lead_sec / ws)),
+        clamp(moment - int(MIN_LEAD_SEC / ws)) + 1
+    )
+    tail_limit = moment + int(max_tail_sec / ws)
+    ends = np.arange(
+        clamp(moment + int(MIN_TAIL_SEC / ws)),
+        clamp(tail_limit + int(max_extend_sec / ws)) + 1
+    )
+
+    # moment hors de l'enveloppe (durée annoncée > audio décodé) : fenêtre fixe
+    if size == 0 or moment >= size or ends[-1] <= starts[0]:
+        return max(0, int(moment_sec - max_lead_sec)), int(moment_sec + max_tail_sec)
+
+    density = index["density"]
+    scores = density[ends][None, :] - density[starts][:, None]
+
+    # prolongation : seuil relevé de CLIP_DENSITY_LEVEL à SUSTAIN_LEVEL
+    extension = np.maximum(ends - tail_limit, 0)
+    scores -= (extension * (SUSTAIN_LEVEL - CLIP_DENSITY_LEVEL))[None, :]
+
+    # durée minimale : couples trop courts exclus
+    too_short = (ends[None, :] - starts[:, None]) < min_windows
+    if too_short.all():
+        return int(starts[0] * ws), int(np.ceil(ends[-1] * ws))
+    scores[too_short] = -np.inf
+
+    i, j = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    return int(starts[i] * ws), int(np.ceil(ends[j] * ws))
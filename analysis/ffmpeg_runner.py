@@ -0,0 +1,417 @@
+# analysis/ffmpeg_runner.py
+# --------------------------------------------------
+# Couche d'exécution ffmpeg partagée
+# - Binaire résolu UNE fois (PATH, puis install Windows locale)
+# - Progression (-progress pipe:1) → frames / fps / speed
+# - Timeout + annulation par job
+# - stderr capturé en cas d'échec
+# - Temps mur / CPU de chaque appel → storage/ffmpeg_metrics.jsonl
+#   (fichier tourné au-delà de METRICS_MAX_BYTES, mémoire bornée)
+# --------------------------------------------------
+
+import json
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+
+# ==================================================
+# CONFIGURATION
+# ==================================================
+
+WINDOWS_FALLBACK_DIR = r"C:\buzz_detector\ffmpeg\bin"
+
+METRICS_PATH = os.path.join("storage", "ffmpeg_metrics.jsonl")
+METRICS_MAX_BYTES = 5 * 1024 * 1024   # au-delà : .jsonl → .jsonl.1 (une seule archive)
+METRICS_MAX_ENTRIES = 5000            # entrées gardées en mémoire (les plus récentes)
+
+STDERR_TAIL_CHARS = 4000   # fin de stderr gardée dans les erreurs
+
+_metrics_lock = threading.Lock()
+_metrics = deque(maxlen=METRICS_MAX_ENTRIES)
+
+
+# ==================================================
+# ERREURS
+# ==================================================
+
+class FFmpegError(subprocess.CalledProcessError):
+    """
+    Échec ffmpeg (sous-classe de CalledProcessError : les anciens
+    except subprocess.CalledProcessError restent valables)
+    """
+
+    def __str__(self):
+        tail = (self.stderr or "").strip().splitlines()[-5:]
+        return f"ffmpeg a échoué (code {self.returncode}) : " + " | ".join(tail)
+
+
+class FFmpegTimeout(FFmpegError):
+    pass
+
+
+class FFmpegCancelled(FFmpegError):
+    pass
+
+
+# ==================================================
+# RÉSOLUTION DES BINAIRES
+# ==================================================
+
+@lru_cache(maxsize=None)
+def resolve_binary(name: str = "ffmpeg") -> str:
+    """
+    Chemin de ffmpeg / ffprobe, résolu une seule fois par process
+    """
+    found = shutil.which(name)
+    if found:
+        return found
+
+    fallback = os.path.join(WINDOWS_FALLBACK_DIR, f"{name}.exe")
+    if os.path.exists(fallback):
+        return fallback
+
+    raise RuntimeError(f"{name} introuvable. Installe-le ou vérifie le chemin.")
+
+
+def ffmpeg_binary() -> str:
+    return resolve_binary("ffmpeg")
+
+
+def ffprobe_binary() -> str:
+    return resolve_binary("ffprobe")
+
+
+def ensure_ffmpeg_on_path():
+    """
+    Ajoute le dossier de ffmpeg au PATH (outils tiers comme Whisper
+    qui appellent "ffmpeg" directement). Sans effet si introuvable.
+    """
+    try:
+        ffmpeg_dir = os.path.dirname(ffmpeg_binary())
+    except RuntimeError:
+        return
+
+    if ffmpeg_dir not in os.environ.get("PATH", "").split(os.pathsep):
+        os.environ["PATH"] += os.pathsep + ffmpeg_dir
+
+
+# ==================================================
+# MÉTRIQUES
+# ==================================================
+
+def record_metrics(entry: dict):
+    """
+    Ajoute une entrée au puits de métriques (mémoire + JSONL)
+    """
+    with _metrics_lock:
+        _metrics.append(entry)
+
+        try:
+            os.makedirs(os.path.dirname(METRICS_PATH), exist_ok=True)
+            if os.path.exists(METRICS_PATH) and os.path.getsize(METRICS_PATH) >= METRICS_MAX_BYTES:
+                os.replace(METRICS_PATH, METRICS_PATH + ".1")
+            with open(METRICS_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # les métriques ne doivent jamais casser un rendu
+
+
+def get_metrics() -> list:
+    with _metrics_lock:
+        return list(_metrics)
+
+
+def summarize_metrics(entries: list = None) -> dict:
+    """
+    Temps cumulés par étape (render, audio, subtitles, ...)
+    """
+    summary = {}
+
+    for e in entries if entries is not None else get_metrics():
+        stage = summary.setdefault(e["stage"], {
+            "calls": 0,
+            "failed": 0,
+            "wall_sec": 0.0,
+            "cpu_sec": 0.0,
+        })
+        stage["calls"] += 1
+        stage["failed"] += 0 if e["ok"] else 1
+        stage["wall_sec"] = round(stage["wall_sec"] + e["wall_sec"], 2)
+        stage["cpu_sec"] = round(stage["cpu_sec"] + (e["cpu_sec"] or 0), 2)
+
+    return summary
+
+
+# ==================================================
+# PROCESSUS
+# ==================================================
+
+def _wait_with_rusage(process: subprocess.Popen):
+    """
+    Attend le process et retourne son temps CPU (user + sys)
+    - POSIX : os.wait4 donne l'usage de CE fils (fiable en parallèle)
+    - Windows : pas d'équivalent sans dépendance → None
+    """
+    if hasattr(os, "wait4"):
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            # déjà récolté ailleurs (poll / wait) : code connu, CPU perdu
+            process.wait()
+            return None
+        process.returncode = os.waitstatus_to_exitcode(status)
+        return round(usage.ru_utime + usage.ru_stime, 3)
+
+    process.wait()
+    return None
+
+
+def _watchdog(process, done: threading.Event, timeout, cancel_event, state: dict):
+    """
+    Tue le process sur timeout ou annulation
+    (n'appelle jamais poll/wait : la récolte reste à _wait_with_rusage ;
+    Popen.kill() fait un poll() qui peut récolter le fils → os.kill)
+    """
+    started = time.monotonic()
+
+    while not done.wait(0.2):
+        if cancel_event is not None and cancel_event.is_set():
+            state["cancelled"] = True
+        elif timeout is not None and time.monotonic() - started > timeout:
+            state["timed_out"] = True
+        else:
+            continue
+
+        try:
+            if hasattr(signal, "SIGKILL"):
+                os.kill(process.pid, signal.SIGKILL)
+            else:
+                process.kill()  # Windows : pas de wait4, poll() sans risque
+        except OSError:
+            pass
+        return
+
+
+def _finish(name, stage, args, started, cpu_sec, returncode, stderr_text, state, progress):
+    wall_sec = round(time.perf_counter() - started, 3)
+    ok = returncode == 0 and not state.get("timed_out") and not state.get("cancelled")
+
+    record_metrics({
+        "name": name,
+        "stage": stage,
+        "ok": ok,
+        "returncode": returncode,
+        "wall_sec": wall_sec,
+        "cpu_sec": cpu_sec,
+        "frames": progress.get("frame"),
+        "fps": progress.get("fps"),
+        "speed": progress.get("speed"),
+        "timed_out": bool(state.get("timed_out")),
+        "cancelled": bool(state.get("cancelled")),
+        "at": datetime.now().isoformat(timespec="seconds"),
+    })
+
+    cmd = [ffmpeg_binary(), *args]
+
+    if state.get("timed_out"):
+        raise FFmpegTimeout(returncode, cmd, stderr=stderr_text)
+    if state.get("cancelled"):
+        raise FFmpegCancelled(returncode, cmd, stderr=stderr_text)
+    if returncode != 0:
+        raise FFmpegError(returncode, cmd, stderr=stderr_text)
+
+    return {"wall_sec": wall_sec, "cpu_sec": cpu_sec, **progress, "stderr": stderr_text}
+
+
+def _read_stderr(stderr_file) -> str:
+    stderr_file.seek(0)
+    text = stderr_file.read().decode("utf-8", errors="replace")
+    return text[-STDERR_TAIL_CHARS:]
+
+
+def _parse_progress_value(key: str, value: str):
+    if key == "speed":
+        value = value.rstrip("x")
+    try:
+        return int(value) if key == "frame" else float(value)
+    except ValueError:
+        return None
+
+
+# ==================================================
+# API : COMMANDE COMPLÈTE
+# ==================================================
+
+def run_ffmpeg(
+    args: list,
+    name: str = "ffmpeg",
+    stage: str = "ffmpeg",
+    timeout: float = None,
+    cancel_event: threading.Event = None,
+    on_progress=None
+) -> dict:
+    """
+    Lance ffmpeg (args SANS le binaire) et attend la fin
+    - Progression lue sur -progress pipe:1 (frame, fps, speed, out_time)
+    - on_progress(dict) appelé à chaque bloc de progression
+    - Lève FFmpegError / FFmpegTimeout / FFmpegCancelled
+    Retourne {"wall_sec", "cpu_sec", "frame", "fps", "speed", ..., "stderr"}
+    """
+    cmd = [ffmpeg_binary(), "-hide_banner", "-nostdin", "-progress", "pipe:1", "-nostats", *args]
+
+    progress = {}
+    state = {}
+    done = threading.Event()
+    started = time.perf_counter()
+
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file
+        )
+
+        watchdog = threading.Thread(
+            target=_watchdog,
+            args=(process, done, timeout, cancel_event, state),
+            daemon=True
+        )
+        watchdog.start()
+
+        try:
+            block = {}
+            for raw in process.stdout:
+                key, _, value = raw.decode("utf-8", errors="replace").strip().partition("=")
+
+                if key == "progress":
+                    progress.update(block)
+                    block = {}
+                    if on_progress is not None:
+                        on_progress(dict(progress))
+                elif key in ("frame", "fps", "speed", "out_time_us", "total_size"):
+                    parsed = _parse_progress_value(key, value)
+                    if parsed is not None:
+                        block[key] = parsed
+        finally:
+            process.stdout.close()
+            done.set()
+            cpu_sec = _wait_with_rusage(process)
+            watchdog.join()
+
+        stderr_text = _read_stderr(stderr_file)
+
+    return _finish(name, stage, args, started, cpu_sec, process.returncode, stderr_text, state, progress)
+
+
+# ==================================================
+# API : FFPROBE
+# ==================================================
+
+def run_ffprobe(
+    args: list,
+    name: str = "ffprobe",
+    stage: str = "probe",
+    timeout: float = None
+) -> str:
+    """
+    Lance ffprobe (args SANS le binaire) et retourne sa sortie texte
+    - Même puits de métriques que ffmpeg
+    - Lève FFmpegError / FFmpegTimeout
+    """
+    cmd = [ffprobe_binary(), "-hide_banner", *args]
+    started = time.perf_counter()
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=timeout)
+        returncode = result.returncode
+        stdout = result.stdout.decode("utf-8", errors="replace")
+        stderr_text = result.stderr.decode("utf-8", errors="replace")[-STDERR_TAIL_CHARS:]
+        timed_out = False
+    except subprocess.TimeoutExpired as e:
+        returncode = -1
+        stdout = ""
+        stderr_text = (e.stderr or b"").decode("utf-8", errors="replace")[-STDERR_TAIL_CHARS:]
+        timed_out = True
+
+    record_metrics({
+        "name": name,
+        "stage": stage,
+        "ok": returncode == 0,
+        "returncode": returncode,
+        "wall_sec": round(time.perf_counter() - started, 3),
+        "cpu_sec": None,
+        "frames": None,
+        "fps": None,
+        "speed": None,
+        "timed_out": timed_out,
+        "cancelled": False,
+        "at": datetime.now().isoformat(timespec="seconds"),
+    })
+
+    if timed_out:
+        raise FFmpegTimeout(returncode, cmd, stderr=stderr_text)
+    if returncode != 0:
+        raise FFmpegError(returncode, cmd, stderr=stderr_text)
+
+    return stdout
+
+
+# ==================================================
+# API : SORTIE EN PIPE (PCM, FRAMES BRUTES)
+# ==================================================
+
+@contextmanager
+def ffmpeg_pipe(
+    args: list,
+    name: str = "ffmpeg",
+    stage: str = "ffmpeg",
+    timeout: float = None,
+    cancel_event: threading.Event = None
+):
+    """
+    Lance ffmpeg avec stdout en pipe (données brutes) :
+        with ffmpeg_pipe([...,"pipe:1"]) as stdout:
+            data = stdout.read(n)
+    - stderr dans un fichier temporaire (pas de blocage si verbeux)
+    - métriques + erreurs identiques à run_ffmpeg à la sortie du bloc
+    """
+    cmd = [ffmpeg_binary(), "-hide_banner", "-nostdin", *args]
+
+    state = {}
+    done = threading.Event()
+    started = time.perf_counter()
+
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file
+        )
+
+        watchdog = threading.Thread(
+            target=_watchdog,
+            args=(process, done, timeout, cancel_event, state),
+            daemon=True
+        )
+        watchdog.start()
+
+        try:
+            yield process.stdout
+        finally:
+            process.stdout.close()
+            done.set()
+            cpu_sec = _wait_with_rusage(process)
+            watchdog.join()
+
+        stderr_text = _read_stderr(stderr_file)
+
+    _finish(name, stage, args, started, cpu_sec, process.returncode, stderr_text, state, {})
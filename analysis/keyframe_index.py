@@ -0,0 +1,103 @@
+# analysis/keyframe_index.py
+# --------------------------------------------------
+# Index des keyframes d'une source
+# - ffprobe lit les paquets (démuxage seul, aucun décodage)
+# - Temps sur la même échelle que -ss (pts - start_time du conteneur)
+# - Index en cache à côté de la vidéo (features/, .npy en mmap)
+# - Sert à savoir, sans décoder, quelles images clés tombent dans
+#   un clip (échantillonnage du crop_planner)
+# - Pas de découpe "stream copy" : tous les rendus recadrent + brûlent
+#   les sous-titres (ré-encodage obligatoire, -ss avant -i ne décode
+#   déjà que depuis la keyframe précédente) et l'audio des transcriptions
+#   ne décode jamais la vidéo → aucun chemin de découpe n'y gagnerait
+# --------------------------------------------------
+
+import numpy as np
+
+from analysis.audio_feature_cache import cached_feature
+from analysis.ffmpeg_runner import run_ffprobe
+
+
+# ==================================================
+# CONFIGURATION
+# ==================================================
+
+KEYFRAME_PARAMS = {"stream": "v:0", "method": "packets", "origin": "start_time"}
+
+
+# ==================================================
+# INDEX DES KEYFRAMES
+# ==================================================
+
+def probe_start_time(video_path: str) -> float:
+    """
+    start_time du conteneur : origine des positions -ss
+    (souvent non nul en MPEG-TS / flux live)
+    """
+    output = run_ffprobe(
+        [
+            "-v", "error",
+            "-show_entries", "format=start_time",
+            "-of", "csv=p=0",
+            video_path
+        ],
+        name=video_path,
+        stage="probe"
+    ).strip()
+
+    try:
+        return float(output)
+    except ValueError:
+        return 0.0  # "N/A"
+
+
+def probe_keyframes(video_path: str) -> np.ndarray:
+    """
+    Timestamps (s) des keyframes du flux vidéo, triés, relatifs au
+    début du fichier (flag K des paquets : pas de décodage, rapide
+    même sur un long live)
+    """
+    output = run_ffprobe(
+        [
+            "-v", "error",
+            "-select_streams", KEYFRAME_PARAMS["stream"],
+            "-show_entries", "packet=pts_time,flags",
+            "-of", "csv=p=0",
+            video_path
+        ],
+        name=video_path,
+        stage="probe"
+    )
+
+    times = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            times.append(float(pts_time))
+
+    origin = probe_start_time(video_path)
+    return np.unique(np.asarray(times, dtype=np.float64) - origin)
+
+
+def load_keyframe_index(video_path: str, use_cache: bool = True) -> np.ndarray:
+    """
+    Index des keyframes, calculé une seule fois par fichier source
+    """
+    if not use_cache:
+        return probe_keyframes(video_path)
+
+    return cached_feature(
+        video_path,
+        "keyframes",
+        KEYFRAME_PARAMS,
+        lambda: probe_keyframes(video_path)
+    )
+
+
+def keyframes_between(keyframes: np.ndarray, start_sec: float, end_sec: float) -> np.ndarray:
+    """
+    Keyframes dans [start_sec, end_sec)
+    """
+    i = int(np.searchsorted(keyframes, start_sec, side="left"))
+    j = int(np.searchsorted(keyframes, end_sec, side="left"))
+    return np.asarray(keyframes[i:j], dtype=np.float64)
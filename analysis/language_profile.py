@@ -0,0 +1,147 @@
+# analysis/language_profile.py
+# --------------------------------------------------
+# Langue par chaîne (data/channels.json, clé "language_profile")
+# - Apprise sur les premières détections Whisper confiantes
+#   (une voix par vidéo source : ses zones ne votent qu'une fois)
+# - Une fois confirmée : passée en "language" → plus de détection
+#   (une passe modèle en moins, intros musicales mal détectées évitées)
+# - Décodage peu confiant dans la langue imposée → redétection sur un
+#   extrait (pas de 2e transcription complète), retranscription seulement
+#   si une autre langue est détectée avec confiance ; profil remis à zéro
+#   si la chaîne change vraiment de langue
+# --------------------------------------------------
+
+from analysis.storage import load_channels, update_channel
+from analysis.subtitles_generator import detect_language, transcribe_audio
+
+LANGUAGE_MIN_PROBABILITY = 0.8   # détection retenue au-delà
+LANGUAGE_CONFIRMATIONS = 2       # détections concordantes avant d'imposer la langue
+LANGUAGE_MIN_LOGPROB = -1.0      # log-prob moyenne sous laquelle on redétecte
+LANGUAGE_MAX_MISSES = 2          # détections divergentes avant remise à zéro
+LANGUAGE_MAX_SOURCES = 50        # sources ayant déjà voté, gardées (les plus récentes)
+
+
+# ==================================================
+# PROFIL
+# ==================================================
+
+def load_language_profile(channel: str) -> dict:
+    profile = load_channels().get(channel, {}).get("language_profile") or {}
+    return {
+        "language": profile.get("language"),
+        "votes": profile.get("votes", {}),
+        "misses": profile.get("misses", 0),
+        "sources": profile.get("sources", []),
+    }
+
+
+def channel_language(channel: str):
+    """
+    Langue confirmée de la chaîne, ou None (détection nécessaire)
+    """
+    if not channel:
+        return None
+    return load_language_profile(channel)["language"]
+
+
+def record_detection(channel: str, language: str, probability: float, source: str = None):
+    """
+    Met à jour le profil avec une détection du modèle
+    source : vidéo d'origine → au plus UNE voix par source (plusieurs
+             zones d'une même vidéo ne confirment pas une langue à elles seules)
+    """
+    if not channel or not language or probability is None:
+        return
+    if probability < LANGUAGE_MIN_PROBABILITY:
+        return
+
+    profile = load_language_profile(channel)
+
+    if source is not None:
+        if source in profile["sources"]:
+            return
+        profile["sources"] = (profile["sources"] + [source])[-LANGUAGE_MAX_SOURCES:]
+
+    profile["votes"][language] = profile["votes"].get(language, 0) + 1
+
+    if profile["language"] == language:
+        profile["misses"] = 0
+    elif profile["language"]:
+        profile["misses"] += 1
+        if profile["misses"] >= LANGUAGE_MAX_MISSES:
+            print(f"🌍 {channel} : langue {profile['language']} abandonnée, réapprentissage")
+            profile = {
+                "language": None,
+                "votes": {language: 1},
+                "misses": 0,
+                "sources": [source] if source is not None else [],
+            }
+
+    if not profile["language"] and profile["votes"][language] >= LANGUAGE_CONFIRMATIONS:
+        profile["language"] = language
+        profile["misses"] = 0
+        print(f"🌍 {channel} : langue confirmée → {language}")
+
+    update_channel(channel, {"language_profile": profile})
+
+
+# ==================================================
+# TRANSCRIPTION
+# ==================================================
+
+def decoding_confidence(result: dict):
+    """
+    Log-prob moyenne des segments (pondérée par leur durée), ou None
+    """
+    total = 0.0
+    weight = 0.0
+
+    for seg in result.get("segments", []):
+        if seg.get("avg_logprob") is None:
+            continue
+        duration = max(seg["end"] - seg["start"], 0.01)
+        total += seg["avg_logprob"] * duration
+        weight += duration
+
+    return total / weight if weight else None
+
+
+def transcribe_for_channel(
+    audio,
+    channel: str = None,
+    word_timestamps: bool = False,
+    source: str = None
+) -> dict:
+    """
+    transcribe_audio avec la langue de la chaîne si elle est connue,
+    sinon détection par le modèle
+    Décodage peu confiant : langue redétectée sur un extrait, l'audio
+    n'est retranscrit que si une autre langue sort avec confiance
+    source : vidéo d'origine (une voix par source dans le profil)
+    """
+    language = channel_language(channel)
+
+    if not language:
+        result = transcribe_audio(audio, word_timestamps=word_timestamps)
+        record_detection(channel, result.get("language"), result.get("language_probability"), source)
+        return result
+
+    result = transcribe_audio(audio, word_timestamps=word_timestamps, language=language)
+
+    confidence = decoding_confidence(result)
+    if confidence is None or confidence >= LANGUAGE_MIN_LOGPROB:
+        return result
+
+    print(f"⚠️ {channel} : décodage peu confiant en {language} ({confidence:.2f}), redétection sur extrait")
+
+    detected, probability = detect_language(audio)
+    record_detection(channel, detected, probability, source)
+
+    # même langue, ou détection incertaine : la transcription est gardée
+    if detected == language or probability < LANGUAGE_MIN_PROBABILITY:
+        return result
+
+    print(f"🌍 {channel} : {detected} détectée ({probability:.0%}), retranscription")
+    result = transcribe_audio(audio, word_timestamps=word_timestamps, language=detected)
+    result["language_probability"] = probability
+    return result
@@ -4,13 +4,75 @@
 # - Ajout de clips
 # - Évitement des doublons
 # - Changement de statut
+# - Rendus finaux différés (aperçu → rendu complet après approbation)
+# - Écritures sous verrou fichier + remplacement atomique
+#   (main.py, bot Telegram et render_worker écrivent tous la queue)
 # --------------------------------------------------
 
 import json
 import os
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
 QUEUE_PATH = os.path.join("storage", "publish_queue.json")
+LOCK_PATH = QUEUE_PATH + ".lock"
+
+LOCK_TIMEOUT_SEC = 30     # attente max du verrou
+LOCK_STALE_SEC = 120      # verrou plus vieux = process mort, repris
+RENDER_MAX_ATTEMPTS = 3   # rendus finaux échoués retentés jusqu'à 3 fois
+
+
+# ==================================================
+# VERROU + LECTURE / ÉCRITURE
+# ==================================================
+
+@contextmanager
+def queue_lock():
+    """
+    Verrou inter-process de la queue (fichier .lock créé en exclusif)
+    À tenir pendant tout lecture → modification → écriture
+    """
+    os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+    deadline = time.monotonic() + LOCK_TIMEOUT_SEC
+
+    while True:
+        try:
+            fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(LOCK_PATH) > LOCK_STALE_SEC:
+                    os.remove(LOCK_PATH)
+                    continue
+            except OSError:
+                continue  # libéré entre-temps
+
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Queue verrouillée depuis plus de {LOCK_TIMEOUT_SEC}s : {LOCK_PATH}")
+            time.sleep(0.05)
+
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(LOCK_PATH)
+        except OSError:
+            pass
+
+
+@contextmanager
+def _locked_queue():
+    """
+    Queue chargée sous verrou, réécrite à la sortie du bloc
+    (pas d'écriture si le bloc lève)
+    """
+    with queue_lock():
+        queue = _load_queue()
+        yield queue
+        _save_queue(queue)
 
 
 def _load_queue():
@@ -22,9 +84,20 @@ def _load_queue():
 
 
 def _save_queue(queue):
+    """
+    Écriture atomique : un lecteur ne voit jamais un JSON à moitié écrit
+    """
     os.makedirs(os.path.dirname(QUEUE_PATH), exist_ok=True)
-    with open(QUEUE_PATH, "w", encoding="utf-8") as f:
+
+    tmp_path = QUEUE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(queue, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, QUEUE_PATH)
+
+
+# ==================================================
+# CLIPS
+# ==================================================
 
 
 def clip_exists(clip_id: str) -> bool:
@@ -32,6 +105,11 @@ def clip_exists(clip_id: str) -> bool:
     return any(c["id"] == clip_id for c in queue["clips"])
 
 
+def get_clip(clip_id: str):
+    queue = _load_queue()
+    return next((c for c in queue["clips"] if c["id"] == clip_id), None)
+
+
 def add_clip_to_queue(
     clip_id: str,
     clip_path: str,
@@ -40,60 +118,111 @@ def add_clip_to_queue(
     video_id: str,
     moment_sec: int,
     platforms=None,
+    deferred_render: dict = None,
+    variants: dict = None,
+    crop: dict = None,
 ):
+    """
+    deferred_render : si fourni, clip_path est un APERÇU ; le rendu final
+    (paramètres dans ce dict) sera lancé après approbation
+    variants : {format: {"path", "platforms"}} (9x16, 1x1, 4x5, 16x9)
+    crop : {"x", "start_sec"} cadrage guidé du clip (miniatures), ou None
+    """
     if platforms is None:
         platforms = ["tiktok", "snap"]
 
-    queue = _load_queue()
+    with _locked_queue() as queue:
+        if any(c["id"] == clip_id for c in queue["clips"]):
+            return False  # déjà présent
+
+        queue["clips"].append({
+            "id": clip_id,
+            "clip_path": clip_path,
+            "caption_path": caption_path,
+            "creator": creator,
+            "video_id": video_id,
+            "moment_sec": moment_sec,
+            "platforms": platforms,
+            "status": "pending",
+            "edited": False,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "approved_at": None,
+            "posted_at": None,
+            "render_status": "deferred" if deferred_render else "final",
+            "deferred_render": deferred_render,
+            "variants": variants or {},
+            "crop": crop,
+        })
 
-    if clip_exists(clip_id):
-        return False  # déjà présent
-
-    queue["clips"].append({
-        "id": clip_id,
-        "clip_path": clip_path,
-        "caption_path": caption_path,
-        "creator": creator,
-        "video_id": video_id,
-        "moment_sec": moment_sec,
-        "platforms": platforms,
-        "status": "pending",
-        "edited": False,
-        "created_at": datetime.now().isoformat(timespec="seconds"),
-        "approved_at": None,
-        "posted_at": None,
-    })
-
-    _save_queue(queue)
     return True
 
 
-def update_clip_status(clip_id: str, status: str):
-    queue = _load_queue()
+def refresh_pending_clip(
+    clip_id: str,
+    clip_path: str,
+    deferred_render: dict = None,
+    variants: dict = None,
+    crop: dict = None,
+    moment_sec: int = None,
+):
+    """
+    Clip encore "pending" re-rendu (réglages modifiés) : rendu mis à
+    jour, statut / caption / dates inchangés. Clip relu → intouché
+    Miniature gardée tant que cadrage / fichier / moment sont les mêmes
+    """
+    with _locked_queue() as queue:
+        for clip in queue["clips"]:
+            if clip["id"] == clip_id:
+                if clip["status"] != "pending":
+                    return False
 
-    for clip in queue["clips"]:
-        if clip["id"] == clip_id:
-            clip["status"] = status
+                framing_changed = (
+                    clip.get("crop") != crop
+                    or clip.get("clip_path") != clip_path
+                    or (moment_sec is not None and clip.get("moment_sec") != moment_sec)
+                )
 
-            if status == "approved":
-                clip["approved_at"] = datetime.now().isoformat(timespec="seconds")
-            if status == "posted":
-                clip["posted_at"] = datetime.now().isoformat(timespec="seconds")
+                clip["clip_path"] = clip_path
+                clip["render_status"] = "deferred" if deferred_render else "final"
+                clip["deferred_render"] = deferred_render
+                clip["variants"] = variants or {}
+                clip["crop"] = crop
+                if moment_sec is not None:
+                    clip["moment_sec"] = moment_sec
 
-            _save_queue(queue)
-            return True
+                # cadrage / moment modifié → miniature à refaire
+                if framing_changed:
+                    if clip.get("thumbnail_path") and os.path.exists(clip["thumbnail_path"]):
+                        os.remove(clip["thumbnail_path"])
+                    clip.pop("thumbnail_path", None)
+                    clip.pop("thumbnail_sec", None)
+                return True
 
     return False
 
 
-def mark_caption_edited(clip_id: str):
-    queue = _load_queue()
+def update_clip_status(clip_id: str, status: str):
+    with _locked_queue() as queue:
+        for clip in queue["clips"]:
+            if clip["id"] == clip_id:
+                clip["status"] = status
+
+                if status == "approved":
+                    clip["approved_at"] = datetime.now().isoformat(timespec="seconds")
+                if status == "posted":
+                    clip["posted_at"] = datetime.now().isoformat(timespec="seconds")
+
+                return True
+
+    return False
+
 
-    for clip in queue["clips"]:
-        if clip["id"] == clip_id:
-            clip["edited"] = True
-            _save_queue(queue)
-            return True
+def mark_caption_edited(clip_id: str):
+    with _locked_queue() as queue:
+        for clip in queue["clips"]:
+            if clip["id"] == clip_id:
+                clip["edited"] = True
+                return True
 
     return False
 
@@ -101,3 +230,77 @@ def mark_caption_edited(clip_id: str):
 def get_clips_by_status(status: str):
     queue = _load_queue()
     return [c for c in queue["clips"] if c["status"] == status]
+
+
+# ==================================================
+# RENDUS FINAUX DIFFÉRÉS
+# ==================================================
+
+def get_clips_awaiting_render():
+    """
+    Clips approuvés dont seul l'aperçu existe
+    (+ rendus échoués, retentés jusqu'à RENDER_MAX_ATTEMPTS)
+    """
+    queue = _load_queue()
+    return [
+        c for c in queue["clips"]
+        if c.get("status") == "approved"
+        and (
+            c.get("render_status") == "deferred"
+            or (
+                c.get("render_status") == "failed"
+                and c.get("render_attempts", 0) < RENDER_MAX_ATTEMPTS
+            )
+        )
+    ]
+
+
+def mark_clip_rendered(
+    clip_id: str,
+    clip_path: str,
+    ok: bool = True,
+    variants: dict = None,
+    error: str = None
+):
+    """
+    Rendu final terminé : clip_path pointe sur le MP4 complet
+    (l'aperçu reste accessible via proxy_path)
+    Échec : compté, le clip repasse au prochain tour du worker
+    """
+    with _locked_queue() as queue:
+        for clip in queue["clips"]:
+            if clip["id"] == clip_id:
+                if ok:
+                    clip["proxy_path"] = clip["clip_path"]
+                    clip["clip_path"] = clip_path
+                    clip["render_status"] = "final"
+                    clip["variants"] = variants or {}
+                    clip["rendered_at"] = datetime.now().isoformat(timespec="seconds")
+                    clip.pop("render_error", None)
+                else:
+                    clip["render_status"] = "failed"
+                    clip["render_attempts"] = clip.get("render_attempts", 0) + 1
+                    clip["render_error"] = (error or "")[-500:]
+
+                return True
+
+    return False
+
+
+# ==================================================
+# MINIATURES
+# ==================================================
+
+def set_clip_thumbnails(thumbnails: dict):
+    """
+    thumbnails : {clip_id: {"path", "time_sec", ...}} (une seule écriture)
+    """
+    if not thumbnails:
+        return
+
+    with _locked_queue() as queue:
+        for clip in queue["clips"]:
+            thumb = thumbnails.get(clip["id"])
+            if thumb:
+                clip["thumbnail_path"] = thumb["path"]
+                clip["thumbnail_sec"] = thumb["time_sec"]
@@ -0,0 +1,236 @@
+# analysis/render_cache.py
+# --------------------------------------------------
+# Cache d'artefacts adressé par contenu (audio clip, SRT, ASS, MP4 final)
+# - Clé = hash (identité source, bornes, filtres, encodage, contenu sous-titres)
+# - Artefacts : storage/render_cache/<kind>/<clé>.<ext>
+# - Index JSON : storage/render_cache/index.json (main.py et
+#   render_worker.py y écrivent : relu et fusionné sous verrou fichier)
+# - Chaque étape a sa propre clé : un changement n'invalide
+#   que les étapes qui en dépendent vraiment
+# --------------------------------------------------
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from analysis.audio_feature_cache import source_identity
+
+CACHE_DIR = os.path.join("storage", "render_cache")
+INDEX_PATH = os.path.join(CACHE_DIR, "index.json")
+LOCK_PATH = INDEX_PATH + ".lock"
+
+LOCK_TIMEOUT_SEC = 30     # attente max du verrou
+LOCK_STALE_SEC = 120      # verrou plus vieux = process mort, repris
+
+_index_lock = threading.RLock()
+_index = None
+_index_mtime = None
+
+
+# ==================================================
+# CLÉS
+# ==================================================
+
+def source_fingerprint(video_path: str) -> dict:
+    """
+    Identité de la vidéo source (nom + taille + mtime, sans lire le contenu)
+    """
+    return {
+        "name": os.path.basename(video_path),
+        **source_identity(video_path),
+    }
+
+
+def file_digest(path: str) -> str:
+    """
+    Hash du contenu d'un petit fichier (SRT / ASS)
+    """
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def artifact_key(kind: str, params: dict) -> str:
+    raw = json.dumps({"kind": kind, "params": params}, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+# ==================================================
+# INDEX
+# ==================================================
+
+@contextmanager
+def index_lock():
+    """
+    Verrou inter-process de l'index (fichier .lock créé en exclusif)
+    À tenir pendant tout relecture → fusion → écriture
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    deadline = time.monotonic() + LOCK_TIMEOUT_SEC
+
+    while True:
+        try:
+            fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(LOCK_PATH) > LOCK_STALE_SEC:
+                    os.remove(LOCK_PATH)
+                    continue
+            except OSError:
+                continue  # libéré entre-temps
+
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Index verrouillé depuis plus de {LOCK_TIMEOUT_SEC}s : {LOCK_PATH}")
+            time.sleep(0.05)
+
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(LOCK_PATH)
+        except OSError:
+            pass
+
+
+def _load_index(force: bool = False) -> dict:
+    """
+    Index tel qu'il est sur le disque (relu s'il a changé : un autre
+    process a pu y ranger des artefacts ; force : relu dans tous les cas)
+    """
+    global _index, _index_mtime
+
+    with _index_lock:
+        try:
+            mtime = os.stat(INDEX_PATH).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if force or _index is None or mtime != _index_mtime:
+            try:
+                with open(INDEX_PATH, "r", encoding="utf-8") as f:
+                    _index = json.load(f)
+            except (OSError, ValueError):
+                _index = {}
+            _index_mtime = mtime
+
+        return _index
+
+
+@contextmanager
+def _locked_index():
+    """
+    Index relu sous verrou (entrées des autres process incluses),
+    réécrit à la sortie du bloc (pas d'écriture si le bloc lève)
+    """
+    global _index_mtime
+
+    with _index_lock, index_lock():
+        index = _load_index(force=True)
+        yield index
+
+        # écriture atomique : l'index n'est jamais à moitié écrit
+        tmp_path = INDEX_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, INDEX_PATH)
+        _index_mtime = os.stat(INDEX_PATH).st_mtime_ns
+
+
+def artifact_path(kind: str, key: str, ext: str) -> str:
+    return os.path.join(CACHE_DIR, kind, f"{key}{ext}")
+
+
+# ==================================================
+# LECTURE / ÉCRITURE
+# ==================================================
+
+def lookup_artifact(kind: str, params: dict):
+    """
+    Chemin de l'artefact en cache, ou None
+    (lecture seule : une entrée dont le fichier a disparu est
+    simplement ignorée, puis remplacée au prochain store_artifact)
+    """
+    key = artifact_key(kind, params)
+
+    with _index_lock:
+        entry = _load_index().get(key)
+
+    if entry is None or not os.path.exists(entry["path"]):
+        return None
+    return entry["path"]
+
+
+def store_artifact(kind: str, params: dict, src_path: str, ext: str = None) -> str:
+    """
+    Range src_path dans le cache (lien dur, sinon copie)
+    Retourne le chemin de l'artefact en cache
+    """
+    key = artifact_key(kind, params)
+    path = artifact_path(kind, key, ext or os.path.splitext(src_path)[1])
+
+    _link_or_copy(src_path, path)
+
+    with _locked_index() as index:
+        index[key] = {
+            "kind": kind,
+            "path": path,
+            "params": params,
+            "size": os.path.getsize(path),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    return path
+
+
+def cached_artifact(kind: str, params: dict, ext: str, produce) -> tuple:
+    """
+    Sert l'artefact depuis le cache, sinon produce(chemin) le crée
+    directement dans le cache
+    Retourne (chemin en cache, hit)
+    """
+    cached = lookup_artifact(kind, params)
+    if cached is not None:
+        return cached, True
+
+    key = artifact_key(kind, params)
+    path = artifact_path(kind, key, ext)
+    tmp_path = path[:-len(ext)] + ".tmp" + ext
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    produce(tmp_path)
+    os.replace(tmp_path, path)
+
+    return store_artifact(kind, params, path, ext), False
+
+
+def materialize(cached_path: str, dest_path: str) -> str:
+    """
+    Expose un artefact du cache sous son nom "lisible" (sans ffmpeg)
+    """
+    _link_or_copy(cached_path, dest_path)
+    return dest_path
+
+
+def _link_or_copy(src_path: str, dest_path: str):
+    if os.path.exists(dest_path):
+        if os.path.samefile(src_path, dest_path):
+            return
+        os.remove(dest_path)
+
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+
+    try:
+        os.link(src_path, dest_path)
+    except OSError:
+        # autre disque / FS sans liens durs
+        shutil.copy2(src_path, dest_path)
@@ -0,0 +1,112 @@
+# analysis/render_profiles.py
+# --------------------------------------------------
+# Profils de rendu nommés (résolution 9:16 + options d'encodage)
+# - "final" / "proxy" : profils de base
+# - Profils mesurés (quality / balanced / fast, ...) écrits par
+#   tools/bench_encoder_presets.py dans storage/render_profiles.json
+# - Sélection par nom dans tous les renderers
+# --------------------------------------------------
+
+import json
+import os
+
+PROFILES_PATH = os.path.join("storage", "render_profiles.json")
+
+# 🎥 VIDÉO SAFE TIKTOK (rendu final en un seul encodage)
+FINAL_ENCODE_ARGS = [
+    "-c:v", "libx264",
+    "-preset", "fast",
+    "-crf", "18",
+    "-profile:v", "high",
+    "-level", "4.0",
+    "-pix_fmt", "yuv420p",
+    "-r", "30",
+    "-g", "60",
+
+    "-c:a", "aac",
+    "-b:a", "128k",
+
+    "-movflags", "+faststart",
+]
+
+# 👀 APERÇU DE VALIDATION (bot Telegram) : basse déf, encodage quasi gratuit
+PROXY_ENCODE_ARGS = [
+    "-c:v", "libx264",
+    "-preset", "ultrafast",
+    "-crf", "30",
+    "-pix_fmt", "yuv420p",
+
+    "-c:a", "aac",
+    "-b:a", "64k",
+
+    "-movflags", "+faststart",
+]
+
+# profil de rendu → résolution de sortie + options d'encodage
+BASE_PROFILES = {
+    "final": {"size": "1080:1920", "encode": FINAL_ENCODE_ARGS},
+    "proxy": {"size": "540:960", "encode": PROXY_ENCODE_ARGS},
+}
+
+
+# ==================================================
+# OPTIONS x264
+# ==================================================
+
+def with_x264_settings(base_args: list, preset: str, crf: int) -> list:
+    """
+    Copie des options d'encodage avec -preset / -crf remplacés
+    """
+    args = list(base_args)
+
+    for flag, value in (("-preset", preset), ("-crf", str(crf))):
+        if flag in args:
+            args[args.index(flag) + 1] = value
+        else:
+            args[2:2] = [flag, value]  # juste après -c:v libx264
+
+    return args
+
+
+# ==================================================
+# PROFILS MESURÉS (JSON)
+# ==================================================
+
+def load_tuned_profiles() -> dict:
+    if not os.path.exists(PROFILES_PATH):
+        return {}
+
+    try:
+        with open(PROFILES_PATH, "r", encoding="utf-8") as f:
+            return json.load(f).get("profiles", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_tuned_profiles(profiles: dict, results: list = None):
+    """
+    profiles : {nom: {"size", "encode", "measured"}}
+    results  : mesures brutes du benchmark (gardées pour référence)
+    """
+    os.makedirs(os.path.dirname(PROFILES_PATH), exist_ok=True)
+
+    with open(PROFILES_PATH, "w", encoding="utf-8") as f:
+        json.dump(
+            {"profiles": profiles, "results": results or []},
+            f,
+            indent=2,
+            ensure_ascii=False
+        )
+
+
+# les profils de base gardent la priorité (clés du cache stables)
+RENDER_PROFILES = {**load_tuned_profiles(), **BASE_PROFILES}
+
+
+def get_profile(name: str) -> dict:
+    if name not in RENDER_PROFILES:
+        raise KeyError(
+            f"Profil de rendu inconnu : {name} "
+            f"(disponibles : {', '.join(sorted(RENDER_PROFILES))})"
+        )
+    return RENDER_PROFILES[name]
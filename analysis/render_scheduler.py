@@ -0,0 +1,189 @@
+# analysis/render_scheduler.py
+# --------------------------------------------------
+# Ordonnanceur de rendus ffmpeg (crop, burn, export)
+# - Jobs de toutes les vidéos d'un scan, exécutés en parallèle
+# - Budget de cœurs configurable : -threads par job pour que
+#   (jobs simultanés × threads) = cœurs de la machine
+#   (build répartit ce budget entre les sorties d'un job groupé)
+# - Profondeur de queue + temps par job exposés
+# --------------------------------------------------
+
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis.ffmpeg_runner import FFmpegError, FFmpegTimeout, run_ffmpeg
+
+
+# ==================================================
+# CONFIGURATION
+# ==================================================
+
+DEFAULT_THREADS_PER_JOB = 2   # libx264 passe mal à l'échelle au-delà sur des clips courts
+DEFAULT_JOB_TIMEOUT_SEC = 2 * 3600   # filet de sécurité : un encodage bloqué libère son slot
+
+
+class RenderScheduler:
+    """
+    Exécute des commandes ffmpeg en parallèle dans un budget de cœurs
+
+    submit(name, build) : build(threads) -> arguments ffmpeg (sans binaire)
+                          threads = budget du job ENTIER (toutes sorties)
+    wait()              : attend tous les jobs, retourne leurs résultats
+    cancel()            : annule les jobs en cours / en attente
+    """
+
+    def __init__(self, core_budget: int = None, threads_per_job: int = None):
+        self.core_budget = max(1, core_budget or os.cpu_count() or 1)
+        self.threads_per_job = max(1, min(
+            threads_per_job or DEFAULT_THREADS_PER_JOB,
+            self.core_budget
+        ))
+        self.max_parallel = max(1, self.core_budget // self.threads_per_job)
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_parallel)
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._futures = []
+        self._queued = 0
+        self._running = 0
+        self.results = []
+
+    # ==================================================
+    # SOUMISSION
+    # ==================================================
+
+    def submit(
+        self,
+        name: str,
+        build,
+        payload=None,
+        stage: str = "render",
+        timeout: float = DEFAULT_JOB_TIMEOUT_SEC
+    ):
+        """
+        Ajoute un job à la queue (retour immédiat)
+        payload : données libres rendues avec le résultat (ex: clips du groupe)
+        timeout : durée max du job (secondes), ffmpeg tué au-delà
+                  (clips : render_timeout(groupe), proportionnel à la durée)
+        """
+        submitted_at = time.perf_counter()
+
+        with self._lock:
+            self._queued += 1
+
+        future = self._pool.submit(
+            self._run, name, build, payload, stage, timeout, submitted_at
+        )
+        self._futures.append(future)
+        return future
+
+    def _run(self, name: str, build, payload, stage: str, timeout, submitted_at: float) -> dict:
+        started_at = time.perf_counter()
+
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+
+        ok = True
+        error = None
+        progress = {}
+
+        try:
+            progress = run_ffmpeg(
+                build(self.threads_per_job),
+                name=name,
+                stage=stage,
+                timeout=timeout,
+                cancel_event=self._cancel
+            )
+        except FFmpegTimeout as e:
+            ok = False
+            error = f"ffmpeg tué après {timeout:.0f}s (timeout)\n" + (e.stderr or "")
+        except FFmpegError as e:
+            ok = False
+            error = str(e) + "\n" + (e.stderr or "")
+        except OSError as e:
+            ok = False
+            error = str(e)
+        except Exception:
+            # erreur de build() ou autre : le job échoue, pas wait()
+            ok = False
+            error = traceback.format_exc()
+
+        finished_at = time.perf_counter()
+
+        result = {
+            "name": name,
+            "ok": ok,
+            "error": error,
+            "threads": self.threads_per_job,
+            "wait_sec": round(started_at - submitted_at, 2),
+            "run_sec": round(finished_at - started_at, 2),
+            "cpu_sec": progress.get("cpu_sec"),
+            "fps": progress.get("fps"),
+            "speed": progress.get("speed"),
+            "payload": payload,
+        }
+
+        with self._lock:
+            self._running -= 1
+            self.results.append(result)
+
+        print(
+            f"[RENDER] {'✅' if ok else '❌'} {name} "
+            f"({result['run_sec']}s, attente {result['wait_sec']}s) "
+            f"| queue={self.queue_depth()}"
+        )
+
+        return result
+
+    # ==================================================
+    # ÉTAT
+    # ==================================================
+
+    def queue_depth(self) -> int:
+        """
+        Nombre de jobs soumis pas encore démarrés
+        """
+        with self._lock:
+            return self._queued
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = list(self.results)
+            running = self._running
+            queued = self._queued
+
+        return {
+            "queued": queued,
+            "running": running,
+            "done": len(done),
+            "failed": sum(1 for r in done if not r["ok"]),
+            "max_parallel": self.max_parallel,
+            "threads_per_job": self.threads_per_job,
+            "render_sec": round(sum(r["run_sec"] for r in done), 2),
+        }
+
+    def wait(self) -> list:
+        """
+        Attend la fin de tous les jobs soumis et retourne leurs résultats
+        """
+        for future in list(self._futures):
+            future.result()
+        self._futures.clear()
+
+        with self._lock:
+            return list(self.results)
+
+    def cancel(self):
+        """
+        Tue les rendus en cours ; les jobs en attente échouent aussitôt
+        """
+        self._cancel.set()
+
+    def shutdown(self):
+        self.wait()
+        self._pool.shutdown(wait=True)
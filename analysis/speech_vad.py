@@ -0,0 +1,150 @@
+# analysis/speech_vad.py
+# --------------------------------------------------
+# Détection de parole (VAD) sans IA, avant Whisper
+# - Trames de 30 ms : énergie RMS + taux de passage par zéro (ZCR)
+# - Plancher de bruit estimé sur l'enveloppe RMS déjà en cache
+# - Plages de parole lissées (trous courts comblés, bribes ignorées)
+# - Plages concaténées → un seul appel modèle, puis timestamps
+#   recalés sur la source via la table de correspondance
+# --------------------------------------------------
+
+import numpy as np
+
+VAD_FRAME_SEC = 0.03
+VAD_NOISE_PERCENTILE = 20    # plancher de bruit = 20e percentile de l'enveloppe
+VAD_ENERGY_RATIO = 2.0       # parole : RMS > 2 × plancher
+VAD_MIN_RMS = 100            # plancher absolu (int16) : silence numérique
+VAD_ZCR_MAX = 0.4            # au-delà : bruit large bande (souffle, cymbales)
+
+VAD_MERGE_GAP_SEC = 0.5      # pauses plus courtes : même plage
+VAD_MIN_SPEECH_SEC = 0.25    # plages plus courtes : ignorées
+VAD_PAD_SEC = 0.2            # marge autour de chaque plage (attaques / fins de mots)
+
+SPAN_GAP_SEC = 0.3           # silence inséré entre deux plages concaténées
+
+
+# ==================================================
+# FEATURES PAR TRAME
+# ==================================================
+
+def frame_features(samples: np.ndarray, sample_rate: int) -> tuple:
+    """
+    (rms, zcr) par trame de VAD_FRAME_SEC (dernière trame partielle ignorée)
+    """
+    frame_size = int(sample_rate * VAD_FRAME_SEC)
+    n_frames = samples.size // frame_size
+    if n_frames == 0:
+        return np.zeros(0), np.zeros(0)
+
+    frames = samples[:n_frames * frame_size].reshape(n_frames, frame_size).astype(np.float32)
+
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_size - 1)
+
+    return rms, zcr
+
+
+def noise_floor(envelope: np.ndarray) -> float:
+    """
+    Plancher de bruit de la source depuis son enveloppe RMS
+    """
+    if envelope is None or len(envelope) == 0:
+        return 0.0
+    return float(np.percentile(envelope, VAD_NOISE_PERCENTILE))
+
+
+# ==================================================
+# PLAGES DE PAROLE
+# ==================================================
+
+def speech_spans(samples: np.ndarray, sample_rate: int, floor: float = None) -> list:
+    """
+    Plages de parole [[start_sec, end_sec], ...] relatives au début de samples
+    floor : plancher de bruit de la source (sinon estimé sur l'extrait)
+    """
+    rms, zcr = frame_features(samples, sample_rate)
+    if rms.size == 0:
+        return []
+
+    if not floor:
+        floor = float(np.percentile(rms, VAD_NOISE_PERCENTILE))
+
+    threshold = max(floor * VAD_ENERGY_RATIO, VAD_MIN_RMS)
+    speech = (rms >= threshold) & (zcr <= VAD_ZCR_MAX)
+
+    # trames de parole → plages (front montant / descendant)
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * VAD_FRAME_SEC
+    ends = np.flatnonzero(edges == -1) * VAD_FRAME_SEC
+
+    spans = []
+    for start, end in zip(starts, ends):
+        if spans and start - spans[-1][1] <= VAD_MERGE_GAP_SEC:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+
+    total_sec = samples.size / sample_rate
+    padded = []
+
+    for start, end in spans:
+        if end - start < VAD_MIN_SPEECH_SEC:
+            continue
+
+        start = max(0.0, start - VAD_PAD_SEC)
+        end = min(total_sec, end + VAD_PAD_SEC)
+
+        if padded and start <= padded[-1][1]:
+            padded[-1][1] = end
+        else:
+            padded.append([start, end])
+
+    return [[round(float(s), 3), round(float(e), 3)] for s, e in padded]
+
+
+# ==================================================
+# CONCATÉNATION + CORRESPONDANCE DES TEMPS
+# ==================================================
+
+def concat_spans(samples: np.ndarray, spans: list, sample_rate: int) -> tuple:
+    """
+    Audio float32 [-1, 1] des seules plages de parole, séparées par
+    SPAN_GAP_SEC de silence, + table [(début_concat, début_source, durée), ...]
+    """
+    gap = np.zeros(int(SPAN_GAP_SEC * sample_rate), dtype=np.float32)
+
+    pieces = []
+    timeline = []
+    cursor = 0.0
+
+    for start, end in spans:
+        piece = samples[int(start * sample_rate):int(end * sample_rate)].astype(np.float32) / 32768.0
+        if pieces:
+            pieces.append(gap)
+            cursor += SPAN_GAP_SEC
+
+        timeline.append((cursor, start, piece.size / sample_rate))
+        pieces.append(piece)
+        cursor += piece.size / sample_rate
+
+    audio = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    return audio, timeline
+
+
+def map_time(t: float, timeline: list) -> float:
+    """
+    Temps dans l'audio concaténé → temps dans l'extrait d'origine
+    (un temps tombé dans un silence inséré est ramené au bord de plage le plus proche)
+    """
+    for i, (concat_start, source_start, duration) in enumerate(timeline):
+        concat_end = concat_start + duration
+
+        if t <= concat_end or i == len(timeline) - 1:
+            return source_start + min(max(t - concat_start, 0.0), duration)
+
+        next_start = timeline[i + 1][0]
+        if t < next_start:
+            if t - concat_end <= next_start - t:
+                return source_start + duration
+            return timeline[i + 1][1]
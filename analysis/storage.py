@@ -29,3 +29,33 @@ def save_video(video_data):
         json.dump(videos, f, indent=2, ensure_ascii=False)
 
     return True
+
+
+# ==================================================
+# DONNÉES PAR CHAÎNE
+# ==================================================
+
+CHANNELS_PATH = os.path.join("data", "channels.json")
+
+
+def load_channels() -> dict:
+    if not os.path.exists(CHANNELS_PATH):
+        return {}
+
+    with open(CHANNELS_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_channel(channel_name: str, fields: dict):
+    """
+    Fusionne fields dans les données de la chaîne
+    """
+    channels = load_channels()
+    channels.setdefault(channel_name, {}).update(fields)
+
+    # écriture atomique : un arrêt en cours d'écriture ne corrompt pas le fichier
+    os.makedirs(os.path.dirname(CHANNELS_PATH), exist_ok=True)
+    tmp_path = CHANNELS_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(channels, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, CHANNELS_PATH)
@@ -1,11 +1,9 @@
-import subprocess
-
-# ✅ FFmpeg préchargé (Windows-safe)
-FFMPEG = r"C:\buzz_detector\ffmpeg\bin\ffmpeg.exe"
+from analysis.ffmpeg_runner import run_ffmpeg
 
 
 def srt_to_ass(srt_path: str, ass_path: str):
-    subprocess.run(
-        [FFMPEG, "-y", "-i", srt_path, ass_path],
-        check=True
+    run_ffmpeg(
+        ["-y", "-i", srt_path, ass_path],
+        name=ass_path,
+        stage="subtitles"
     )
@@ -1,17 +1,245 @@
-import whisper
 import os
+import threading
+import time
 
-os.environ["PATH"] += os.pathsep + r"C:\buzz_detector\ffmpeg\bin"
+from analysis.ffmpeg_runner import ensure_ffmpeg_on_path
 
+# Whisper appelle "ffmpeg" directement : même binaire que le reste du pipeline
+ensure_ffmpeg_on_path()
 
-model = whisper.load_model("base")  # rapide + suffisant
 
+# ==================================================
+# RÉGLAGES DU MOTEUR DE TRANSCRIPTION
+# ==================================================
 
-def generate_subtitles(video_path: str, srt_path: str):
-    result = model.transcribe(video_path, fp16=False)
+# "openai-whisper" : implémentation PyTorch d'origine
+# "faster-whisper" : CTranslate2, int8 sur CPU (bien plus rapide sans GPU)
+TRANSCRIBE_BACKENDS = ("openai-whisper", "faster-whisper")
 
+TRANSCRIBER = {
+    "backend": "openai-whisper",
+    "model": "base",        # rapide + suffisant
+    "beam_size": 1,         # 1 = décodage glouton
+    "threads": os.cpu_count() or 1,
+}
+
+SAMPLE_RATE = 16000          # entrée attendue par les deux moteurs
+LANGUAGE_DETECT_SEC = 30     # extrait analysé pour détecter la langue
+
+# modèles chargés au premier usage (pas à l'import) puis gardés en mémoire
+_models = {}
+_model_lock = threading.Lock()
+
+
+def configure_transcriber(**settings):
+    """
+    Change backend / model / beam_size / threads (avant les transcriptions)
+    """
+    unknown = set(settings) - set(TRANSCRIBER)
+    if unknown:
+        raise KeyError(f"Réglage de transcription inconnu : {', '.join(sorted(unknown))}")
+
+    backend = settings.get("backend", TRANSCRIBER["backend"])
+    if backend not in TRANSCRIBE_BACKENDS:
+        raise KeyError(
+            f"Moteur de transcription inconnu : {backend} "
+            f"(disponibles : {', '.join(TRANSCRIBE_BACKENDS)})"
+        )
+
+    TRANSCRIBER.update(settings)
+
+
+def transcriber_id(settings: dict = None) -> str:
+    """
+    Identifiant du moteur (entre dans la clé des transcriptions stockées)
+    """
+    s = settings or TRANSCRIBER
+    compute = "int8" if s["backend"] == "faster-whisper" else "fp32"
+    return f"{s['backend']}/{s['model']}/{compute}/beam{s['beam_size']}"
+
+
+# ==================================================
+# BACKEND : OPENAI-WHISPER
+# ==================================================
+
+def _load_openai_whisper(settings: dict):
+    import torch
+    import whisper
+
+    torch.set_num_threads(settings["threads"])
+    return whisper.load_model(settings["model"], device="cpu")
+
+
+def _transcribe_openai_whisper(model, audio, settings: dict, word_timestamps: bool, language: str = None) -> dict:
+    import whisper
+
+    options = {"fp16": False, "word_timestamps": word_timestamps}
+    if settings["beam_size"] > 1:
+        options["beam_size"] = settings["beam_size"]
+
+    # détection explicite (même passe que celle de transcribe) pour
+    # récupérer la probabilité de la langue, absente du résultat
+    probability = None
+    if language is None:
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        language, probability = _detect_openai_whisper(model, audio, settings)
+
+    result = model.transcribe(audio, language=language, **options)
+    result["language_probability"] = probability
+    return result
+
+
+def _detect_openai_whisper(model, audio, settings: dict) -> tuple:
+    import whisper
+
+    if isinstance(audio, str):
+        audio = whisper.load_audio(audio)
+
+    excerpt = whisper.pad_or_trim(audio[:int(LANGUAGE_DETECT_SEC * SAMPLE_RATE)])
+    mel = whisper.log_mel_spectrogram(excerpt, model.dims.n_mels)
+    _, probs = model.detect_language(mel.to(model.device))
+    language = max(probs, key=probs.get)
+    return language, probs[language]
+
+
+# ==================================================
+# BACKEND : FASTER-WHISPER (CTRANSLATE2 INT8)
+# ==================================================
+
+def _load_faster_whisper(settings: dict):
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise ImportError("Moteur faster-whisper indisponible : pip install faster-whisper")
+
+    return WhisperModel(
+        settings["model"],
+        device="cpu",
+        compute_type="int8",
+        cpu_threads=settings["threads"]
+    )
+
+
+def _transcribe_faster_whisper(model, audio, settings: dict, word_timestamps: bool, language: str = None) -> dict:
+    """
+    Résultat converti au format openai-whisper (segments / words en dict)
+    """
+    segments, info = model.transcribe(
+        audio,
+        beam_size=settings["beam_size"],
+        word_timestamps=word_timestamps,
+        language=language
+    )
+
+    result_segments = []
+    for seg in segments:  # générateur : la transcription se fait ici
+        entry = {
+            "start": seg.start,
+            "end": seg.end,
+            "text": seg.text,
+            "avg_logprob": seg.avg_logprob,
+        }
+        if word_timestamps:
+            entry["words"] = [
+                {"start": w.start, "end": w.end, "word": w.word}
+                for w in seg.words or []
+            ]
+        result_segments.append(entry)
+
+    return {
+        "text": "".join(seg["text"] for seg in result_segments),
+        "segments": result_segments,
+        "language": info.language,
+        # langue imposée : pas de détection, pas de probabilité
+        "language_probability": None if language else info.language_probability,
+    }
+
+
+def _detect_faster_whisper(model, audio, settings: dict) -> tuple:
+    if isinstance(audio, str):
+        from faster_whisper import decode_audio
+        audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+
+    # la langue est détectée dès l'appel ; le générateur de segments
+    # n'est jamais parcouru → aucun décodage de texte
+    _, info = model.transcribe(
+        audio[:int(LANGUAGE_DETECT_SEC * SAMPLE_RATE)],
+        beam_size=settings["beam_size"]
+    )
+    return info.language, info.language_probability
+
+
+BACKENDS = {
+    "openai-whisper": (_load_openai_whisper, _transcribe_openai_whisper, _detect_openai_whisper),
+    "faster-whisper": (_load_faster_whisper, _transcribe_faster_whisper, _detect_faster_whisper),
+}
+
+
+# ==================================================
+# TRANSCRIPTION
+# ==================================================
+
+def get_model(settings: dict = None):
+    """
+    Modèle du moteur choisi, chargé une seule fois au premier appel
+    """
+    s = dict(settings or TRANSCRIBER)
+    key = (s["backend"], s["model"], s["threads"])
+
+    with _model_lock:
+        if key not in _models:
+            load, _, _ = BACKENDS[s["backend"]]
+
+            started = time.perf_counter()
+            _models[key] = load(s)
+            print(
+                f"🗣️ Modèle {s['backend']} '{s['model']}' chargé "
+                f"en {time.perf_counter() - started:.1f}s"
+            )
+
+    return _models[key]
+
+
+def transcribe_audio(
+    audio,
+    word_timestamps: bool = False,
+    settings: dict = None,
+    language: str = None
+) -> dict:
+    """
+    Transcription brute (format openai-whisper) :
+    {"text", "segments", "language", "language_probability"}
+    audio           : chemin d'un fichier, ou tableau float32 mono 16 kHz
+    word_timestamps : ajoute "words" (début / fin de chaque mot) aux segments
+    settings        : réglages ponctuels (défaut : TRANSCRIBER)
+    language        : langue imposée (ex: "fr"), sinon détectée par le modèle
+    """
+    s = dict(settings or TRANSCRIBER)
+    _, transcribe, _ = BACKENDS[s["backend"]]
+    return transcribe(get_model(s), audio, s, word_timestamps, language)
+
+
+def detect_language(audio, settings: dict = None) -> tuple:
+    """
+    Langue détectée sur les LANGUAGE_DETECT_SEC premières secondes :
+    (langue, probabilité), sans transcrire
+    audio    : chemin d'un fichier, ou tableau float32 mono 16 kHz
+    settings : réglages ponctuels (défaut : TRANSCRIBER)
+    """
+    s = dict(settings or TRANSCRIBER)
+    _, _, detect = BACKENDS[s["backend"]]
+    return detect(get_model(s), audio, s)
+
+
+def generate_subtitles(video_path: str, srt_path: str, settings: dict = None):
+    result = transcribe_audio(video_path, settings=settings)
+    write_srt(result["segments"], srt_path)
+
+
+def write_srt(segments: list, srt_path: str):
     with open(srt_path, "w", encoding="utf-8") as f:
-        for i, segment in enumerate(result["segments"], start=1):
+        for i, segment in enumerate(segments, start=1):
             start = segment["start"]
             end = segment["end"]
             text = segment["text"].strip()
@@ -0,0 +1,226 @@
+# analysis/thumbnails.py
+# --------------------------------------------------
+# Miniatures (couvertures) des clips en file de publication
+# - UN SEUL ffmpeg par vidéo source pour tous ses moments
+#   (une entrée -ss/-t par moment, fenêtre de ±1.5 s)
+# - Candidates à 4 img/s : JPEG 540x960 + version 90x160 en gris (PGM)
+# - Même cadrage que le clip (crop_x du crop_planner, sinon centré)
+# - Meilleure candidate = netteté (variance du laplacien) × luminosité
+# - Chemin stocké dans la queue (thumbnail_path) : bot / publishers
+#   n'ont plus à décoder la vidéo
+# --------------------------------------------------
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from analysis.clip_renderer import aspect_crop
+from analysis.ffmpeg_runner import FFmpegError, run_ffmpeg
+from analysis.publish_queue import get_clips_by_status, set_clip_thumbnails
+
+VIDEOS_DIR = os.path.join("storage", "videos")
+
+THUMB_WINDOW_SEC = 1.5       # candidates dans [moment - 1.5 s, moment + 1.5 s]
+CANDIDATE_FPS = 4
+THUMB_SIZE = "540:960"
+SCORE_SIZE = "90:160"        # version réduite pour le score
+JPEG_QUALITY = 3             # -q:v mjpeg (2 = meilleur, 31 = pire)
+
+BRIGHTNESS_TARGET = 130      # luminance moyenne idéale (0-255)
+
+
+# ==================================================
+# LECTURE PGM (SANS DÉPENDANCE IMAGE)
+# ==================================================
+
+def read_pgm(path: str) -> np.ndarray:
+    """
+    PGM binaire (P5) 8 bits écrit par ffmpeg → tableau (h, w) uint8
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # en-tête : "P5" largeur hauteur maxval, séparés par des blancs
+    fields = []
+    pos = 0
+    while len(fields) < 4:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        end = pos
+        while not data[end:end + 1].isspace():
+            end += 1
+        fields.append(data[pos:end])
+        pos = end
+    pos += 1
+
+    width, height = int(fields[1]), int(fields[2])
+    return np.frombuffer(data, dtype=np.uint8, count=width * height, offset=pos).reshape(height, width)
+
+
+# ==================================================
+# SCORE D'UNE CANDIDATE
+# ==================================================
+
+def frame_scores(frames: np.ndarray) -> np.ndarray:
+    """
+    Score (n,) de frames grises (n, h, w)
+    - netteté : variance du laplacien (flou de mouvement → faible)
+    - luminosité : pénalise les frames trop sombres / cramées
+    """
+    gray = frames.astype(np.float32)
+
+    laplacian = (
+        -4 * gray[:, 1:-1, 1:-1]
+        + gray[:, :-2, 1:-1] + gray[:, 2:, 1:-1]
+        + gray[:, 1:-1, :-2] + gray[:, 1:-1, 2:]
+    )
+    sharpness = laplacian.reshape(len(frames), -1).var(axis=1)
+
+    brightness = gray.reshape(len(frames), -1).mean(axis=1)
+    exposure = np.clip(1 - np.abs(brightness - BRIGHTNESS_TARGET) / BRIGHTNESS_TARGET, 0.05, 1)
+
+    return sharpness * exposure
+
+
+# ==================================================
+# EXTRACTION GROUPÉE (UN FFMPEG PAR SOURCE)
+# ==================================================
+
+def extract_thumbnails(video_path: str, moments: list, output_paths: list, crops: list = None) -> list:
+    """
+    Meilleure couverture autour de chaque moment, en un seul ffmpeg
+    moments      : [moment_sec, ...]
+    output_paths : [chemin .jpg, ...] (même ordre)
+    crops        : [{"x", "start_sec"} ou None, ...] cadrage du clip
+                   (expression x en temps du clip, qui débute à start_sec)
+    Retourne [{"path", "time_sec", "score"}, ...]
+    """
+    crops = crops or [None] * len(moments)
+
+    tmp_dir = tempfile.mkdtemp(prefix="thumbs_")
+
+    try:
+        cmd = ["-y"]
+        graph = []
+        outputs = []
+        starts = []
+
+        for i, (moment, crop) in enumerate(zip(moments, crops)):
+            start = max(0.0, moment - THUMB_WINDOW_SEC)
+            starts.append(start)
+            cmd += ["-ss", f"{start:.3f}", "-t", f"{2 * THUMB_WINDOW_SEC:.3f}", "-i", video_path]
+
+            # cadrage guidé : t recalé sur le temps du clip
+            if crop and crop.get("x"):
+                shift = f"setpts=PTS-STARTPTS+{start - crop['start_sec']:.3f}/TB,"
+                crop_filter = aspect_crop("9x16", crop["x"])
+            else:
+                shift = ""
+                crop_filter = aspect_crop("9x16")
+
+            graph.append(
+                f"[{i}:v]{shift}fps={CANDIDATE_FPS},{crop_filter},scale={THUMB_SIZE},split[c{i}][s{i}]"
+            )
+            graph.append(f"[s{i}]scale={SCORE_SIZE},format=gray[g{i}]")
+
+            outputs += [
+                "-map", f"[c{i}]", "-q:v", str(JPEG_QUALITY),
+                os.path.join(tmp_dir, f"m{i}_%03d.jpg"),
+                "-map", f"[g{i}]",
+                os.path.join(tmp_dir, f"m{i}_%03d.pgm"),
+            ]
+
+        cmd += ["-filter_complex", ";".join(graph), *outputs]
+        run_ffmpeg(cmd, name=video_path, stage="thumbnails")
+
+        results = []
+
+        for i, output_path in enumerate(output_paths):
+            names = sorted(n for n in os.listdir(tmp_dir) if n.startswith(f"m{i}_") and n.endswith(".pgm"))
+            if not names:
+                results.append(None)
+                continue
+
+            scores = frame_scores(np.stack([read_pgm(os.path.join(tmp_dir, n)) for n in names]))
+            best = int(np.argmax(scores))
+
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            shutil.move(os.path.join(tmp_dir, names[best][:-len(".pgm")] + ".jpg"), output_path)
+
+            results.append({
+                "path": output_path,
+                "time_sec": round(starts[i] + best / CANDIDATE_FPS, 2),
+                "score": round(float(scores[best]), 1),
+            })
+
+        return results
+
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# ==================================================
+# QUEUE DE PUBLICATION
+# ==================================================
+
+def source_video_path(clip: dict) -> str:
+    spec = clip.get("deferred_render") or {}
+    return spec.get("video_path") or os.path.join(VIDEOS_DIR, clip["video_id"], "video.mp4")
+
+
+def clip_crop(clip: dict):
+    """
+    Cadrage du clip : gardé dans la queue, sinon dans le rendu différé
+    """
+    if clip.get("crop"):
+        return clip["crop"]
+
+    spec = clip.get("deferred_render") or {}
+    if spec.get("crop_x"):
+        return {"x": spec["crop_x"], "start_sec": spec["start_sec"]}
+    return None
+
+
+def thumbnail_path(clip: dict) -> str:
+    return os.path.splitext(clip["caption_path"])[0] + "_cover.jpg"
+
+
+def generate_queue_thumbnails(status: str = "pending") -> int:
+    """
+    Couvertures de tous les clips de la queue qui n'en ont pas encore
+    (groupés par vidéo source : un ffmpeg par source)
+    Retourne le nombre de miniatures créées
+    """
+    by_source = {}
+
+    for clip in get_clips_by_status(status):
+        if clip.get("thumbnail_path") and os.path.exists(clip["thumbnail_path"]):
+            continue
+        by_source.setdefault(source_video_path(clip), []).append(clip)
+
+    thumbnails = {}
+
+    for video_path, clips in by_source.items():
+        if not os.path.exists(video_path):
+            print(f"⚠️ Source introuvable pour les miniatures : {video_path}")
+            continue
+
+        try:
+            results = extract_thumbnails(
+                video_path,
+                [c["moment_sec"] for c in clips],
+                [thumbnail_path(c) for c in clips],
+                [clip_crop(c) for c in clips]
+            )
+        except FFmpegError as e:
+            print(f"❌ Miniatures impossibles ({video_path}) : {e}")
+            continue
+
+        for clip, result in zip(clips, results):
+            if result:
+                thumbnails[clip["id"]] = result
+
+    set_clip_thumbnails(thumbnails)
+    return len(thumbnails)
@@ -0,0 +1,330 @@
+# analysis/transcript_store.py
+# --------------------------------------------------
+# Transcription par VIDÉO SOURCE (et non plus par clip)
+# - Union des fenêtres des moments retenus → Whisper UNE fois
+#   par zone (segments + timestamps des mots)
+# - Stockée à côté de la vidéo : storage/videos/<id>/transcript.json
+#   (seules les zones pas encore couvertes sont transcrites)
+# - Audio lu dans le PCM gardé par l'analyse audio (pas de redécodage)
+#   et filtré par VAD : seule la parole est envoyée au modèle
+# - SRT de chaque clip = découpe + recalage des temps, sans modèle
+# --------------------------------------------------
+
+import json
+import os
+
+import numpy as np
+
+from analysis.audio_feature_cache import PCM_SAMPLE_RATE, load_feature, load_pcm, source_identity
+from analysis.audio_moment_detector import AUDIO_SAMPLE_RATE, AUDIO_WINDOW_SEC, iter_pcm_chunks
+from analysis.language_profile import transcribe_for_channel
+from analysis.speech_vad import concat_spans, map_time, noise_floor, speech_spans
+from analysis.subtitles_generator import transcriber_id, write_srt
+
+TRANSCRIPT_FILENAME = "transcript.json"
+
+TRANSCRIPT_PAD_SEC = 1.0     # contexte autour des fenêtres (mots coupés aux bords)
+MERGE_GAP_SEC = 5.0          # fenêtres à moins de 5 s → une seule zone transcrite
+WORD_EDGE_TOLERANCE = 0.15   # mot à cheval sur un bord de clip : gardé si < 150 ms dépassent
+VAD_ENABLED = True           # seule la parole détectée part au modèle
+
+
+# ==================================================
+# INTERVALLES
+# ==================================================
+
+def merge_intervals(intervals: list, gap: float = 0.0) -> list:
+    """
+    Union d'intervalles [start, end] (fusion si écart <= gap)
+    """
+    merged = []
+
+    for start, end in sorted(intervals):
+        if merged and start - merged[-1][1] <= gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    return merged
+
+
+def subtract_intervals(intervals: list, covered: list) -> list:
+    """
+    Parties de intervals pas encore couvertes
+    """
+    missing = []
+
+    for start, end in intervals:
+        cursor = start
+        for c_start, c_end in covered:
+            if c_end <= cursor or c_start >= end:
+                continue
+            if c_start > cursor:
+                missing.append([cursor, c_start])
+            cursor = max(cursor, c_end)
+        if cursor < end:
+            missing.append([cursor, end])
+
+    return missing
+
+
+# ==================================================
+# STOCKAGE
+# ==================================================
+
+def transcript_path(video_path: str) -> str:
+    return os.path.join(os.path.dirname(video_path), TRANSCRIPT_FILENAME)
+
+
+def transcript_engine() -> str:
+    return transcriber_id() + ("+vad" if VAD_ENABLED else "")
+
+
+def load_transcript(video_path: str) -> dict:
+    """
+    Transcription stockée, ou vide si absente / source ou modèle différents
+    """
+    empty = {
+        "source": source_identity(video_path),
+        "model": transcript_engine(),
+        "covered": [],
+        "segments": [],
+    }
+
+    path = transcript_path(video_path)
+    if not os.path.exists(path):
+        return empty
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            transcript = json.load(f)
+    except (OSError, ValueError):
+        return empty
+
+    if transcript.get("source") != empty["source"] or transcript.get("model") != empty["model"]:
+        return empty
+
+    return transcript
+
+
+def save_transcript(video_path: str, transcript: dict):
+    path = transcript_path(video_path)
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(transcript, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# ==================================================
+# TRANSCRIPTION DES ZONES MANQUANTES
+# ==================================================
+
+def load_pcm_range(video_path: str, start: float, end: float) -> np.ndarray:
+    """
+    PCM int16 16 kHz d'une zone : lu dans le PCM gardé par l'analyse
+    audio, sinon décodé (plage seule, via le pipe ffmpeg)
+    """
+    pcm = load_pcm(video_path)
+    if pcm is not None:
+        return np.asarray(pcm[int(start * PCM_SAMPLE_RATE):int(end * PCM_SAMPLE_RATE)])
+
+    return np.concatenate(list(iter_pcm_chunks(
+        video_path,
+        sample_rate=PCM_SAMPLE_RATE,
+        start_sec=start,
+        duration_sec=end - start
+    )))
+
+
+def source_noise_floor(video_path: str) -> float:
+    """
+    Plancher de bruit depuis l'enveloppe RMS en cache (0 si absente)
+    """
+    envelope = None
+    if AUDIO_SAMPLE_RATE == PCM_SAMPLE_RATE:
+        envelope = load_feature(
+            video_path,
+            "energy",
+            {"sample_rate": AUDIO_SAMPLE_RATE, "window_sec": AUDIO_WINDOW_SEC}
+        )
+    return noise_floor(envelope)
+
+
+def _transcribe_range(video_path: str, start: float, end: float, floor: float, channel: str = None) -> list:
+    """
+    Segments (temps absolus dans la source) d'une zone de la vidéo
+    - VAD : seules les plages de parole sont transcrites (concaténées)
+    - Langue de la chaîne imposée si connue (pas de détection)
+    """
+    samples = load_pcm_range(video_path, start, end)
+    total_sec = samples.size / PCM_SAMPLE_RATE
+
+    if VAD_ENABLED:
+        spans = speech_spans(samples, PCM_SAMPLE_RATE, floor)
+    else:
+        spans = [[0.0, total_sec]]
+
+    speech_sec = sum(e - s for s, e in spans)
+    print(f"🗣️ Parole : {speech_sec:.1f}s / {total_sec:.1f}s envoyées au modèle")
+
+    if not spans:
+        return []
+
+    audio, timeline = concat_spans(samples, spans, PCM_SAMPLE_RATE)
+    result = transcribe_for_channel(
+        audio,
+        channel,
+        word_timestamps=True,
+        source=os.path.basename(os.path.dirname(video_path))
+    )
+
+    def to_source(t):
+        return round(start + map_time(t, timeline), 3)
+
+    segments = []
+    for seg in result["segments"]:
+        segments.append({
+            "start": to_source(seg["start"]),
+            "end": to_source(seg["end"]),
+            "text": seg["text"].strip(),
+            "words": [
+                {
+                    "start": to_source(w["start"]),
+                    "end": to_source(w["end"]),
+                    "word": w["word"],
+                }
+                for w in seg.get("words", [])
+            ],
+        })
+
+    return segments
+
+
+def clip_segments(segments: list, left: float, right: float) -> list:
+    """
+    Segments (temps absolus) ramenés à [left, right) au mot près :
+    un mot est gardé si son milieu tombe dans la plage
+    """
+    def inside(start, end):
+        return left <= (start + end) / 2 < right
+
+    clipped = []
+
+    for seg in segments:
+        if not seg.get("words"):
+            if inside(seg["start"], seg["end"]):
+                clipped.append(seg)
+            continue
+
+        words = [w for w in seg["words"] if inside(w["start"], w["end"])]
+        if not words:
+            continue
+
+        clipped.append({
+            "start": words[0]["start"],
+            "end": words[-1]["end"],
+            "text": "".join(w["word"] for w in words).strip(),
+            "words": words,
+        })
+
+    return clipped
+
+
+def ensure_transcript(video_path: str, windows: list, channel: str = None) -> dict:
+    """
+    Garantit que toutes les fenêtres [(start, end), ...] sont transcrites
+    - Whisper uniquement sur l'union des zones encore non couvertes
+    - channel : profil de langue de la chaîne (data/channels.json)
+    Retourne la transcription complète de la source
+    """
+    transcript = load_transcript(video_path)
+
+    wanted = merge_intervals(
+        [(max(0.0, s - TRANSCRIPT_PAD_SEC), e + TRANSCRIPT_PAD_SEC) for s, e in windows],
+        gap=MERGE_GAP_SEC
+    )
+    missing = subtract_intervals(wanted, transcript["covered"])
+
+    if not missing:
+        return transcript
+
+    floor = source_noise_floor(video_path)
+
+    for start, end in missing:
+        print(f"🗣️ Transcription source {start:.0f}s → {end:.0f}s")
+
+        # décodage élargi (contexte des mots aux bords de la zone)
+        new_segments = _transcribe_range(
+            video_path,
+            max(0.0, start - TRANSCRIPT_PAD_SEC),
+            end + TRANSCRIPT_PAD_SEC,
+            floor,
+            channel
+        )
+
+        # segments existants à cheval sur un bord : gardés, la zone
+        # nouvelle s'arrête à eux (pas de doublon, pas de trou)
+        left, right = start, end
+        for seg in transcript["segments"]:
+            if seg["start"] < start < seg["end"]:
+                left = max(left, seg["end"])
+            if seg["start"] < end < seg["end"]:
+                right = min(right, seg["start"])
+
+        transcript["segments"] = [
+            seg for seg in transcript["segments"]
+            if seg["end"] <= left or seg["start"] >= right
+        ] + clip_segments(new_segments, left, right)
+
+    transcript["segments"].sort(key=lambda seg: seg["start"])
+    transcript["covered"] = merge_intervals(transcript["covered"] + missing)
+    save_transcript(video_path, transcript)
+
+    return transcript
+
+
+# ==================================================
+# DÉCOUPE PAR CLIP
+# ==================================================
+
+def slice_segments(transcript: dict, clip_start: float, clip_end: float) -> list:
+    """
+    Segments du clip, temps recalés sur le début du clip
+    - Découpe au mot près quand les timestamps des mots sont connus
+    """
+    duration = clip_end - clip_start
+    sliced = []
+
+    for seg in transcript["segments"]:
+        if seg["end"] <= clip_start or seg["start"] >= clip_end:
+            continue
+
+        words = [
+            w for w in seg.get("words", [])
+            if w["start"] >= clip_start - WORD_EDGE_TOLERANCE
+            and w["end"] <= clip_end + WORD_EDGE_TOLERANCE
+        ]
+
+        if seg.get("words"):
+            if not words:
+                continue
+            start, end = words[0]["start"], words[-1]["end"]
+            text = "".join(w["word"] for w in words).strip()
+        else:
+            start, end, text = seg["start"], seg["end"], seg["text"]
+
+        sliced.append({
+            "start": round(min(max(start - clip_start, 0.0), duration), 3),
+            "end": round(min(max(end - clip_start, 0.0), duration), 3),
+            "text": text,
+        })
+
+    return sliced
+
+
+def write_clip_srt(transcript: dict, clip_start: float, clip_end: float, srt_path: str):
+    """
+    SRT d'un clip depuis la transcription de la source (aucun appel modèle)
+    """
+    write_srt(slice_segments(transcript, clip_start, clip_end), srt_path)
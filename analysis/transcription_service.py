@@ -0,0 +1,124 @@
+# analysis/transcription_service.py
+# --------------------------------------------------
+# Service de transcription en tâche de fond
+# - Un worker (thread dédié) alimenté par une queue
+# - Modèle Whisper chargé au PREMIER job puis gardé chaud
+#   (un scan sans buzz ne le charge jamais)
+# - submit() rend la main aussitôt : téléchargement, analyse audio
+#   et rendus continuent pendant la transcription
+# - Jobs traités un par un (le modèle n'est pas partagé entre threads)
+# --------------------------------------------------
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from analysis.transcript_store import ensure_transcript
+
+
+class TranscriptionService:
+    """
+    Transcrit les vidéos sources dans un thread dédié
+
+    submit(video_path, windows, channel) : Future -> transcription de la source
+    queue_depth()                        : jobs en attente
+    shutdown()                           : termine les jobs en file puis arrête le worker
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.results = []
+
+    # ==================================================
+    # SOUMISSION
+    # ==================================================
+
+    def submit(self, video_path: str, windows: list, channel: str = None) -> Future:
+        """
+        Ajoute une source à transcrire (retour immédiat)
+        windows : [(start_sec, end_sec), ...] des clips retenus
+        channel : chaîne de la vidéo (langue connue → pas de détection)
+        """
+        future = Future()
+        self._queue.put((video_path, windows, channel, future, time.perf_counter()))
+        self._ensure_worker()
+        return future
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop,
+                    name="transcription",
+                    daemon=True
+                )
+                self._thread.start()
+
+    # ==================================================
+    # WORKER
+    # ==================================================
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            video_path, windows, channel, future, submitted_at = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            started_at = time.perf_counter()
+            ok = True
+
+            try:
+                future.set_result(ensure_transcript(video_path, windows, channel))
+            except Exception as e:
+                ok = False
+                future.set_exception(e)
+
+            result = {
+                "name": video_path,
+                "ok": ok,
+                "wait_sec": round(started_at - submitted_at, 2),
+                "run_sec": round(time.perf_counter() - started_at, 2),
+            }
+
+            with self._lock:
+                self.results.append(result)
+
+            print(
+                f"[TRANSCRIPTION] {'✅' if ok else '❌'} {video_path} "
+                f"({result['run_sec']}s, attente {result['wait_sec']}s) "
+                f"| queue={self.queue_depth()}"
+            )
+
+    # ==================================================
+    # ÉTAT
+    # ==================================================
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = list(self.results)
+
+        return {
+            "queued": self.queue_depth(),
+            "done": len(done),
+            "failed": sum(1 for r in done if not r["ok"]),
+            "transcribe_sec": round(sum(r["run_sec"] for r in done), 2),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
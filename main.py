@@ -14,7 +14,12 @@
 import os
 import traceback
 
-from analysis.audio_moment_detector import detect_audio_moments
+from analysis.audio_moment_detector import (
+    AUDIO_WINDOW_SEC,
+    detect_audio_moments,
+    load_video_envelope
+)
+from analysis.energy_index import build_energy_index, optimize_clip_bounds
 from youtube.downloader import download_video_cached
 
 from youtube.collector import (
@@ -26,6 +31,7 @@ from youtube.collector import (
 from analysis.video_category import detect_video_category
 from analysis.storage import save_video, load_videos
 from analysis.buzz import (
+    iso_duration_to_seconds,
     compute_buzz_score,
     quality_label,
     channel_average_vph,
@@ -34,20 +40,31 @@ from analysis.buzz import (
 )
 
 # CLIPS
-from analysis.clip_generator import generate_vertical_clip
-from analysis.subtitles_generator import generate_subtitles
+from analysis.crop_planner import load_crop_plan
+from analysis.ffmpeg_runner import FFmpegError
 from analysis.subtitles_ass import srt_to_ass
-from analysis.clip_renderer import render_final_clip
-from analysis.moment_registry import (
-    is_moment_processed,
-    mark_moment_processed
+from analysis.subtitles_generator import configure_transcriber
+from analysis.clip_renderer import (
+    discard_outputs,
+    job_outputs,
+    plan_clip_renders,
+    render_timeout,
+    serve_cached_outputs,
+    store_outputs,
+    variant_entries
 )
+from analysis.render_scheduler import RenderScheduler
+from analysis.render_cache import cached_artifact, file_digest, materialize
+from analysis.transcript_store import write_clip_srt
+from analysis.transcription_service import TranscriptionService
+from analysis.moment_registry import is_moment_processed, mark_moment_processed
 
 # CAPTION RÉTENTION
 from analysis.caption_generator import generate_clip_caption_retention
 
 # 🆕 PUBLISH QUEUE
-from analysis.publish_queue import add_clip_to_queue
+from analysis.publish_queue import add_clip_to_queue, get_clip, refresh_pending_clip
+from analysis.thumbnails import generate_queue_thumbnails
 
 
 # ==================================================
@@ -62,7 +79,43 @@ CHANNELS = [
 
 MAX_VIDEOS_SCAN = 5
 TOP_VIDEOS = 10
-CLIP_PADDING_SEC = 25  # ±25s autour du moment fort
+CLIP_PADDING_SEC = 25  # ±25s autour du moment fort (bornes optimisées,
+                       # fin prolongée si la réaction dure : energy_index)
+# détection deux passes (4 kHz puis 16 kHz autour des candidats) :
+# désactivée tant que tools/bench_two_pass.py n'affiche pas un gain réel
+# avec un top N identique à la passe complète
+TWO_PASS_DETECTION = False
+# score multi-features (RMS + flux + onset + voix) sur les fenêtres à RMS
+# forte : ≈ 3-4x le calcul RMS seul (tools/bench_audio_descriptors.py),
+# PCM relu depuis le cache (pas de décodage en plus) ; ignoré en deux passes
+MULTI_FEATURE_DETECTION = True
+# 🧮 cœurs partagés : Whisper tourne PENDANT les rendus ffmpeg,
+# chacun a sa part (pas de sursouscription du CPU)
+CPU_BUDGET = os.cpu_count() or 1
+TRANSCRIBE_THREADS = max(1, CPU_BUDGET // 3)                     # threads Whisper
+RENDER_CORE_BUDGET = max(1, CPU_BUDGET - TRANSCRIBE_THREADS)     # cœurs des rendus ffmpeg
+# "proxy" : aperçu 540x960 ultrafast pour validation, rendu complet
+#           après approbation (render_worker.py)
+# "final" : rendu complet 1080x1920 directement
+RENDER_MODE = "proxy"
+# profil du rendu complet : "final" ou un profil mesuré par
+# tools/bench_encoder_presets.py ("quality", "balanced", "fast")
+FINAL_RENDER_PROFILE = "final"
+# formats exportés en plus du 9:16 (même décodage, rendu final seulement)
+EXPORT_ASPECTS = ["1x1", "4x5", "16x9"]
+SALIENT_CROP = True  # cadrage qui suit le sujet (sinon crop centré)
+# moteur de transcription : "openai-whisper" ou "faster-whisper" (int8 CPU),
+# à choisir avec tools/bench_transcription.py
+TRANSCRIBE_BACKEND = "openai-whisper"
+TRANSCRIBE_MODEL = "base"
+TRANSCRIBE_BEAM_SIZE = 1
+
+configure_transcriber(
+    backend=TRANSCRIBE_BACKEND,
+    model=TRANSCRIBE_MODEL,
+    beam_size=TRANSCRIBE_BEAM_SIZE,
+    threads=TRANSCRIBE_THREADS
+)
 
 
 # ==================================================
@@ -110,6 +163,227 @@ def compute_clip_score(intensity: float, moment_sec: int, verdict_label: str) ->
     return round(score, 2)
 
 
+# ==================================================
+# MOMENTS DÉJÀ TRAITÉS
+# ==================================================
+
+def moment_needs_clip(video_id: str, ts: int) -> bool:
+    """
+    Registre = porte d'entrée des clips :
+    - moment nouveau → clip créé
+    - moment déjà traité (fenêtre de 10 s) → seul SON clip encore
+      "pending" repasse dans le pipeline (le cache décide s'il faut
+      re-rendre) ; clip relu / publié ou quasi-doublon → ignoré
+    """
+    if not is_moment_processed(video_id, ts):
+        return True
+
+    queued = get_clip(f"{video_id}_{ts}_tiktok")
+    return queued is not None and queued["status"] == "pending"
+
+
+# ==================================================
+# SOUS-TITRES D'UN CLIP (DÉCOUPE DE LA TRANSCRIPTION)
+# ==================================================
+
+def prepare_clip_subtitles(
+    transcript: dict,
+    clip_start: int,
+    clip_end: int,
+    srt_path: str,
+    ass_path: str
+) -> str:
+    """
+    SRT découpé dans la transcription de la source (aucun appel Whisper)
+    → ASS servi depuis le cache si le SRT n'a pas changé
+    Retourne le hash du contenu de l'ASS (entre dans la clé du rendu final)
+    """
+    write_clip_srt(transcript, clip_start, clip_end, srt_path)
+
+    ass_cached, _ = cached_artifact(
+        "ass",
+        {"srt": file_digest(srt_path), "converter": "ffmpeg"},
+        ".ass",
+        lambda p: srt_to_ass(srt_path, p)
+    )
+    materialize(ass_cached, ass_path)
+
+    return file_digest(ass_cached)
+
+
+def read_subtitles(ass_path: str) -> str:
+    with open(ass_path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def export_variant_paths(final_mp4: str) -> dict:
+    """
+    Chemins des déclinaisons d'un clip final (…_1x1.mp4, …_16x9.mp4)
+    """
+    return {
+        aspect: final_mp4.replace("_tiktok.mp4", f"_{aspect}.mp4")
+        for aspect in EXPORT_ASPECTS
+    }
+
+
+# ==================================================
+# FINALISATION D'UN CLIP RENDU
+# ==================================================
+
+def finalize_clip(job: dict):
+    """
+    Caption + registre + publish queue d'un clip prêt
+    (rendu réussi ou servi depuis le cache)
+    (appelé dans le thread principal : pas d'écriture JSON concurrente)
+    """
+    m = job["moment"]
+    ts = m["moment_sec"]
+
+    # 🗃️ nouveau rendu → rangé dans le cache
+    if not job.get("from_cache"):
+        store_outputs(job)
+
+    # 👀 aperçu : de quoi lancer le rendu final une fois le clip approuvé
+    deferred_render = None
+    variants = None
+    if job["profile"] != "proxy":
+        variants = variant_entries(job_outputs(job))
+    else:
+        deferred_render = {
+            "video_path": job["video_path"],
+            "start_sec": job["start_sec"],
+            "end_sec": job["end_sec"],
+            "ass_path": job["ass_path"],
+            "subtitles_digest": job["subtitles_digest"],
+            # contenu gardé : l'ASS du disque peut être régénéré d'ici l'approbation
+            "ass_text": read_subtitles(job["ass_path"]),
+            "crop_x": job.get("crop_x"),
+            "output_path": job["final_path"],
+            "profile": FINAL_RENDER_PROFILE,
+            "variants": export_variant_paths(job["final_path"]),
+        }
+
+    # caption existante conservée (peut avoir été éditée à la main)
+    if not os.path.exists(job["caption_path"]):
+        caption_text = generate_clip_caption_retention(
+            verdict_label=job["verdict_label"],
+            category=job["category"],
+            intensity=m["intensity"],
+            clip_score=m["clip_score"],
+        )
+
+        with open(job["caption_path"], "w", encoding="utf-8") as f:
+            f.write(caption_text)
+
+    mark_moment_processed(job["video_id"], ts, platform="tiktok")
+
+    clip_id = f"{job['video_id']}_{ts}_tiktok"
+
+    # 🎯 cadrage guidé gardé pour les miniatures (même recadrage que le clip)
+    crop = None
+    if job.get("crop_x"):
+        crop = {"x": job["crop_x"], "start_sec": job["start_sec"]}
+
+    added = add_clip_to_queue(
+        clip_id=clip_id,
+        clip_path=job["output_path"],
+        caption_path=job["caption_path"],
+        creator=job["creator"],
+        video_id=job["video_id"],
+        moment_sec=ts,
+        platforms=["tiktok", "snap"],
+        deferred_render=deferred_render,
+        variants=variants,
+        crop=crop
+    )
+
+    # clip déjà en attente de relecture : son rendu est mis à jour
+    if not added:
+        refresh_pending_clip(
+            clip_id,
+            job["output_path"],
+            deferred_render,
+            variants,
+            crop,
+            moment_sec=ts
+        )
+
+    print(f"🔥 Clip + caption TikTok prêts : {job['output_path']}")
+
+
+def submit_transcribed_renders(pending: list, scheduler: RenderScheduler, wait: bool = False) -> list:
+    """
+    Sous-titres + rendus des vidéos dont la transcription est terminée
+    pending : [{"video_id", "video_path", "future", "jobs"}, ...]
+    wait    : attend toutes les transcriptions (fin de scan)
+    Retourne les vidéos encore en cours de transcription
+    """
+    still_pending = []
+
+    for entry in pending:
+        if not wait and not entry["future"].done():
+            still_pending.append(entry)
+            continue
+
+        video_id = entry["video_id"]
+
+        try:
+            transcript = entry["future"].result()
+        except Exception:
+            print(f"❌ ERREUR TRANSCRIPTION : {video_id}")
+            traceback.print_exc()
+            continue
+
+        render_jobs = []
+
+        for job in entry["jobs"]:
+            try:
+                # ✂️ transcription de la source → SRT → ASS (temps relatifs au clip)
+                job["subtitles_digest"] = prepare_clip_subtitles(
+                    transcript,
+                    job["start_sec"],
+                    job["end_sec"],
+                    job["srt_path"],
+                    job["ass_path"]
+                )
+
+                # 🗃️ clé = source + bornes + filtres + encodage + sous-titres :
+                # un réglage modifié → nouveau rendu, sinon servi tel quel
+                if serve_cached_outputs(job):
+                    print(f"⏭️ Rendu servi depuis le cache : {job['output_path']}")
+                    job["from_cache"] = True
+                    finalize_clip(job)
+                    continue
+            except Exception:
+                print("❌ ERREUR CLIP")
+                traceback.print_exc()
+                continue
+
+            print(f"🎬 Génération clip TikTok : {job['output_path']}")
+            render_jobs.append(job)
+
+        # 🎬 crop + scale + sous-titres : un seul encodage par clip,
+        # clips proches rendus depuis UN SEUL décodage de la source.
+        # Les rendus partent dans le scheduler : le scan continue.
+        try:
+            for group, build in plan_clip_renders(entry["video_path"], render_jobs):
+                scheduler.submit(
+                    f"{video_id} ({len(group)} clip(s))",
+                    build,
+                    payload=group,
+                    timeout=render_timeout(group)
+                )
+        except Exception:
+            print("❌ ERREUR CLIP")
+            traceback.print_exc()
+            continue
+
+        if render_jobs:
+            print(f"🗂️ Rendus en file : {scheduler.queue_depth()}")
+
+    return still_pending
+
+
 # ==================================================
 # DONNÉES HISTORIQUES
 # ==================================================
@@ -117,6 +391,13 @@ def compute_clip_score(intensity: float, moment_sec: int, verdict_label: str) ->
 historical_videos = load_videos()
 useful_videos = []
 
+# 🎬 rendus de tout le scan, en parallèle du reste du pipeline
+render_scheduler = RenderScheduler(core_budget=RENDER_CORE_BUDGET)
+
+# 🗣️ transcriptions en tâche de fond (modèle chargé au premier job)
+transcription_service = TranscriptionService()
+awaiting_transcripts = []
+
 
 # ==================================================
 # SCAN DES CHAÎNES
@@ -202,13 +483,25 @@ for channel_name in CHANNELS:
 
             try:
                 video_path = download_video_cached(video_id)
-                moments = detect_audio_moments(video_path)
+                duration_sec = iso_duration_to_seconds(info.get("duration"))
+                moments = detect_audio_moments(
+                    video_path,
+                    duration_sec=duration_sec,
+                    two_pass=TWO_PASS_DETECTION,
+                    multi_feature=MULTI_FEATURE_DETECTION and not TWO_PASS_DETECTION
+                )
 
                 if not moments:
                     print("🎬 Aucun moment audio fort détecté")
                 else:
                     scored_moments = []
 
+                    # 📐 index d'énergie (enveloppe déjà en cache) → bornes de clip
+                    energy_index = build_energy_index(
+                        load_video_envelope(video_path, duration_sec=duration_sec),
+                        AUDIO_WINDOW_SEC
+                    )
+
                     for m in moments:
                         clip_score = compute_clip_score(
                             intensity=m["intensity"],
@@ -216,10 +509,17 @@ for channel_name in CHANNELS:
                             verdict_label=verdict["label"]
                         )
 
+                        clip_start, clip_end = optimize_clip_bounds(
+                            energy_index,
+                            m["timestamp_sec"],
+                            max_lead_sec=CLIP_PADDING_SEC,
+                            max_tail_sec=CLIP_PADDING_SEC
+                        )
+
                         scored_moments.append({
                             "moment_sec": m["timestamp_sec"],
-                            "clip_start": max(0, m["timestamp_sec"] - CLIP_PADDING_SEC),
-                            "clip_end": m["timestamp_sec"] + CLIP_PADDING_SEC,
+                            "clip_start": clip_start,
+                            "clip_end": clip_end,
                             "clip_score": clip_score,
                             "intensity": m["intensity"],
                         })
@@ -233,91 +533,89 @@ for channel_name in CHANNELS:
                     # CRÉATION DES CLIPS
                     # ======================
 
-                    for m in scored_moments[:5]:
-                        ts = m["moment_sec"]
-
-                        clip_dir = f"storage/clips/{video_id}"
-                        os.makedirs(clip_dir, exist_ok=True)
-
-                        raw_clip = f"{clip_dir}/{video_id}_{ts}_raw.mp4"
-                        srt_path = f"{clip_dir}/{video_id}_{ts}.srt"
-                        ass_path = f"{clip_dir}/{video_id}_{ts}.ass"
-                        final_mp4 = f"{clip_dir}/{video_id}_{ts}_tiktok.mp4"
-                        caption_path = final_mp4.replace(".mp4", ".txt")
-
-                        video_exists = os.path.exists(final_mp4)
-                        caption_exists = os.path.exists(caption_path)
-
-                        # 🎬 VIDÉO DÉJÀ EXISTANTE
-                        if video_exists:
-                            print(f"⏭️ Vidéo déjà existante : {final_mp4}")
-
-                            if not caption_exists:
-                                caption_text = generate_clip_caption_retention(
-                                    verdict_label=verdict["label"],
-                                    category=info["video_category"],
-                                    intensity=m["intensity"],
-                                    clip_score=m["clip_score"],
-                                )
-
-                                with open(caption_path, "w", encoding="utf-8") as f:
-                                    f.write(caption_text)
-
-                                print("📝 Caption manquante générée")
-
-                            add_clip_to_queue(
-                                clip_id=f"{video_id}_{ts}_tiktok",
-                                clip_path=final_mp4,
-                                caption_path=caption_path,
-                                creator=channel_name,
-                                video_id=video_id,
-                                moment_sec=ts,
-                                platforms=["tiktok", "snap"]
-                            )
-
-                            continue
-
-                        # 🔒 PAS DE DOUBLON VIDÉO
-                        if is_moment_processed(video_id, ts):
-                            print(f"⏭️ Moment déjà traité ({video_id} @ {ts}s)")
-                            continue
-
-                        print(f"🎬 Génération clip TikTok : {final_mp4}")
-
-                        generate_vertical_clip(
+                    # 🧾 moments déjà traités : seuls les clips encore
+                    # "pending" repassent (relus / doublons ignorés)
+                    selected = [
+                        m for m in scored_moments[:5]
+                        if moment_needs_clip(video_id, m["moment_sec"])
+                    ]
+
+                    if not selected:
+                        print("⏭️ Moments déjà traités (clips relus ou doublons)")
+                    else:
+                        # 🗣️ Whisper UNE fois sur l'union des fenêtres retenues,
+                        # en tâche de fond : le scan continue pendant ce temps
+                        transcript_future = transcription_service.submit(
                             video_path,
-                            raw_clip,
-                            m["clip_start"],
-                            m["clip_end"]
+                            [(m["clip_start"], m["clip_end"]) for m in selected],
+                            channel=channel_name
                         )
 
-                        generate_subtitles(raw_clip, srt_path)
-                        srt_to_ass(srt_path, ass_path)
-                        render_final_clip(raw_clip, ass_path, final_mp4)
+                        clip_jobs = []
 
-                        caption_text = generate_clip_caption_retention(
-                            verdict_label=verdict["label"],
-                            category=info["video_category"],
-                            intensity=m["intensity"],
-                            clip_score=m["clip_score"],
-                        )
+                        for m in selected:
+                            ts = m["moment_sec"]
 
-                        with open(caption_path, "w", encoding="utf-8") as f:
-                            f.write(caption_text)
+                            clip_dir = f"storage/clips/{video_id}"
+                            os.makedirs(clip_dir, exist_ok=True)
 
-                        mark_moment_processed(video_id, ts, platform="tiktok")
+                            final_mp4 = f"{clip_dir}/{video_id}_{ts}_tiktok.mp4"
+                            output_mp4 = (
+                                final_mp4 if RENDER_MODE == "final"
+                                else final_mp4.replace(".mp4", "_proxy.mp4")
+                            )
 
-                        add_clip_to_queue(
-                            clip_id=f"{video_id}_{ts}_tiktok",
-                            clip_path=final_mp4,
-                            caption_path=caption_path,
-                            creator=channel_name,
-                            video_id=video_id,
-                            moment_sec=ts,
-                            platforms=["tiktok", "snap"]
-                        )
+                            job = {
+                                "moment": m,
+                                "start_sec": m["clip_start"],
+                                "end_sec": m["clip_end"],
+                                "srt_path": f"{clip_dir}/{video_id}_{ts}.srt",
+                                "ass_path": f"{clip_dir}/{video_id}_{ts}.ass",
+                                "output_path": output_mp4,
+                                "final_path": final_mp4,
+                                "profile": "proxy" if RENDER_MODE == "proxy" else FINAL_RENDER_PROFILE,
+                                "video_path": video_path,
+                                "caption_path": final_mp4.replace(".mp4", ".txt"),
+                                "verdict_label": verdict["label"],
+                                "category": info["video_category"],
+                                "creator": channel_name,
+                                "video_id": video_id,
+                            }
+
+                            # 🎯 cadrage guidé par la saillance (repli : crop centré),
+                            # calculé pendant que la transcription tourne ;
+                            # plan en cache : un clip déjà planifié ne relance pas ffmpeg
+                            if SALIENT_CROP:
+                                try:
+                                    crop_plan = load_crop_plan(video_path, m["clip_start"], m["clip_end"])
+                                    job["crop_x"] = crop_plan["x_expr"]
+                                    if not crop_plan["cached"]:
+                                        print(
+                                            f"🎯 Cadrage planifié en {crop_plan['plan_sec']}s "
+                                            f"({len(crop_plan['keypoints'])} point(s))"
+                                        )
+                                except (FFmpegError, ValueError, IndexError) as e:
+                                    # sonde illisible (taille absente / "N/A") : crop centré
+                                    print(f"⚠️ Cadrage guidé indisponible, crop centré : {e}")
+
+                            # 📐 rendu final : tous les formats depuis le même décodage
+                            if RENDER_MODE == "final":
+                                job["variants"] = export_variant_paths(final_mp4)
+
+                            clip_jobs.append(job)
+
+                        awaiting_transcripts.append({
+                            "video_id": video_id,
+                            "video_path": video_path,
+                            "future": transcript_future,
+                            "jobs": clip_jobs,
+                        })
 
-                        print("🔥 Clip + caption TikTok prêts")
+                # 🎬 rendus des vidéos dont la transcription est déjà prête
+                awaiting_transcripts = submit_transcribed_renders(
+                    awaiting_transcripts,
+                    render_scheduler
+                )
 
             except Exception:
                 print("❌ ERREUR CLIP")
@@ -327,6 +625,37 @@ for channel_name in CHANNELS:
         useful_videos.append(info)
 
 
+# ==================================================
+# FIN DES RENDUS + FINALISATION
+# ==================================================
+
+print("\n⏳ Attente des transcriptions en cours…")
+
+submit_transcribed_renders(awaiting_transcripts, render_scheduler, wait=True)
+transcription_service.shutdown()
+print("📊 TRANSCRIPTIONS :", transcription_service.stats())
+
+print("\n⏳ Attente des rendus en cours…")
+
+for result in render_scheduler.wait():
+    if not result["ok"]:
+        print(f"❌ ERREUR RENDU : {result['name']}")
+        print(result["error"])
+        # MP4 tronqués supprimés : re-rendus au prochain scan, jamais servis
+        for job in result["payload"]:
+            discard_outputs(job)
+        continue
+
+    for job in result["payload"]:
+        finalize_clip(job)
+
+render_scheduler.shutdown()
+print("📊 RENDUS :", render_scheduler.stats())
+
+# 🖼️ couvertures des clips en attente : un ffmpeg par vidéo source
+print("🖼️ Miniatures créées :", generate_queue_thumbnails())
+
+
 # ==================================================
 # TOP VIDÉOS GLOBALES
 # ==================================================
@@ -0,0 +1,185 @@
+# render_worker.py
+# ==================================================
+# WORKER DE RENDU FINAL (EN TÂCHE DE FOND)
+# - main.py ne produit que des APERÇUS (540x960, ultrafast)
+# - Dès qu'un clip passe "approved" (bot Telegram),
+#   ce worker lance le rendu complet 1080x1920
+# - Tous les formats (9:16, 1:1, 4:5, 16:9) depuis un seul décodage
+# - Clips refusés : jamais rendus en qualité finale
+# - Rendus échoués retentés au tour suivant (RENDER_MAX_ATTEMPTS)
+# Usage : python render_worker.py [--once]
+# ==================================================
+
+import os
+import sys
+import time
+
+from analysis.clip_renderer import (
+    discard_outputs,
+    job_outputs,
+    plan_clip_renders,
+    render_timeout,
+    serve_cached_outputs,
+    store_outputs,
+    variant_entries
+)
+from analysis.publish_queue import get_clips_awaiting_render, mark_clip_rendered
+from analysis.render_cache import file_digest
+from analysis.render_scheduler import RenderScheduler
+
+
+# ==================================================
+# CONFIG
+# ==================================================
+
+POLL_INTERVAL_SEC = 30
+RENDER_CORE_BUDGET = os.cpu_count()
+
+
+# ==================================================
+# JOBS
+# ==================================================
+
+def pinned_subtitles(spec: dict):
+    """
+    ASS du rendu différé, vérifié par son contenu (subtitles_digest)
+    - ass_path inchangé depuis l'aperçu → utilisé tel quel
+    - régénéré entre-temps → réécrit depuis le contenu gardé dans la
+      queue, sous un nom propre à ce digest
+    Retourne le chemin à brûler, ou None si introuvable
+    """
+    digest = spec["subtitles_digest"]
+    ass_path = spec["ass_path"]
+
+    if os.path.exists(ass_path) and file_digest(ass_path) == digest:
+        return ass_path
+
+    ass_text = spec.get("ass_text")
+    if ass_text is None:
+        return None
+
+    pinned_path = ass_path.replace(".ass", f"_{digest[:12]}.ass")
+    with open(pinned_path, "w", encoding="utf-8", newline="") as f:
+        f.write(ass_text)
+
+    return pinned_path if file_digest(pinned_path) == digest else None
+
+
+def final_job(clip: dict, ass_path: str) -> dict:
+    """
+    Job de rendu complet à partir des paramètres gardés dans la queue
+    """
+    spec = clip["deferred_render"]
+
+    return {
+        "clip_id": clip["id"],
+        "video_path": spec["video_path"],
+        "start_sec": spec["start_sec"],
+        "end_sec": spec["end_sec"],
+        "ass_path": ass_path,
+        "subtitles_digest": spec["subtitles_digest"],
+        "crop_x": spec.get("crop_x"),
+        "output_path": spec["output_path"],
+        "variants": spec.get("variants", {}),
+        "profile": spec.get("profile", "final"),
+    }
+
+
+def render_approved_clips(scheduler: RenderScheduler) -> int:
+    """
+    Rend en qualité finale tous les clips approuvés en attente
+    Retourne le nombre de clips traités
+    """
+    clips = get_clips_awaiting_render()
+    if not clips:
+        return 0
+
+    print(f"[WORKER] {len(clips)} clip(s) approuvé(s) à rendre")
+
+    jobs_by_video = {}
+
+    for clip in clips:
+        spec = clip["deferred_render"]
+        ass_path = pinned_subtitles(spec) if os.path.exists(spec["video_path"]) else None
+
+        if ass_path is None:
+            print(f"[WORKER] ❌ Source ou sous-titres introuvables : {clip['id']}")
+            mark_clip_rendered(clip["id"], None, ok=False, error="source ou sous-titres introuvables")
+            continue
+
+        if clip.get("render_status") == "failed":
+            print(f"[WORKER] 🔁 Nouvel essai ({clip.get('render_attempts', 0) + 1}) : {clip['id']}")
+
+        job = final_job(clip, ass_path)
+
+        # 🗃️ rendu final déjà fait (autre nom, run précédent) → servi tel quel
+        if serve_cached_outputs(job):
+            mark_clip_rendered(
+                clip["id"],
+                job["output_path"],
+                variants=variant_entries(job_outputs(job))
+            )
+            print(f"[WORKER] ⏭️ Servi depuis le cache : {job['output_path']}")
+            continue
+
+        jobs_by_video.setdefault(spec["video_path"], []).append(job)
+
+    futures = []
+
+    for video_path, jobs in jobs_by_video.items():
+        for group, build in plan_clip_renders(video_path, jobs):
+            futures.append(scheduler.submit(
+                f"{group[0]['clip_id']} ({len(group)} clip(s), final)",
+                build,
+                payload=group,
+                timeout=render_timeout(group)
+            ))
+
+    for future in futures:
+        result = future.result()
+
+        for job in result["payload"]:
+            if result["ok"]:
+                store_outputs(job)
+            else:
+                print(result["error"])
+                discard_outputs(job)
+
+            mark_clip_rendered(
+                job["clip_id"],
+                job["output_path"],
+                ok=result["ok"],
+                variants=variant_entries(job_outputs(job)),
+                error=result["error"]
+            )
+
+    return len(clips)
+
+
+# ==================================================
+# BOUCLE
+# ==================================================
+
+def main():
+    once = "--once" in sys.argv[1:]
+    scheduler = RenderScheduler(core_budget=RENDER_CORE_BUDGET)
+
+    print("[WORKER] 🎬 Worker de rendu final démarré")
+
+    try:
+        while True:
+            render_approved_clips(scheduler)
+
+            if once:
+                break
+            time.sleep(POLL_INTERVAL_SEC)
+    except KeyboardInterrupt:
+        print("[WORKER] Arrêt demandé")
+        scheduler.cancel()
+    finally:
+        scheduler.shutdown()
+        print("[WORKER] 📊", scheduler.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ from telegram.ext import (
     filters,
 )
 
+from analysis.publish_queue import queue_lock
 from config import TELEGRAM_BOT_TOKEN
 
 
@@ -64,9 +65,15 @@ def load_queue():
 
 
 def save_queue(queue):
+    """
+    Écriture atomique, à appeler sous queue_lock() (main.py et
+    render_worker écrivent aussi la queue)
+    """
     print(f"[QUEUE] Sauvegarde de {len(queue)} clips")
-    with open(PUBLISH_QUEUE_PATH, "w", encoding="utf-8") as f:
+    tmp_path = PUBLISH_QUEUE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump({"clips": queue}, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, PUBLISH_QUEUE_PATH)
 
 
 def get_queue_stats():
@@ -106,14 +113,15 @@ def get_next_pending_clip():
 def update_clip_status(clip_id: str, new_status: str):
     print(f"[QUEUE] Update {clip_id} → {new_status}")
 
-    queue = load_queue()
+    with queue_lock():
+        queue = load_queue()
 
-    for item in queue:
-        if item.get("id") == clip_id:
-            item["status"] = new_status
-            item["updated_at"] = datetime.utcnow().isoformat()
+        for item in queue:
+            if item.get("id") == clip_id:
+                item["status"] = new_status
+                item["updated_at"] = datetime.utcnow().isoformat()
 
-    save_queue(queue)
+        save_queue(queue)
 
 
 # ==================================================
@@ -159,6 +167,11 @@ async def next_clip(update: Update, context: ContextTypes.DEFAULT_TYPE):
         with open(caption_path, "r", encoding="utf-8") as f:
             caption_text = f.read()
 
+    # 👀 aperçu basse déf : le rendu final part après approbation
+    preview_note = ""
+    if clip.get("render_status") == "deferred":
+        preview_note = "👀 Aperçu basse déf (rendu final après approbation)"
+
     keyboard = InlineKeyboardMarkup([
         [
             InlineKeyboardButton("✏️ MODIFIER TEXTE", callback_data=f"edit|{clip['id']}"),
@@ -178,7 +191,8 @@ async def next_clip(update: Update, context: ContextTypes.DEFAULT_TYPE):
         caption=(
             f"🎬 *{clip.get('creator','?')}*\n"
             f"📺 `{clip.get('video_id')}`\n"
-            f"⏱ Moment : {clip.get('moment_sec')}s\n\n"
+            f"⏱ Moment : {clip.get('moment_sec')}s\n"
+            f"{preview_note}\n\n"
             f"{caption_text}\n\n"
             f"📊 *{stats['pending']} / {stats['total']} clips restants*"
         ),
@@ -233,10 +247,14 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         with open(clip["caption_path"], "w", encoding="utf-8") as f:
             f.write(original)
 
-        clip["caption_current"] = original
-        clip["updated_at"] = datetime.utcnow().isoformat()
-
-        save_queue(queue)
+        # 🔒 relu sous verrou : la queue a pu changer depuis le clic
+        with queue_lock():
+            queue = load_queue()
+            for item in queue:
+                if item.get("id") == clip_id:
+                    item["caption_current"] = original
+                    item["updated_at"] = datetime.utcnow().isoformat()
+            save_queue(queue)
 
         await query.message.reply_text(
             "↩️ *Texte original restauré*\n\n"
@@ -250,7 +268,10 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # =========================
     if action == "approve":
         update_clip_status(clip_id, "approved")
-        msg = "✅ *Clip APPROUVÉ*\nPrêt pour publication."
+        if clip.get("render_status") == "deferred":
+            msg = "✅ *Clip APPROUVÉ*\nRendu final en file (render_worker)."
+        else:
+            msg = "✅ *Clip APPROUVÉ*\nPrêt pour publication."
 
     elif action == "reject":
         update_clip_status(clip_id, "rejected")
@@ -276,28 +297,29 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     clip_id = EDITING_CLIP.pop(user_id)
     print(f"[EDIT] Nouveau texte pour {clip_id}")
 
-    queue = load_queue()
-    clip = None
+    with queue_lock():
+        queue = load_queue()
+        clip = None
 
-    for item in queue:
-        if item.get("id") == clip_id:
-            clip = item
+        for item in queue:
+            if item.get("id") == clip_id:
+                clip = item
 
-            # 🔐 Sauvegarde du texte original UNE FOIS
-            if "caption_original" not in item:
-                with open(item["caption_path"], "r", encoding="utf-8") as f:
-                    item["caption_original"] = f.read()
+                # 🔐 Sauvegarde du texte original UNE FOIS
+                if "caption_original" not in item:
+                    with open(item["caption_path"], "r", encoding="utf-8") as f:
+                        item["caption_original"] = f.read()
 
-            item["caption_current"] = update.message.text
+                item["caption_current"] = update.message.text
 
-            with open(item["caption_path"], "w", encoding="utf-8") as f:
-                f.write(update.message.text)
+                with open(item["caption_path"], "w", encoding="utf-8") as f:
+                    f.write(update.message.text)
 
-            item["edited"] = True
-            item["updated_at"] = datetime.utcnow().isoformat()
-            break
+                item["edited"] = True
+                item["updated_at"] = datetime.utcnow().isoformat()
+                break
 
-    save_queue(queue)
+        save_queue(queue)
 
     if not clip:
         await update.message.reply_text("❌ Erreur : clip introuvable.")
@@ -306,6 +328,11 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     video_path = os.path.normpath(clip["clip_path"])
     stats = get_queue_stats()
 
+    # 👀 aperçu basse déf : le rendu final part après approbation
+    preview_note = ""
+    if clip.get("render_status") == "deferred":
+        preview_note = "👀 Aperçu basse déf (rendu final après approbation)"
+
     keyboard = InlineKeyboardMarkup([
         [
             InlineKeyboardButton("✏️ MODIFIER TEXTE", callback_data=f"edit|{clip['id']}"),
@@ -320,7 +347,8 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_video(
         video=open(video_path, "rb"),
         caption=(
-            "✏️ *Texte mis à jour*\n\n"
+            "✏️ *Texte mis à jour*\n"
+            f"{preview_note}\n\n"
             f"{update.message.text}\n\n"
             f"📊 *{stats['pending']} / {stats['total']} clips restants*"
         ),
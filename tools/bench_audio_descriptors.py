@@ -0,0 +1,96 @@
+# tools/bench_audio_descriptors.py
+# --------------------------------------------------
+# Benchmark : descripteurs multi-features vs enveloppe RMS seule
+# - Même piste synthétique, mêmes blocs que le streaming ffmpeg
+# - Trois modes : RMS seule, FFT sur toute la piste, FFT limitée aux
+#   fenêtres candidates + échantillon des moyennes (mode du détecteur)
+# - Objectif : rester dans un petit facteur constant de la passe RMS
+# Usage : python -m tools.bench_audio_descriptors [minutes]
+# --------------------------------------------------
+
+import sys
+import time
+
+import numpy as np
+
+from analysis.audio_descriptors import (
+    compute_audio_descriptors,
+    compute_selected_descriptors,
+    descriptor_windows,
+)
+from analysis.audio_moment_detector import (
+    AUDIO_SAMPLE_RATE,
+    AUDIO_WINDOW_SEC,
+    STREAM_CHUNK_SECONDS,
+    compute_energy_envelope,
+)
+
+
+def synthetic_track(minutes: float) -> np.ndarray:
+    rng = np.random.default_rng(11)
+    n = int(minutes * 60 * AUDIO_SAMPLE_RATE)
+    t = np.arange(n) / AUDIO_SAMPLE_RATE
+
+    # "musique" (tons purs) + bruit de fond modulé + réactions courtes
+    audio = 2000 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 500, n) * (1 + 0.8 * np.sin(t / 7))
+    for _ in range(int(minutes * 3)):
+        start = rng.integers(0, n - AUDIO_SAMPLE_RATE * 2)
+        length = int(rng.uniform(0.5, 2.0) * AUDIO_SAMPLE_RATE)
+        audio[start:start + length] += rng.normal(0, rng.uniform(3000, 9000), length)
+
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+def run_chunks(audio: np.ndarray, fn) -> float:
+    chunk = int(STREAM_CHUNK_SECONDS * AUDIO_SAMPLE_RATE)
+    t0 = time.perf_counter()
+    for start in range(0, audio.size, chunk):
+        fn(audio[start:start + chunk])
+    return time.perf_counter() - t0
+
+
+def run_selected(audio: np.ndarray, energies: np.ndarray, window_size: int) -> float:
+    """
+    Mode du détecteur : FFT sur les fenêtres candidates + échantillon
+    (l'enveloppe RMS est calculée de toute façon)
+    """
+    chunk = int(STREAM_CHUNK_SECONDS * AUDIO_SAMPLE_RATE)
+    windows_per_chunk = chunk // window_size
+
+    t0 = time.perf_counter()
+    candidates, sample = descriptor_windows(energies)
+    selected = candidates | sample
+    prev_frame = None
+    for k, start in enumerate(range(0, audio.size, chunk)):
+        mask = selected[k * windows_per_chunk:(k + 1) * windows_per_chunk]
+        _, prev_frame = compute_selected_descriptors(
+            audio[start:start + chunk], window_size, mask, AUDIO_SAMPLE_RATE, prev_frame
+        )
+    return time.perf_counter() - t0
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    window_size = int(AUDIO_SAMPLE_RATE * AUDIO_WINDOW_SEC)
+
+    audio = synthetic_track(minutes)
+    print(f"🎧 Piste synthétique : {minutes:g} min")
+
+    t_rms = run_chunks(audio, lambda s: compute_energy_envelope(s, window_size))
+    t_desc = run_chunks(audio, lambda s: compute_audio_descriptors(s, window_size, AUDIO_SAMPLE_RATE))
+
+    energies = compute_energy_envelope(audio, window_size)
+    candidates, sample = descriptor_windows(energies)
+    t_sel = t_rms + run_selected(audio, energies, window_size)
+
+    print(f"RMS seule              : {t_rms * 1000:8.1f} ms")
+    print(f"Multi-features complet : {t_desc * 1000:8.1f} ms  (x{t_desc / t_rms:.1f})")
+    print(
+        f"Multi-features ciblé   : {t_sel * 1000:8.1f} ms  (x{t_sel / t_rms:.1f}, "
+        f"{(candidates | sample).mean():.0%} des fenêtres dont {candidates.mean():.0%} candidates)"
+    )
+    print(f"Temps réel             : x{minutes * 60 / t_sel:.0f} (multi-features ciblé)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# tools/bench_audio_envelope.py
+# --------------------------------------------------
+# Micro-benchmark : enveloppe RMS vectorisée vs ancienne boucle
+# - Piste synthétique int16 (bruit + pics)
+# - Vérifie que les moments sont IDENTIQUES
+# Usage : python -m tools.bench_audio_envelope [minutes]
+# --------------------------------------------------
+
+import sys
+import time
+
+import numpy as np
+
+from analysis.audio_moment_detector import detect_audio_peaks
+
+
+def detect_audio_peaks_loop(
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    window_sec: float = 0.5,
+    threshold_ratio: float = 2.5
+) -> list:
+    """
+    Ancienne implémentation (boucle Python), gardée comme référence
+    """
+    window_size = int(sample_rate * window_sec)
+    energies = []
+
+    for i in range(0, len(audio), window_size):
+        window = audio[i:i + window_size]
+        if window.size == 0:
+            continue
+
+        energy = np.sqrt(np.mean(window.astype(float) ** 2))
+        energies.append((i, energy))
+
+    if not energies:
+        return []
+
+    avg_energy = np.mean([e for _, e in energies])
+
+    moments = []
+    for index, energy in energies:
+        if energy >= avg_energy * threshold_ratio:
+            moments.append({
+                "timestamp_sec": int(index / sample_rate),
+                "intensity": round(energy / avg_energy, 2)
+            })
+
+    return moments
+
+
+def synthetic_track(minutes: float, sample_rate: int = 16000) -> np.ndarray:
+    rng = np.random.default_rng(42)
+    n = int(minutes * 60 * sample_rate) + 1234  # fenêtre partielle en fin
+
+    audio = rng.normal(0, 800, n)
+
+    # quelques pics forts (cris / rires)
+    for start in rng.integers(0, n - sample_rate, size=max(1, int(minutes))):
+        audio[start:start + sample_rate] *= 8
+
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+def bench(fn, audio, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(audio)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+
+    audio = synthetic_track(minutes)
+    print(f"🎧 Piste synthétique : {minutes:g} min ({audio.size} échantillons)")
+
+    ref = detect_audio_peaks_loop(audio)
+    new = detect_audio_peaks(audio)
+
+    if ref != new:
+        print("❌ Résultats différents entre boucle et version vectorisée")
+        sys.exit(1)
+
+    print(f"✅ Moments identiques ({len(new)} pics)")
+
+    t_loop = bench(detect_audio_peaks_loop, audio)
+    t_vec = bench(detect_audio_peaks, audio)
+
+    print(f"Boucle Python : {t_loop * 1000:8.1f} ms")
+    print(f"Vectorisé     : {t_vec * 1000:8.1f} ms")
+    print(f"Gain          : x{t_loop / t_vec:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# tools/bench_crop_sampling.py
+# --------------------------------------------------
+# Benchmark : échantillonnage du crop_planner
+# - Images clés seules (-skip_frame nokey) vs décodage complet à 2 img/s
+# - Fenêtres de 50 s réparties sur chaque source
+# - Temps d'échantillonnage + écart max du cadrage obtenu
+#   (centre du cadre, fraction de la largeur)
+# Usage : python -m tools.bench_crop_sampling fichier [fichier ...]
+# --------------------------------------------------
+
+import os
+import sys
+import time
+
+import numpy as np
+
+import analysis.crop_planner as crop_planner
+from analysis.crop_planner import keyframe_times, plan_crop
+from analysis.ffmpeg_runner import run_ffprobe
+
+WINDOW_SEC = 50
+WINDOWS_PER_SOURCE = 4
+
+
+def source_duration(path: str) -> float:
+    output = run_ffprobe(
+        ["-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        name=path
+    )
+    return float(output.strip())
+
+
+def center_track(plan: dict, duration: float) -> np.ndarray:
+    times, centers = zip(*plan["keypoints"])
+    return np.interp(np.arange(0, duration, 0.5), times, centers)
+
+
+def timed_plan(path: str, start: float, end: float, keyframes: bool) -> tuple:
+    crop_planner.KEYFRAME_SAMPLING = keyframes
+    t0 = time.perf_counter()
+    plan = plan_crop(path, start, end)
+    return plan, time.perf_counter() - t0
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage : python -m tools.bench_crop_sampling fichier [fichier ...]")
+        sys.exit(2)
+
+    print(f"{'source':<28} {'fenêtre':>9} {'complet':>9} {'clés':>9}  écart cadrage")
+
+    total_full = total_key = 0.0
+
+    for path in sys.argv[1:]:
+        duration = source_duration(path)
+        starts = np.linspace(0, max(0.0, duration - WINDOW_SEC), WINDOWS_PER_SOURCE)
+
+        for start in starts:
+            end = min(duration, start + WINDOW_SEC)
+
+            full, t_full = timed_plan(path, start, end, keyframes=False)
+            crop_planner.KEYFRAME_SAMPLING = True
+
+            if keyframe_times(path, start, end) is None:
+                print(f"{os.path.basename(path)[:28]:<28} {start:>8.0f}s {t_full:>7.2f} s {'-':>9}  GOP trop longs")
+                total_full += t_full
+                total_key += t_full
+                continue
+
+            fast, t_key = timed_plan(path, start, end, keyframes=True)
+            gap = np.abs(center_track(full, end - start) - center_track(fast, end - start)).max()
+
+            total_full += t_full
+            total_key += t_key
+
+            print(
+                f"{os.path.basename(path)[:28]:<28} {start:>8.0f}s "
+                f"{t_full:>7.2f} s {t_key:>7.2f} s  {gap:.3f}"
+            )
+
+    crop_planner.KEYFRAME_SAMPLING = True
+    print(f"\nTotal : complet {total_full:.2f} s | images clés {total_key:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
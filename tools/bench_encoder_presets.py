@@ -0,0 +1,234 @@
+# tools/bench_encoder_presets.py
+# --------------------------------------------------
+# Benchmark : matrice preset x264 × CRF sur le rendu 9:16
+# - Sources synthétiques (lavfi testsrc2 + sine, avec / sans grain)
+#   + échantillons locaux éventuels
+# - Mesures : fps, temps CPU, taille, SSIM (+ VMAF si libvmaf dispo)
+# - Profils nommés quality / balanced / fast → storage/render_profiles.json
+#   (sélectionnables par nom dans les renderers)
+# Usage : python -m tools.bench_encoder_presets [sample.mp4 ...]
+# --------------------------------------------------
+
+import os
+import re
+import sys
+import tempfile
+
+from analysis.clip_generator import VERTICAL_FILTER
+from analysis.ffmpeg_runner import FFmpegError, run_ffmpeg, run_ffprobe
+from analysis.render_profiles import (
+    FINAL_ENCODE_ARGS,
+    save_tuned_profiles,
+    with_x264_settings
+)
+
+BENCH_SECONDS = 10
+PRESETS = ["ultrafast", "veryfast", "faster", "fast", "medium"]
+CRFS = [18, 20, 23, 26]
+
+BALANCED_SSIM_LOSS = 0.005   # "balanced" : au plus 0.005 de SSIM sous le meilleur
+FAST_SSIM_FLOOR = 0.97       # "fast" : SSIM minimal acceptable
+
+SSIM_REGEX = re.compile(r"SSIM .*All:([0-9.]+)")
+VMAF_REGEX = re.compile(r"VMAF score:\s*([0-9.]+)")
+
+
+# ==================================================
+# SOURCES
+# ==================================================
+
+def synthetic_sources(tmp_dir: str) -> dict:
+    """
+    Sources lossless (x264 qp 0) générées par lavfi
+    """
+    sources = {}
+
+    for name, vf in (("testsrc", None), ("testsrc_grain", "noise=alls=20:allf=t")):
+        path = os.path.join(tmp_dir, f"{name}.mp4")
+        cmd = [
+            "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size=1920x1080:rate=30:duration={BENCH_SECONDS}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={BENCH_SECONDS}",
+        ]
+        if vf:
+            cmd += ["-vf", vf]
+        cmd += ["-c:v", "libx264", "-preset", "ultrafast", "-qp", "0", "-c:a", "aac", "-shortest", path]
+
+        run_ffmpeg(cmd, name=path, stage="bench")
+        sources[name] = path
+
+    return sources
+
+
+def has_libvmaf() -> bool:
+    try:
+        return " libvmaf " in run_ffprobe(["-v", "error", "-filters"], stage="bench")
+    except FFmpegError:
+        return False
+
+
+# ==================================================
+# MESURES
+# ==================================================
+
+def encode(source: str, output: str, preset: str, crf: int, max_sec: float) -> dict:
+    result = run_ffmpeg(
+        [
+            "-y",
+            "-i", source,
+            "-t", str(max_sec),
+            "-vf", VERTICAL_FILTER,
+            *with_x264_settings(FINAL_ENCODE_ARGS, preset, crf),
+            output
+        ],
+        name=output,
+        stage="bench"
+    )
+
+    return {
+        "fps": result.get("fps"),
+        "wall_sec": result["wall_sec"],
+        "cpu_sec": result["cpu_sec"],
+        "size_kb": round(os.path.getsize(output) / 1024, 1),
+    }
+
+
+def quality(source: str, output: str, max_sec: float, vmaf: bool) -> dict:
+    """
+    SSIM (et VMAF) du rendu vs la source recadrée de la même façon,
+    en une seule passe de décodage
+    """
+    reference = f"[1:v]{VERTICAL_FILTER},format=yuv420p"
+
+    if vmaf:
+        lavfi = (
+            f"[0:v]split[d0][d1];{reference},split[r0][r1];"
+            "[d0][r0]ssim;[d1][r1]libvmaf"
+        )
+    else:
+        lavfi = f"{reference}[ref];[0:v][ref]ssim"
+
+    result = run_ffmpeg(
+        [
+            "-i", output,
+            "-t", str(max_sec), "-i", source,
+            "-lavfi", lavfi,
+            "-f", "null", "-"
+        ],
+        name=output,
+        stage="bench"
+    )
+
+    ssim = SSIM_REGEX.search(result["stderr"])
+    score = VMAF_REGEX.search(result["stderr"]) if vmaf else None
+
+    return {
+        "ssim": float(ssim.group(1)) if ssim else None,
+        "vmaf": float(score.group(1)) if score else None,
+    }
+
+
+# ==================================================
+# PROFILS
+# ==================================================
+
+def aggregate(results: list) -> list:
+    """
+    Moyenne SSIM / VMAF + CPU et taille cumulés par (preset, crf)
+    """
+    combos = {}
+
+    for r in results:
+        combo = combos.setdefault((r["preset"], r["crf"]), {
+            "preset": r["preset"],
+            "crf": r["crf"],
+            "cpu_sec": 0.0,
+            "size_kb": 0.0,
+            "ssim": [],
+            "vmaf": [],
+            "fps": [],
+        })
+        combo["cpu_sec"] += r["cpu_sec"] or r["wall_sec"]
+        combo["size_kb"] += r["size_kb"]
+        for key in ("ssim", "vmaf", "fps"):
+            if r[key] is not None:
+                combo[key].append(r[key])
+
+    rows = []
+    for combo in combos.values():
+        for key in ("ssim", "vmaf", "fps"):
+            values = combo[key]
+            combo[key] = round(sum(values) / len(values), 4) if values else None
+        combo["cpu_sec"] = round(combo["cpu_sec"], 2)
+        combo["size_kb"] = round(combo["size_kb"], 1)
+        rows.append(combo)
+
+    return rows
+
+
+def pick_profiles(rows: list) -> dict:
+    rated = [r for r in rows if r["ssim"] is not None]
+    if not rated:
+        return {}
+
+    best = max(rated, key=lambda r: (r["ssim"], -r["cpu_sec"]))
+    balanced = min(
+        (r for r in rated if r["ssim"] >= best["ssim"] - BALANCED_SSIM_LOSS),
+        key=lambda r: r["cpu_sec"]
+    )
+    fast_pool = [r for r in rated if r["ssim"] >= FAST_SSIM_FLOOR] or rated
+    fast = min(fast_pool, key=lambda r: r["cpu_sec"])
+
+    return {
+        name: {
+            "size": "1080:1920",
+            "encode": with_x264_settings(FINAL_ENCODE_ARGS, row["preset"], row["crf"]),
+            "measured": row,
+        }
+        for name, row in (("quality", best), ("balanced", balanced), ("fast", fast))
+    }
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+def main():
+    vmaf = has_libvmaf()
+    print(f"📏 Qualité mesurée par : SSIM{' + VMAF' if vmaf else ''}")
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sources = synthetic_sources(tmp_dir)
+        for path in sys.argv[1:]:
+            sources[os.path.basename(path)] = path
+
+        for source_name, source in sources.items():
+            for preset in PRESETS:
+                for crf in CRFS:
+                    output = os.path.join(tmp_dir, f"out_{preset}_{crf}.mp4")
+
+                    row = {"source": source_name, "preset": preset, "crf": crf}
+                    row.update(encode(source, output, preset, crf, BENCH_SECONDS))
+                    row.update(quality(source, output, BENCH_SECONDS, vmaf))
+                    results.append(row)
+
+                    print(
+                        f"{source_name:<16} {preset:<10} crf={crf:<3} "
+                        f"fps={row['fps'] or 0:7.1f}  cpu={row['cpu_sec'] or 0:6.2f}s  "
+                        f"{row['size_kb']:8.1f} kB  ssim={row['ssim'] or 0:.4f}"
+                        + (f"  vmaf={row['vmaf']:.1f}" if row["vmaf"] is not None else "")
+                    )
+
+    profiles = pick_profiles(aggregate(results))
+    save_tuned_profiles(profiles, results)
+
+    print("\n🎛️ Profils enregistrés :")
+    for name, profile in profiles.items():
+        m = profile["measured"]
+        print(f"  {name:<9} preset={m['preset']:<10} crf={m['crf']:<3} ssim={m['ssim']}  cpu={m['cpu_sec']}s")
+
+
+if __name__ == "__main__":
+    main()
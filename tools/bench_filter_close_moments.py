@@ -0,0 +1,74 @@
+# tools/bench_filter_close_moments.py
+# --------------------------------------------------
+# Benchmark : anti-doublons (filter_close_moments)
+# - Listes de pics denses synthétiques (live très bruyant)
+# - Vérifie que la sortie est IDENTIQUE à l'ancienne version O(n·k)
+# Usage : python -m tools.bench_filter_close_moments
+# --------------------------------------------------
+
+import random
+import sys
+import time
+
+from analysis.audio_moment_detector import MIN_GAP_SECONDS, filter_close_moments
+
+
+def filter_close_moments_legacy(moments: list) -> list:
+    """
+    Ancienne implémentation (comparaison à tous les moments retenus)
+    """
+    moments = sorted(moments, key=lambda m: m["intensity"], reverse=True)
+    selected = []
+
+    for m in moments:
+        if all(
+            abs(m["timestamp_sec"] - s["timestamp_sec"]) >= MIN_GAP_SECONDS
+            for s in selected
+        ):
+            selected.append(m)
+
+    return selected
+
+
+def dense_peaks(count: int, duration_sec: int) -> list:
+    rng = random.Random(count)
+    return [
+        {
+            "timestamp_sec": rng.randrange(duration_sec),
+            "intensity": round(rng.uniform(2.5, 12), 2),
+        }
+        for _ in range(count)
+    ]
+
+
+def timed(fn, moments) -> tuple:
+    t0 = time.perf_counter()
+    result = fn(moments)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    duration_sec = 3 * 3600  # live de 3h
+
+    print(f"{'pics':>7} {'ancien':>10} {'bisect':>10} {'ns/pic':>8}")
+
+    for count in (1_000, 10_000, 50_000, 200_000):
+        moments = dense_peaks(count, duration_sec)
+
+        new, t_new = timed(filter_close_moments, moments)
+        old, t_old = timed(filter_close_moments_legacy, moments)
+
+        if new != old:
+            print(f"❌ Résultats différents pour {count} pics")
+            sys.exit(1)
+
+        print(
+            f"{count:>7} {t_old * 1000:>7.1f} ms {t_new * 1000:>7.1f} ms "
+            f"{t_new / count * 1e9:>8.0f}"
+        )
+
+    print("\n✅ Sorties identiques")
+
+
+if __name__ == "__main__":
+    main()
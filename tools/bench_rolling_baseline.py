@@ -0,0 +1,69 @@
+# tools/bench_rolling_baseline.py
+# --------------------------------------------------
+# Benchmark : baseline glissante (seuil adaptatif)
+# - Enveloppes synthétiques de 1h / 2h / 3h (fenêtres de 0.5s)
+# - Vérifie que le coût par fenêtre reste constant (linéaire)
+# - Compare à une médiane glissante naïve (tri de chaque fenêtre)
+# Usage : python -m tools.bench_rolling_baseline
+# --------------------------------------------------
+
+import time
+
+import numpy as np
+
+from analysis.audio_moment_detector import (
+    AUDIO_WINDOW_SEC,
+    BASELINE_WINDOW_SEC,
+    rolling_baseline,
+)
+
+
+def naive_rolling_median(energies: np.ndarray, window: int) -> np.ndarray:
+    half = window // 2
+    out = np.empty(energies.size)
+    for i in range(energies.size):
+        lo = max(0, i - half)
+        hi = min(energies.size, i + half + 1)
+        out[i] = np.median(energies[lo:hi])
+    return out
+
+
+def synthetic_envelope(hours: float) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    n = int(hours * 3600 / AUDIO_WINDOW_SEC)
+
+    # fond log-normal + segments longs plus forts (musique / hype)
+    energies = np.exp(rng.normal(6, 0.6, n))
+    for start in rng.integers(0, n - 600, size=int(hours * 4)):
+        energies[start:start + 600] *= 4
+
+    return energies
+
+
+def timed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    window = int(BASELINE_WINDOW_SEC / AUDIO_WINDOW_SEC)
+    print(f"Fenêtre baseline : {BASELINE_WINDOW_SEC}s ({window} fenêtres)\n")
+
+    print(f"{'durée':>6} {'fenêtres':>9} {'histogramme':>12} {'µs/fen.':>8} {'naïf':>9}")
+
+    for hours in (1, 2, 3):
+        energies = synthetic_envelope(hours)
+
+        t_fast = timed(rolling_baseline, energies, window)
+        t_naive = timed(naive_rolling_median, energies, window)
+
+        print(
+            f"{hours:>5}h {energies.size:>9} "
+            f"{t_fast * 1000:>9.1f} ms {t_fast / energies.size * 1e6:>8.2f} "
+            f"{t_naive * 1000:>6.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# tools/bench_transcription.py
+# --------------------------------------------------
+# Benchmark : moteurs de transcription sur CPU
+# - openai-whisper (fp32) vs faster-whisper (CTranslate2 int8)
+#   × taille de modèle × beam size
+# - Fixture locale : fichiers .wav + transcription de référence
+#   dans un .txt du même nom (ex: intro.wav + intro.txt),
+#   construite selon tools/fixtures/transcription/README.md
+# - Mesures : chargement du modèle, RTF (temps / durée audio), WER
+# Usage : python -m tools.bench_transcription [dossier_fixture]
+#         python -m tools.bench_transcription --extract video start durée nom
+# --------------------------------------------------
+
+import os
+import re
+import sys
+import time
+import wave
+
+from analysis.ffmpeg_runner import run_ffmpeg
+from analysis.subtitles_generator import TRANSCRIBER, get_model, transcribe_audio
+
+DEFAULT_FIXTURE_DIR = os.path.join("tools", "fixtures", "transcription")
+
+BACKENDS = ["openai-whisper", "faster-whisper"]
+MODELS = ["tiny", "base", "small"]
+BEAM_SIZES = [1, 5]
+
+WORD_REGEX = re.compile(r"[\w']+")
+
+
+# ==================================================
+# FIXTURE
+# ==================================================
+
+def load_fixture(fixture_dir: str) -> list:
+    """
+    [{"name", "audio_path", "duration_sec", "reference"}, ...]
+    """
+    samples = []
+
+    for name in sorted(os.listdir(fixture_dir)):
+        if not name.endswith(".wav"):
+            continue
+
+        audio_path = os.path.join(fixture_dir, name)
+        reference_path = audio_path[:-len(".wav")] + ".txt"
+        if not os.path.exists(reference_path):
+            print(f"⚠️ Référence manquante, ignoré : {reference_path}")
+            continue
+
+        with wave.open(audio_path, "rb") as w:
+            duration_sec = w.getnframes() / w.getframerate()
+
+        with open(reference_path, "r", encoding="utf-8") as f:
+            reference = f.read()
+
+        if not reference.strip():
+            print(f"⚠️ Référence vide (à écrire à la main), ignoré : {reference_path}")
+            continue
+
+        samples.append({
+            "name": name,
+            "audio_path": audio_path,
+            "duration_sec": duration_sec,
+            "reference": reference,
+        })
+
+    return samples
+
+
+def extract_sample(video_path: str, start_sec: float, duration_sec: float, name: str, fixture_dir: str) -> str:
+    """
+    Extrait de fixture : WAV mono 16 kHz + .txt vide à remplir à la main
+    """
+    os.makedirs(fixture_dir, exist_ok=True)
+    audio_path = os.path.join(fixture_dir, f"{name}.wav")
+
+    run_ffmpeg(
+        [
+            "-y",
+            "-ss", str(start_sec),
+            "-i", video_path,
+            "-t", str(duration_sec),
+            "-vn",
+            "-ac", "1",
+            "-ar", "16000",
+            audio_path
+        ],
+        name=audio_path,
+        stage="fixture"
+    )
+
+    reference_path = audio_path[:-len(".wav")] + ".txt"
+    if not os.path.exists(reference_path):
+        open(reference_path, "w", encoding="utf-8").close()
+
+    return audio_path
+
+
+# ==================================================
+# WER
+# ==================================================
+
+def normalize_words(text: str) -> list:
+    return WORD_REGEX.findall(text.lower())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    (substitutions + suppressions + insertions) / mots de référence
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    # distance d'édition au mot, une ligne à la fois
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+
+    return previous[-1] / len(ref)
+
+
+# ==================================================
+# MESURES
+# ==================================================
+
+def bench_engine(settings: dict, samples: list) -> dict:
+    started = time.perf_counter()
+    get_model(settings)
+    load_sec = time.perf_counter() - started
+
+    audio_sec = 0.0
+    transcribe_sec = 0.0
+    errors = 0.0
+    ref_words = 0
+
+    for sample in samples:
+        started = time.perf_counter()
+        result = transcribe_audio(sample["audio_path"], settings=settings)
+        transcribe_sec += time.perf_counter() - started
+        audio_sec += sample["duration_sec"]
+
+        # WER global pondéré par le nombre de mots de chaque échantillon
+        n_words = len(normalize_words(sample["reference"]))
+        errors += word_error_rate(sample["reference"], result["text"]) * n_words
+        ref_words += n_words
+
+    return {
+        "load_sec": round(load_sec, 2),
+        "transcribe_sec": round(transcribe_sec, 2),
+        "rtf": round(transcribe_sec / audio_sec, 3) if audio_sec else None,
+        "wer": round(errors / ref_words, 3) if ref_words else None,
+    }
+
+
+def bench_backend(backend: str, samples: list):
+    for model in MODELS:
+        for beam_size in BEAM_SIZES:
+            settings = {**TRANSCRIBER, "backend": backend, "model": model, "beam_size": beam_size}
+
+            try:
+                row = bench_engine(settings, samples)
+            except ImportError as e:
+                print(f"⚠️ {backend} ignoré : {e}")
+                return
+
+            print(
+                f"{backend:<15} {model:<6} beam={beam_size}  "
+                f"load={row['load_sec']:6.2f}s  rtf={row['rtf']:.3f}  wer={row['wer']:.3f}"
+            )
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+def main():
+    if sys.argv[1:2] == ["--extract"]:
+        video_path, start_sec, duration_sec, name = sys.argv[2:6]
+        audio_path = extract_sample(video_path, float(start_sec), float(duration_sec), name, DEFAULT_FIXTURE_DIR)
+        print(f"✅ {audio_path} créé : écris sa transcription dans le .txt du même nom")
+        return
+
+    fixture_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FIXTURE_DIR
+
+    if not os.path.isdir(fixture_dir):
+        print(
+            f"❌ Fixture introuvable : {fixture_dir} (.wav + .txt de référence, "
+            f"voir tools/fixtures/transcription/README.md)"
+        )
+        return
+
+    samples = load_fixture(fixture_dir)
+    if not samples:
+        print(f"❌ Aucun échantillon dans {fixture_dir}")
+        return
+
+    total_sec = sum(s["duration_sec"] for s in samples)
+    print(f"🎧 {len(samples)} échantillon(s), {total_sec:.1f}s d'audio, {TRANSCRIBER['threads']} thread(s)")
+
+    for backend in BACKENDS:
+        bench_backend(backend, samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# tools/bench_two_pass.py
+# --------------------------------------------------
+# Benchmark : détection deux passes (coarse -> fine) vs passe complète
+# - Pistes synthétiques WAV (bruit + pics, densités variées)
+#   + fichiers locaux éventuels
+# - Écart avec la passe 16 kHz complète : moments communs du top N
+#   (timestamps) + écart max d'intensité, code de sortie 1 si le top N diffère
+# - Temps des deux modes (décodage compris, cache désactivé) et gain :
+#   TWO_PASS_DETECTION (main.py) ne s'active que si le gain dépasse MIN_SPEEDUP
+# Usage : python -m tools.bench_two_pass [fichier ...]
+# --------------------------------------------------
+
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from analysis.audio_moment_detector import AUDIO_SAMPLE_RATE, detect_audio_moments
+
+MAX_RESULTS = 5
+MIN_SPEEDUP = 1.3   # en dessous : le mode deux passes ne vaut pas son écart
+
+
+def synthetic_wav(path: str, minutes: float, n_peaks: int, seed: int):
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * AUDIO_SAMPLE_RATE)
+
+    # fond variable (parole / musique simulées) + pics courts d'intensité variée
+    audio = rng.normal(0, 600, n) * (1 + 0.5 * np.sin(np.arange(n) / (AUDIO_SAMPLE_RATE * 40)))
+    for _ in range(n_peaks):
+        start = rng.integers(0, n - AUDIO_SAMPLE_RATE * 2)
+        length = int(rng.uniform(0.3, 2.0) * AUDIO_SAMPLE_RATE)
+        audio[start:start + length] += rng.normal(0, rng.uniform(2500, 9000), length)
+
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(AUDIO_SAMPLE_RATE)
+        w.writeframes(np.clip(audio, -32768, 32767).astype(np.int16).tobytes())
+
+
+def timed_moments(path: str, two_pass: bool) -> tuple:
+    t0 = time.perf_counter()
+    moments = detect_audio_moments(path, max_results=MAX_RESULTS, use_cache=False, two_pass=two_pass)
+    return {m["timestamp_sec"]: m["intensity"] for m in moments}, time.perf_counter() - t0
+
+
+def intensity_gap(full: dict, fast: dict) -> float:
+    """
+    Écart relatif max d'intensité sur les moments communs
+    """
+    shared = full.keys() & fast.keys()
+    if not shared:
+        return 0.0
+    return max(abs(fast[ts] - full[ts]) / full[ts] for ts in shared)
+
+
+def main():
+    mismatches = 0
+    total_full = total_fast = 0.0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sources = []
+        for minutes, n_peaks, seed in ((10, 8, 1), (30, 40, 2), (60, 200, 3)):
+            path = os.path.join(tmp_dir, f"synth_{minutes}min_{n_peaks}pics.wav")
+            synthetic_wav(path, minutes, n_peaks, seed)
+            sources.append(path)
+        sources += sys.argv[1:]
+
+        print(
+            f"{'source':<28} {'complète':>10} {'2 passes':>10} {'gain':>6} "
+            f"{'communs':>8} {'écart int.':>10}"
+        )
+
+        for path in sources:
+            full, t_full = timed_moments(path, two_pass=False)
+            fast, t_fast = timed_moments(path, two_pass=True)
+
+            total_full += t_full
+            total_fast += t_fast
+
+            shared = len(full.keys() & fast.keys())
+            same = full.keys() == fast.keys()
+            mismatches += not same
+
+            print(
+                f"{os.path.basename(path)[:28]:<28} {t_full:>8.2f} s {t_fast:>8.2f} s "
+                f"{t_full / max(t_fast, 1e-9):>5.2f}x {shared:>4}/{len(full):<3} "
+                f"{intensity_gap(full, fast):>9.1%}"
+                + ("" if same else f"  ❌ {sorted(full)} ≠ {sorted(fast)}")
+            )
+
+    speedup = total_full / max(total_fast, 1e-9)
+    print(f"\nTotal : complète {total_full:.2f} s | 2 passes {total_fast:.2f} s | gain {speedup:.2f}x")
+
+    if mismatches:
+        print(f"❌ {mismatches} source(s) avec un top {MAX_RESULTS} différent : TWO_PASS_DETECTION à laisser désactivé")
+        sys.exit(1)
+
+    if speedup < MIN_SPEEDUP:
+        print(f"⚠️ Top {MAX_RESULTS} identique mais gain < {MIN_SPEEDUP}x : TWO_PASS_DETECTION à laisser désactivé")
+        return
+
+    print(f"✅ Top {MAX_RESULTS} identique et gain réel : TWO_PASS_DETECTION activable")
+
+
+if __name__ == "__main__":
+    main()